@@ -27,6 +27,7 @@ from yeahml.build.build_model import build_model
 
 # train
 from yeahml.train.train_model import train_model
+from yeahml.train.tune_batch_size import tune_batch_size
 
 # evaluate
 from yeahml.evaluate.eval_model import eval_model
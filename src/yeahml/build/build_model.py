@@ -3,6 +3,11 @@ from typing import Any, Dict
 
 import tensorflow as tf
 
+from yeahml.build.components.distribution import configure_strategy, is_chief
+from yeahml.build.components.precision import (
+    configure_precision_policy,
+    get_precision_policy_name,
+)
 from yeahml.build.layers.config import NOTPRESENT
 from yeahml.config.graph_analysis.build_graph_dict import get_node_config_by_name
 from yeahml.information.write_info import write_build_information
@@ -133,6 +138,7 @@ def build_model(config_dict: Dict[str, Dict[str, Any]]) -> Any:
     meta_cdict: Dict[str, Any] = config_dict["meta"]
     log_cdict: Dict[str, Any] = config_dict["logging"]
     # data_cdict: Dict[str, Any] = config_dict["data"]
+    perf_cdict: Dict[str, Any] = config_dict["performance"]
     graph_dict: Dict[str, Any] = config_dict["graph_dict"]
     graph_dependencies: Dict[str, Any] = config_dict["graph_dependencies"]
 
@@ -147,111 +153,126 @@ def build_model(config_dict: Dict[str, Dict[str, Any]]) -> Any:
     logger = config_logger(full_exp_path, log_cdict, "build")
     logger.info("-> START building graph")
 
+    # the strategy is created first since the devices/collective ops can only
+    # be configured before any other tf ops are run. the variables of the model
+    # are created under the strategy scope and the strategy is then available
+    # from `model.distribute_strategy`
+    strategy = configure_strategy(perf_cdict, logger)
+
     try:
-        reset_graph_deterministic(meta_cdict["seed"])
+        reset_graph_deterministic(meta_cdict["random_seed"])
     except KeyError:
         reset_graph()
 
-    # g_logger = config_logger(full_exp_path, log_cdict, "graph")
+    # the precision policy must be set before any of the layers are created
+    precision_policy = configure_precision_policy(get_precision_policy_name(perf_cdict))
+    logger.info(f"precision policy: {precision_policy.name}")
 
-    # configure/build all layers and save in lookup table
-    built_nodes = {}
-    # {"<layer_name>": {"func": <layer_func>, "out": <output_of_layer>}}
-    for name, node in graph_dict.items():
+    # g_logger = config_logger(full_exp_path, log_cdict, "graph")
 
-        node_config = get_node_config_by_name(node.name, config_dict)
-        if not node_config:
-            raise ValueError(f"layer {name} can't be found in {node.config_location}")
-        blueprint = node_config["object_dict"]
+    with strategy.scope():
+        # configure/build all layers and save in lookup table
+        built_nodes = {}
+        # {"<layer_name>": {"func": <layer_func>, "out": <output_of_layer>}}
+        for name, node in graph_dict.items():
 
-        if node.startpoint:
-            if node.label:
-                pass
+            node_config = get_node_config_by_name(node.name, config_dict)
+            if not node_config:
+                raise ValueError(
+                    f"layer {name} can't be found in {node.config_location}"
+                )
+            blueprint = node_config["object_dict"]
+
+            if node.startpoint:
+                if node.label:
+                    pass
+                else:
+                    func = None
+                    out = _configure_input(name, blueprint)
             else:
-                func = None
-                out = _configure_input(name, blueprint)
-        else:
-            func = _configure_layer(name, blueprint)
-            out = None
-
-        # TODO: this is a quick fix. the issue is that a node that is a label,
-        # does not need to be built as a layer in the graph -- it is only used
-        # as a target during training and therefore does not need to be included
-        # here
-        if not node.label:
-            built_nodes[name] = {"out": out, "func": func}
-
-    for group_of_nodes in graph_dependencies:
-        list_of_nodes = list(group_of_nodes)
-        for cur_node in list_of_nodes:
-            if cur_node:
-                if not graph_dict[cur_node].label:
-                    if not _is_valid_output(built_nodes[cur_node]["out"]):
-                        # create the output (it doesn't exist yet)
-                        in_names = graph_dict[cur_node].in_name
-                        prev_outputs = []
-                        for in_name in in_names:
-                            prev_out = built_nodes[in_name]["out"]
-                            prev_outputs.append(prev_out)
-
-                        # if only one previous output is present, remove list
-                        if len(prev_outputs) == 1:
-                            prev_outputs = prev_outputs[0]
-
-                        # connect
-                        cur_out = built_nodes[cur_node]["func"](prev_outputs)
-                        built_nodes[cur_node]["out"] = cur_out
-                    else:
-                        pass
-
-    model_input_tensors = []
-    for name in model_io_cdict["inputs"]:
-        try:
-            node_d = built_nodes[name]
-        except KeyError:
-            raise KeyError(f"{name} not found in built nodes when creating inputs")
-
-        try:
-            out = node_d["out"]
-        except KeyError:
-            raise KeyError(
-                f"out was not created for {name} when creating tensor inputs"
-            )
-        model_input_tensors.append(out)
-    if not model_input_tensors:
-        raise ValueError(f"not model inputs are available")
-
-    model_output_tensors = []
-    for name in model_io_cdict["outputs"]:
-        try:
-            node_d = built_nodes[name]
-        except KeyError:
-            raise KeyError(f"{name} not found in built nodes when creating outputs")
-
-        try:
-            out = node_d["out"]
-        except KeyError:
-            raise KeyError(
-                f"out was not created for {name} when creating tensor outputs"
-            )
-        model_output_tensors.append(out)
-    if not model_output_tensors:
-        raise ValueError(f"not model outputs are available")
-
-    # ---------------------------------------------
-
-    # TODO: inputs may be more complex than an ordered list
-    # TODO: outputs could be a list
-    # TODO: right now it is assumed that the last layer defined in the config is the
-    # output layer -- this may not be true. named outputs would be better.
-    model = tf.keras.Model(
-        inputs=model_input_tensors,
-        outputs=model_output_tensors,
-        name=model_cdict["name"],
-    )
+                func = _configure_layer(name, blueprint)
+                out = None
+
+            # TODO: this is a quick fix. the issue is that a node that is a label,
+            # does not need to be built as a layer in the graph -- it is only used
+            # as a target during training and therefore does not need to be included
+            # here
+            if not node.label:
+                built_nodes[name] = {"out": out, "func": func}
+
+        for group_of_nodes in graph_dependencies:
+            list_of_nodes = list(group_of_nodes)
+            for cur_node in list_of_nodes:
+                if cur_node:
+                    if not graph_dict[cur_node].label:
+                        if not _is_valid_output(built_nodes[cur_node]["out"]):
+                            # create the output (it doesn't exist yet)
+                            in_names = graph_dict[cur_node].in_name
+                            prev_outputs = []
+                            for in_name in in_names:
+                                prev_out = built_nodes[in_name]["out"]
+                                prev_outputs.append(prev_out)
+
+                            # if only one previous output is present, remove list
+                            if len(prev_outputs) == 1:
+                                prev_outputs = prev_outputs[0]
+
+                            # connect
+                            cur_out = built_nodes[cur_node]["func"](prev_outputs)
+                            built_nodes[cur_node]["out"] = cur_out
+                        else:
+                            pass
+
+        model_input_tensors = []
+        for name in model_io_cdict["inputs"]:
+            try:
+                node_d = built_nodes[name]
+            except KeyError:
+                raise KeyError(f"{name} not found in built nodes when creating inputs")
+
+            try:
+                out = node_d["out"]
+            except KeyError:
+                raise KeyError(
+                    f"out was not created for {name} when creating tensor inputs"
+                )
+            model_input_tensors.append(out)
+        if not model_input_tensors:
+            raise ValueError(f"not model inputs are available")
+
+        model_output_tensors = []
+        for name in model_io_cdict["outputs"]:
+            try:
+                node_d = built_nodes[name]
+            except KeyError:
+                raise KeyError(f"{name} not found in built nodes when creating outputs")
+
+            try:
+                out = node_d["out"]
+            except KeyError:
+                raise KeyError(
+                    f"out was not created for {name} when creating tensor outputs"
+                )
+            model_output_tensors.append(out)
+        if not model_output_tensors:
+            raise ValueError(f"not model outputs are available")
+
+        # ---------------------------------------------
+
+        # TODO: inputs may be more complex than an ordered list
+        # TODO: outputs could be a list
+        # TODO: right now it is assumed that the last layer defined in the config is the
+        # output layer -- this may not be true. named outputs would be better.
+        model = tf.keras.Model(
+            inputs=model_input_tensors,
+            outputs=model_output_tensors,
+            name=model_cdict["name"],
+        )
 
     # write meta.json including model hash
-    if write_build_information(model_cdict, meta_cdict):
-        logger.info("information json file created")
+    # NOTE: when training on multiple workers, only the chief writes
+    if is_chief(strategy):
+        if write_build_information(model_cdict, meta_cdict):
+            logger.info("information json file created")
 
     return model
@@ -87,7 +87,7 @@ class Callback:
 
     """
 
-    def __init__(self, relation_key=None):
+    def __init__(self, relation_key=None, relation_names=None):
         if not relation_key:
             raise ValueError(
                 f"no relation_key {relation_key} detected, please select from {CB_RELATION_KEY}"
@@ -96,7 +96,19 @@ class Callback:
             raise ValueError(
                 f"{relation_key} not allowed, please select from {CB_RELATION_KEY}"
             )
+        if relation_names is not None:
+            if relation_key == "global":
+                raise ValueError(
+                    f"relation_names ({relation_names}) can not be used with a global relation_key"
+                )
+            if isinstance(relation_names, str):
+                relation_names = [relation_names]
         self.relation_key = relation_key
+        # the names (e.g. of the optimizers) the callback relates to, all if None
+        self.relation_names = relation_names
+
+    def relates_to(self, name):
+        return self.relation_names is None or name in self.relation_names
 
     # task
     @implemented
@@ -233,25 +245,27 @@ class TrainCallback(Callback):
         """
 
 
+# e.g. ["pre_task", "post_task", "pre_obtain_task", ...]
+CB_HOOK_NAMES = [
+    f"{timing}_{state}" for state in CB_STATE_OPTIONS for timing in CB_TIMING_OPTIONS
+]
+
+
 class Callbacks:
     def __init__(self, callbacks):
         # TODO: could check to ensure these are valid callbacks
         self.callbacks = callbacks if callbacks else None
 
         # create dictionary of the callbacks to call at the specified time+state
-        cb_dict = {}
+        # NOTE: only the implemented methods are included, a callback may not
+        # define every hook (e.g. calc_gradient is specific to TrainCallback)
+        cb_dict = {cb_name: [] for cb_name in CB_HOOK_NAMES}
         if self.callbacks:
-            combos = itertools.product(CB_TIMING_OPTIONS, CB_STATE_OPTIONS)
             for cb in self.callbacks:
-                for cb_name_tup in combos:
+                for cb_name in CB_HOOK_NAMES:
                     # e.g. pre_task
-                    cb_name = f"{cb_name_tup[0]}_{cb_name_tup[1]}"
-                    try:
-                        _ = cb_dict[cb_name]
-                    except KeyError:
-                        cb_dict[cb_name] = []
-                    cb_method = getattr(cb, cb_name)
-                    if is_implemented(cb_method):
+                    cb_method = getattr(cb, cb_name, None)
+                    if cb_method and is_implemented(cb_method):
                         cb_dict[cb_name].append(cb_method)
         self.cb_dict = cb_dict
 
@@ -275,54 +289,72 @@ class Callbacks:
         return str(self.__class__) + ": " + str(self.__dict__)
 
 
-def callback_mapper(cur_func):
-    def _callback_mapper(self, *args, **kwargs):
-        opt_name, obj_name, ds_name = (
-            kwargs["opt_name"],
-            kwargs["obj_name"],
-            kwargs["ds_name"],
-        )
+def _get_caller(cb_methods):
+    # None if there is nothing to call, so that the hook can be skipped
+    if not cb_methods:
+        return None
+    if len(cb_methods) == 1:
+        return cb_methods[0]
 
-        if self.rel_dict["global"]:
-            cb_method = getattr(self.rel_dict["global"]["global"], cur_func.__name__)
+    def _call_all():
+        for cb_method in cb_methods:
             cb_method()
 
-        if self.rel_dict["optimizer"]:
-            cb_method = getattr(self.rel_dict["optimizer"][opt_name], cur_func.__name__)
-            cb_method()
+    return _call_all
 
-        if self.rel_dict["objective"]:
-            cb_method = getattr(self.rel_dict["objective"][obj_name], cur_func.__name__)
-            cb_method()
 
-        if self.rel_dict["dataset"]:
-            cb_method = getattr(self.rel_dict["dataset"][ds_name], cur_func.__name__)
-            cb_method()
+class Hooks:
+    """the callback methods to call at each hook (e.g. `pre_batch`) of a
+    (group of) optimizer(s), objective(s) and dataset. A hook that no callback
+    implements is None so that it costs nothing to skip
+
+    e.g.
+        if hooks.pre_batch:
+            hooks.pre_batch()
+    """
 
-    return _callback_mapper
+    def __init__(self, hook_to_methods):
+        self.hook_to_methods = hook_to_methods
+        for hook_name in CB_HOOK_NAMES:
+            setattr(self, hook_name, _get_caller(hook_to_methods.get(hook_name, ())))
+
+    def combine(self, timing, states):
+        # a single caller for the hooks of several states that are run
+        # together (e.g. the fused prediction, loss and gradient calculation)
+        # e.g. combine("pre", ["prediction", "loss", "calc_gradient"])
+        cb_methods = []
+        for state in states:
+            cb_methods.extend(self.hook_to_methods.get(f"{timing}_{state}", ()))
+        return _get_caller(tuple(cb_methods))
+
+    def __str__(self):
+        return str(self.__class__) + ": " + str(self.__dict__)
+
+
+def _unique(cb_methods):
+    # preserve the order, a (e.g. global) callback is only called once
+    out = []
+    for cb_method in cb_methods:
+        if cb_method not in out:
+            out.append(cb_method)
+    return tuple(out)
 
 
 class CallbackContainer:
     def __init__(
         self, callbacks, optimizer_names=None, objective_names=None, dataset_names=None
     ):
-        """
+        """the callbacks are called through a dispatch table that is created
+        here (from `is_implemented`), mapping each
+        (hook, optimizer, objective, dataset) to the callback methods to call,
+        in the order global, optimizer, objective, dataset. Only the
+        combinations with at least one method are included. The global
+        callbacks alone are under (hook, None, None, None)
+
         {
-            "global": {
-                "global": Callbacks(),
-            },
-            "objective": {
-                "<a>": Callbacks(),
-                "<b>": Callbacks()
-            },
-            "optimizer": {
-                "<a>": Callbacks(),
-                "<b>": Callbacks()
-            },
-            "dataset": {
-                "<a>": Callbacks(),
-                "<b>": Callbacks()
-            }
+            ("pre_batch", "main_opt", "main_obj", "abalone"): (<method>, ...),
+            ("pre_batch", None, None, None): (<method>, ...),
+            ...
         }
         """
 
@@ -334,180 +366,85 @@ class CallbackContainer:
         if not dataset_names:
             raise ValueError("no datasets detected")
 
-        # TODO: in these two preceding blocks; there is likely a more elegant
-        # way to approach this
-        opt_, obj_, ds_, g_ = [], [], [], []
+        rel_to_cbs = {rel_key: [] for rel_key in CB_RELATION_KEY}
         if self.callbacks:
             for cb in self.callbacks:
-                if cb.relation_key == "global":
-                    g_.append(cb)
-                elif cb.relation_key == "optimizer":
-                    opt_.append(cb)
-                elif cb.relation_key == "objective":
-                    obj_.append(cb)
-                elif cb.relation_key == "dataset":
-                    ds_.append(cb)
-        tmp_dict = {}
-        for rel_def in CB_RELATION_KEY:
-            if rel_def == "global":
-                if g_:
-                    tmp_dict[rel_def] = Callbacks(g_)
-                else:
-                    tmp_dict[rel_def] = None
-            elif rel_def == "optimizer":
-                if opt_:
-                    tmp_dict[rel_def] = Callbacks(opt_)
-                else:
-                    tmp_dict[rel_def] = None
-            elif rel_def == "objective":
-                # TODO: loop names
-                if obj_:
-                    tmp_dict[rel_def] = Callbacks(obj_)
-                else:
-                    tmp_dict[rel_def] = None
-            elif rel_def == "dataset":
-                # TODO: loop names
-                if ds_:
-                    tmp_dict[rel_def] = Callbacks(ds_)
-                else:
-                    tmp_dict[rel_def] = None
-
-        # I really don't like this block... this shouldn't be hardcoded, but I
-        # don't see an obvious solution at the moment and it's only 4 values at
-        # the moment so it's still manageable
-        # loop names of each relationship:
-        rel_dict = {}
-        for rel_key in CB_RELATION_KEY:
+                if not isinstance(cb, Callback):
+                    raise ValueError(
+                        f"callback {cb} is not a yeahml Callback (with a relation_key from {CB_RELATION_KEY})"
+                    )
+                rel_to_cbs[cb.relation_key].append(cb)
+
+        # the Callbacks related to each name of each relationship:
+        # {"optimizer": {"main_opt": Callbacks(), ...}, "global": {None: ...}}
+        rel_dict = {"global": {None: Callbacks(rel_to_cbs["global"])}}
+        for rel_key, names in [
+            ("optimizer", optimizer_names),
+            ("objective", objective_names),
+            ("dataset", dataset_names),
+        ]:
             rel_dict[rel_key] = {}
-            if rel_key == "optimizer":
-                if tmp_dict[rel_key]:
-                    for opt_name in optimizer_names:
-                        rel_dict[rel_key][opt_name] = tmp_dict[rel_key].copy()
-            elif rel_key == "objective":
-                if tmp_dict[rel_key]:
-                    for obj_name in objective_names:
-                        rel_dict[rel_key][obj_name] = tmp_dict[rel_key].copy()
-            elif rel_key == "dataset":
-                if tmp_dict[rel_key]:
-                    for ds_name in dataset_names:
-                        rel_dict[rel_key][ds_name] = tmp_dict[rel_key].copy()
-            elif rel_key == "global":
-                if tmp_dict[rel_key]:
-                    rel_dict[rel_key][rel_key] = tmp_dict[rel_key].copy()
-            else:
-                pass
-
+            for name in names:
+                rel_dict[rel_key][name] = Callbacks(
+                    [cb for cb in rel_to_cbs[rel_key] if cb.relates_to(name)]
+                )
         self.rel_dict = rel_dict
 
-    # task
-    # I'm concerned about passing these context names every time..
-    # TODO: since these are all the same, can we make them dynamically in the init?
-    @callback_mapper
-    def pre_task(self, *, opt_name, obj_name, ds_name):
-        pass
-
-    @callback_mapper
-    def post_task(self, *, opt_name, obj_name, ds_name):
-        pass
-
-    # obtain_task
-    @callback_mapper
-    def pre_obtain_task(self, *, opt_name, obj_name, ds_name):
-        """[summary]
-        """
-
-    @callback_mapper
-    def post_obtain_task(self, *, opt_name, obj_name, ds_name):
-        """[summary]
-        """
-
-    # obtain_dataset
-    @callback_mapper
-    def pre_obtain_dataset(self, *, opt_name, obj_name, ds_name):
-        """[summary]
-        """
-
-    @callback_mapper
-    def post_obtain_dataset(self, *, opt_name, obj_name, ds_name):
-        """[summary]
-        """
-
-    # dataset_pass
-    @callback_mapper
-    def pre_dataset_pass(self, *, opt_name, obj_name, ds_name):
-        """[summary]
-        """
-
-    @callback_mapper
-    def post_dataset_pass(self, *, opt_name, obj_name, ds_name):
-        """[summary]
-        """
-
-    # batch
-    @callback_mapper
-    def pre_batch(self, *, opt_name, obj_name, ds_name):
-        """[summary]
-        """
-
-    @callback_mapper
-    def post_batch(self, *, opt_name, obj_name, ds_name):
-        """[summary]
-        """
-
-    # obtain_data
-    @callback_mapper
-    def pre_obtain_batch(self, *, opt_name, obj_name, ds_name):
-        """[summary]
-        """
-
-    @callback_mapper
-    def post_obtain_batch(self, *, opt_name, obj_name, ds_name):
-        """[summary]
-        """
-
-    # prediction
-    @callback_mapper
-    def pre_prediction(self, *, opt_name, obj_name, ds_name):
-        """[summary]
-        """
-
-    @callback_mapper
-    def post_prediction(self, *, opt_name, obj_name, ds_name):
-        """[summary]
-        """
-
-    # performance
-    @callback_mapper
-    def pre_performance(self, *, opt_name, obj_name, ds_name):
-        """[summary]
-        """
-
-    @callback_mapper
-    def post_performance(self, *, opt_name, obj_name, ds_name):
-        """[summary]
-        """
-
-    # loss
-    @callback_mapper
-    def pre_loss(self, *, opt_name, obj_name, ds_name):
-        """[summary]
-        """
-
-    @callback_mapper
-    def post_loss(self, *, opt_name, obj_name, ds_name):
-        """[summary]
-        """
-
-    # metric
-    @callback_mapper
-    def pre_metric(self, *, opt_name, obj_name, ds_name):
-        """[summary]
-        """
-
-    @callback_mapper
-    def post_metric(self, *, opt_name, obj_name, ds_name):
-        """[summary]
-        """
+        dispatch = {}
+        global_cb_dict = rel_dict["global"][None].cb_dict
+        for hook_name in CB_HOOK_NAMES:
+            if global_cb_dict[hook_name]:
+                dispatch[(hook_name, None, None, None)] = tuple(
+                    global_cb_dict[hook_name]
+                )
+            for opt_name, obj_name, ds_name in itertools.product(
+                optimizer_names, objective_names, dataset_names
+            ):
+                cb_methods = _unique(
+                    global_cb_dict[hook_name]
+                    + rel_dict["optimizer"][opt_name].cb_dict[hook_name]
+                    + rel_dict["objective"][obj_name].cb_dict[hook_name]
+                    + rel_dict["dataset"][ds_name].cb_dict[hook_name]
+                )
+                if cb_methods:
+                    dispatch[(hook_name, opt_name, obj_name, ds_name)] = cb_methods
+        self.dispatch = dispatch
+        self._hooks_cache = {}
+
+    def hooks(self, optimizer_names=(), objective_names=(), dataset_name=None):
+        """the Hooks of a (group of) optimizer(s) and objective(s) training on a
+        dataset, or of only the global callbacks if no names are given. These
+        are created once and should be obtained outside of the batch loop
+
+        e.g.
+            hooks = cbc.hooks(["main_opt"], ["main_obj", "second_obj"], "abalone")
+        """
+        key = (tuple(optimizer_names), tuple(objective_names), dataset_name)
+        try:
+            return self._hooks_cache[key]
+        except KeyError:
+            pass
+
+        if optimizer_names:
+            combos = list(
+                itertools.product(optimizer_names, objective_names, [dataset_name])
+            )
+        else:
+            combos = [(None, None, None)]
+        hook_to_methods = {}
+        for hook_name in CB_HOOK_NAMES:
+            cb_methods = []
+            for opt_name, obj_name, ds_name in combos:
+                cb_methods.extend(
+                    self.dispatch.get((hook_name, opt_name, obj_name, ds_name), ())
+                )
+            cb_methods = _unique(cb_methods)
+            if cb_methods:
+                hook_to_methods[hook_name] = cb_methods
+
+        hooks = Hooks(hook_to_methods)
+        self._hooks_cache[key] = hooks
+        return hooks
 
     def __str__(self):
         return str(self.__class__) + ": " + str(self.__dict__)
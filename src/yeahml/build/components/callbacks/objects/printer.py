@@ -9,8 +9,10 @@ def print_mapper(cur_func):
 
 
 class Printer(TrainCallback):
-    def __init__(self, monitor="something", relation_key=None):
-        super(Printer, self).__init__(relation_key=relation_key)
+    def __init__(self, monitor="something", relation_key=None, relation_names=None):
+        super(Printer, self).__init__(
+            relation_key=relation_key, relation_names=relation_names
+        )
         self.monitor = monitor
 
     # task
@@ -0,0 +1,146 @@
+import tensorflow as tf
+
+
+def return_available_strategies():
+    return ["default", "mirrored", "multi_worker_mirrored"]
+
+
+def get_distribution_cdict(perf_cdict):
+    try:
+        dist_cdict = perf_cdict["distribution"]
+    except KeyError:
+        dist_cdict = None
+    if not dist_cdict:
+        dist_cdict = {"strategy": "default"}
+    return dist_cdict
+
+
+def _configure_logical_cpus(num_cpu_devices, logger=None):
+    # split the (first) physical cpu into `num_cpu_devices` logical devices so
+    # that a MirroredStrategy can be used on a single machine without gpus
+    cpus = tf.config.list_physical_devices("CPU")
+    try:
+        tf.config.set_logical_device_configuration(
+            cpus[0], [tf.config.LogicalDeviceConfiguration()] * num_cpu_devices
+        )
+    except RuntimeError as e:
+        # the logical devices can't be modified once the runtime is initialized
+        if logger:
+            logger.warning(
+                f"unable to create {num_cpu_devices} logical cpu devices ({e}),"
+                f" using: {tf.config.list_logical_devices('CPU')}"
+            )
+    return [d.name for d in tf.config.list_logical_devices("CPU")]
+
+
+def _configure_cluster_resolver(dist_cdict):
+    # the cluster is specified in the config (rather than the TF_CONFIG env
+    # var) so that each process can be launched with the same config and
+    # only the task index changed
+    try:
+        cluster = dist_cdict["cluster"]
+        task = dist_cdict["task"]
+    except KeyError:
+        raise KeyError(
+            f"performance:distribution:cluster and performance:distribution:task are required for multi_worker_mirrored, not: {dist_cdict}"
+        )
+    try:
+        task_type = task["type"]
+    except KeyError:
+        task_type = "worker"
+
+    cluster_resolver = tf.distribute.cluster_resolver.SimpleClusterResolver(
+        tf.train.ClusterSpec(cluster),
+        task_type=task_type,
+        task_id=task["index"],
+        rpc_layer="grpc",
+    )
+    return cluster_resolver
+
+
+def configure_strategy(perf_cdict, logger=None):
+    """create the tf.distribute strategy the model is built under. NOTE: this
+    must be called before any other tf ops are run (the logical devices and
+    the collective ops can only be configured at startup)
+
+    e.g.
+        performance:distribution:
+            strategy: "mirrored"
+            num_cpu_devices: 4
+
+        performance:distribution:
+            strategy: "multi_worker_mirrored"
+            cluster:
+                worker: ["localhost:12345", "localhost:12346"]
+            task:
+                type: "worker"
+                index: 0
+    """
+    dist_cdict = get_distribution_cdict(perf_cdict)
+    strategy_name = dist_cdict["strategy"]
+
+    if strategy_name == "default":
+        return tf.distribute.get_strategy()
+    elif strategy_name == "mirrored":
+        try:
+            devices = dist_cdict["devices"]
+        except KeyError:
+            devices = None
+        try:
+            num_cpu_devices = dist_cdict["num_cpu_devices"]
+        except KeyError:
+            num_cpu_devices = None
+
+        if num_cpu_devices:
+            cpu_devices = _configure_logical_cpus(num_cpu_devices, logger)
+            if not devices:
+                devices = cpu_devices
+        strategy = tf.distribute.MirroredStrategy(devices=devices)
+    elif strategy_name == "multi_worker_mirrored":
+        strategy = tf.distribute.MultiWorkerMirroredStrategy(
+            cluster_resolver=_configure_cluster_resolver(dist_cdict)
+        )
+    else:
+        raise ValueError(
+            f"distribution strategy {strategy_name} is not one of {return_available_strategies()}"
+        )
+
+    if logger:
+        logger.info(
+            f"distribution strategy: {strategy_name}, replicas: {strategy.num_replicas_in_sync}"
+        )
+
+    return strategy
+
+
+def is_distributed(strategy):
+    # the default strategy is returned when outside of any strategy scope
+    return strategy is not tf.distribute.get_strategy()
+
+
+def is_chief(strategy):
+    # only the chief writes (tensorboard, info.json, etc). when there is no
+    # chief in the cluster, the first worker is the chief
+    try:
+        cluster_resolver = strategy.cluster_resolver
+    except AttributeError:
+        cluster_resolver = None
+    if not cluster_resolver:
+        return True
+
+    cluster_spec = cluster_resolver.cluster_spec()
+    if not cluster_spec.jobs:
+        return True
+
+    task_type, task_id = cluster_resolver.task_type, cluster_resolver.task_id
+    if task_type == "chief":
+        return True
+    return task_type == "worker" and task_id == 0 and "chief" not in cluster_spec.jobs
+
+
+def get_task_id(strategy):
+    try:
+        task_id = strategy.cluster_resolver.task_id
+    except AttributeError:
+        task_id = None
+    return task_id if task_id else 0
@@ -0,0 +1,50 @@
+import tensorflow as tf
+
+DEFAULT_PRECISION_POLICY = "float32"
+
+
+def return_available_precision_policies():
+    # NOTE: the keras policy names are used directly
+    return ["float32", "mixed_float16", "mixed_bfloat16"]
+
+
+def get_precision_policy_name(perf_cdict):
+    try:
+        policy_name = perf_cdict["mixed_precision"]
+    except KeyError:
+        policy_name = None
+    if not policy_name:
+        policy_name = DEFAULT_PRECISION_POLICY
+
+    avail_policies = return_available_precision_policies()
+    if policy_name not in avail_policies:
+        raise KeyError(
+            f"precision policy {policy_name} not available in options {avail_policies}"
+        )
+
+    return policy_name
+
+
+def configure_precision_policy(policy_name):
+    # the global policy is used by every layer built after this call. it is
+    # always set (even to float32) so that a policy from a previously built
+    # model (e.g. in a notebook) is not carried over
+    tf.keras.mixed_precision.set_global_policy(policy_name)
+    return tf.keras.mixed_precision.global_policy()
+
+
+def requires_loss_scaling(policy_name):
+    # bfloat16 has the same exponent range as float32, only float16 gradients
+    # are at risk of underflowing
+    return policy_name == "mixed_float16"
+
+
+def configure_loss_scale_optimizer(optimizer):
+    # dynamic loss scaling. the loss is scaled before the gradient is
+    # calculated and the gradients are unscaled before being applied (see
+    # `train/gradients/gradients.py`)
+    return tf.keras.mixed_precision.LossScaleOptimizer(optimizer)
+
+
+def is_loss_scale_optimizer(optimizer):
+    return isinstance(optimizer, tf.keras.mixed_precision.LossScaleOptimizer)
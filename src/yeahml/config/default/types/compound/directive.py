@@ -11,7 +11,9 @@ instruction/training "recipe" directly, with options specifying more advanced fe
 
 def _create_instruction_bounds(instructions: str) -> List[Tuple[int, int]]:
     """converts an instruction string into a list of bounds containing the 
-    index of the opening and closing parenthesis
+    index of the opening and closing parenthesis. The bounds are ordered by
+    the closing parenthesis, so that an inner group is always listed before
+    the group that contains it
     
     Parameters
     ----------
@@ -28,92 +30,94 @@ def _create_instruction_bounds(instructions: str) -> List[Tuple[int, int]]:
     Raises
     ------
     ValueError
-        a string that does not have a closing ) for a (
+        a string that does not have a closing ) for a ( (or a ( for a ))
     """
 
     steps = []
-    left_indexes = []
-    right_indexes = []
+    # indexes of the `(` that have not yet been closed, the last one is closed
+    # by the next `)`
+    open_indexes = []
 
     for i, char in enumerate(instructions):
-        # open and close
         if char == "(":
-            left_indexes.append(i)
+            open_indexes.append(i)
         elif char == ")":
-            right_indexes.append(i)
-
+            if not open_indexes:
+                raise ValueError(
+                    f"no corresponding left index was found for the right ) at index {i} - {instructions[:i]}"
+                )
+            steps.append((open_indexes.pop(), i))
         # rest are assumed optimizer names or comments or instructions
         else:
             pass
 
-    # build all steps of instructions
-    for i, right_ind in enumerate(right_indexes):
-        corresponding_l_paren_index = None
-
-        # find corresponding index from left paren
-        for j, left_ind in enumerate(left_indexes):
-            if left_ind > right_ind:
-                # we need the value before it becomes larger
-                corresponding_l_paren_index = j - 1
-        if not corresponding_l_paren_index:
-            # will obtain furthest `(`
-            corresponding_l_paren_index = len(left_indexes) - 1
-
-        if corresponding_l_paren_index < 0:
-            raise ValueError(
-                f"no corresponding left index was found for the right ) at index {right_ind} - {instructions[:right_ind]}"
-            )
-
-        lv = left_indexes[corresponding_l_paren_index]
-        left_indexes.remove(lv)
-        steps.append((lv, right_ind))
+    if open_indexes:
+        raise ValueError(
+            f"no corresponding right index was found for the left ( at index {open_indexes[-1]} - {instructions[open_indexes[-1]:]}"
+        )
 
     return steps
 
 
-def _create_instruction_order_dict(
+def _create_nested_instructs(
     instructions: str, instruction_bounds: List[Tuple[int, int]]
-):
-    """parse and label each instruction step
+) -> Dict[str, str]:
+    """parse and label each instruction step, where each group (a step within
+    parens) contained by the step is replaced by the name of that step. 
+    Some instructions contain compound steps (i.e. contain entire steps that 
+    should be done seperately). The visual example below explains this more
+    clearly.
     
     Parameters
     ----------
     instructions : str
         the instruction string
         e.g.
-            '(((main_opt, second_opt) & second_opt & third_opt) & second_opt)'
-    instruction_bounds : Tuple[int, int]
-        the indexes of parenthesis for a given instruction step
+            '(((main_opt, second_opt) & second_opt) | (third_opt & main_opt))'
+    instruction_bounds : List[Tuple[int, int]]
+        the indexes of parenthesis for each instruction step, inner steps first
         e.g.
-            [(2, 23), (1, 49), (0, 63)]
+            [(2, 23), (1, 37), (41, 62), (0, 63)]
     
     Returns
     -------
-    Dict[int: str]
-        where the int is the instruction order and the string is the given
-        instruction
+    Dict[str, str]
+        dictionary containing nested instructions, where the number of the
+        name is the instruction order
         e.g.
             {
                 "YEAHML_0": "main_opt, second_opt",
-                "YEAHML_1": "(main_opt, second_opt) & second_opt & third_opt",
-                "YEAHML_2": "((main_opt, second_opt) & second_opt & third_opt) & second_opt",
+                "YEAHML_1": "YEAHML_0 & second_opt",
+                "YEAHML_2": "third_opt & main_opt",
+                "YEAHML_3": "YEAHML_1 | YEAHML_2",
             }
 
     """
-
-    instruct_dict = {}
-
-    if instruction_bounds:
-        for i, step in enumerate(instruction_bounds):
-            cur_instruction_string = instructions[step[0] + 1 : step[1]]
-            name_key = f"YEAHML_{i}"  # TODO: a hash would be more elegant?
-            instruct_dict[name_key] = cur_instruction_string
-    else:
+    if not instruction_bounds:
         # there are no bounds, wrap entire string
-        name_key = "YEAHML_0"
-        instruct_dict[name_key] = instructions
+        return {"YEAHML_0": instructions}
+
+    bounds_by_start = dict(instruction_bounds)
+    name_by_start = {}
+    compact_dict = {}
+    for i, (start, stop) in enumerate(instruction_bounds):
+        name_key = f"YEAHML_{i}"  # TODO: a hash would be more elegant?
+        name_by_start[start] = name_key
+
+        # NOTE: the steps contained by this step have already been named (they
+        # are closed first), each is replaced by its name and skipped
+        parts = []
+        ind = start + 1
+        while ind < stop:
+            if instructions[ind] == "(":
+                parts.append(name_by_start[ind])
+                ind = bounds_by_start[ind] + 1
+            else:
+                parts.append(instructions[ind])
+                ind += 1
+        compact_dict[name_key] = "".join(parts)
 
-    return instruct_dict
+    return compact_dict
 
 
 def _parse_instruction_dict(
@@ -132,8 +136,8 @@ def _parse_instruction_dict(
         [description]
         e.g.
             {
-                "YEAHML_2": "(YEAHML_1)&second_opt",
-                "YEAHML_1": "(YEAHML_0)&second_opt&third_opt",
+                "YEAHML_2": "YEAHML_1&second_opt",
+                "YEAHML_1": "YEAHML_0&second_opt&third_opt",
                 "YEAHML_0": "main_opt,second_opt",
             }
     
@@ -171,11 +175,11 @@ def _parse_instruction_dict(
                 pass
 
         if not op_indexes:
-            if len(instruction_dict) == 1:
-                split_on_space = instruct_str.split(" ")
-                if len(split_on_space) == 1:
-                    parsed_instructions[key_name]["operation"] = SINGLE_OP_DEF
-                    parsed_instructions[key_name]["optimizers"] = instruct_str
+            # a single optimizer e.g. "main_opt"
+            name = instruct_str.strip()
+            if len(instruction_dict) == 1 and name and len(name.split(" ")) == 1:
+                parsed_instructions[key_name]["operation"] = SINGLE_OP_DEF
+                parsed_instructions[key_name]["optimizers"] = name
             else:
                 raise ValueError(f"no operations were found in {instruct_str}")
         else:
@@ -191,10 +195,8 @@ def _parse_instruction_dict(
                 optimizer_names.append(instruct_str[prev_i + 1 : op_i])
             optimizer_names.append(instruct_str[op_i + 1 :])
 
-            # strip `(` and `)`
-            optimizer_names = [
-                name.lstrip("( ").rstrip(" )") for name in optimizer_names
-            ]
+            # NOTE: the inner groups have already been replaced by their name
+            optimizer_names = [name.strip() for name in optimizer_names]
             parsed_instructions[key_name]["optimizers"] = optimizer_names
 
             if not len(set(op_types)) == 1:
@@ -206,69 +208,24 @@ def _parse_instruction_dict(
     return parsed_instructions
 
 
-def _create_nested_instructs(instruction_dict: Dict[str, str]) -> Dict[str, str]:
-    """ create a compact instruction set that nests the instructions. 
-    Some instructions contain compound steps (i.e. contain entire steps that 
-    should be done seperately). The visual example below explains this more
-    clearly.
-    
-    Parameters
-    ----------
-    instruction_dict : Dict[str, str]
-        dictionary containing the instruction name and instruction string
-        e.g.
-            {
-                "YEAHML_0": "main_opt,second_opt",
-                "YEAHML_1": "(main_opt,second_opt)&second_opt",
-                "YEAHML_2": "((main_opt,second_opt)&second_opt)&second_opt",
-            }
-    
-    Returns
-    -------
-    Dict[str, str]
-        dictionary containing nested instructions
-        e.g.
-            {
-                "YEAHML_2": "(YEAHML_1)&second_opt",
-                "YEAHML_1": "(YEAHML_0)&second_opt",
-                "YEAHML_0": "main_opt,second_opt",
-            }
-
+def _is_wrapped(instructions: str) -> bool:
+    """whether the entire instruction string is within a single pair of parens
+    e.g. True for "((main_opt, second_opt) & third_opt)" and False for
+    "(main_opt, second_opt) & third_opt"
     """
-    compact_dict = {}
-
-    # loop the instructions keys backwards. they are numbered by the name and so
-    # a reversed will work -- e.g. "YEAHML_1", "YEAHML_2", etc..
-    # NOTE: the logic here is to remove the custom name str (YEAHML), split on
-    # the split key ("_"), then obtain the str of a number and convert it to an
-    # int for sorting
-    key_list = list(instruction_dict.keys())
-    first_k = key_list[0]
-    split_key = "_"
-    ind = len(first_k.split(split_key)[0]) + len(split_key)
-    outter_to_inner = list(sorted(key_list, key=lambda x: int(x[ind:])))
-
-    outter_to_inner.reverse()
-    for i, k in enumerate(outter_to_inner):
-        # skip final case
-        if i + 1 < len(outter_to_inner):
-            outer_str = instruction_dict[k]
-            next_k = outter_to_inner[i + 1]
-            inner_str = instruction_dict[next_k]
-
-            # replace the inner string with the key
-            # e.g.
-            #   (main_opt,second_opt)&second_opt
-            #   will become
-            #   (YEAHML_N)&second_opt
-            outer_str = outer_str.replace(inner_str, next_k)
-
-            compact_dict[k] = outer_str
-        else:
-            # retain the final, un-nested instruction string
-            compact_dict[k] = instruction_dict[k]
-
-    return compact_dict
+    instructions = instructions.strip()
+    if not instructions.startswith("(") or not instructions.endswith(")"):
+        return False
+    depth = 0
+    for i, char in enumerate(instructions):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0 and i < len(instructions) - 1:
+                # the first paren was closed before the end
+                return False
+    return True
 
 
 def parse_instructions(instructions: str) -> Dict[str, Dict[str, Any]]:
@@ -313,10 +270,15 @@ def parse_instructions(instructions: str) -> Dict[str, Dict[str, Any]]:
         l_paren == r_paren
     ), f"number of `(` and `)` parens not equal `(`: {l_paren}, `)`: {r_paren}"
 
+    # the outermost operation is only parsed if it is within parens
+    # e.g. "(main_opt & second_opt), third_opt" would otherwise only contain
+    # the joint operation
+    if not _is_wrapped(instructions):
+        instructions = f"({instructions})"
+
     # chain of functions to parse individual operations
     instruction_bounds = _create_instruction_bounds(instructions)
-    instruction_dict = _create_instruction_order_dict(instructions, instruction_bounds)
-    nested_instructs = _create_nested_instructs(instruction_dict)
+    nested_instructs = _create_nested_instructs(instructions, instruction_bounds)
     parsed_instructions = _parse_instruction_dict(nested_instructs)
 
     return parsed_instructions
@@ -18,14 +18,64 @@ HYPER_PARAMETERS = {
                 is_type=int,
                 description="hyper_parameters:dataset:shuffle_buffer: <int>",
             ),
+            KPH("remainder", exact=True, required=False): Text(
+                is_in_list=["drop", "keep", "keep_eval"],
+                to_lower=True,
+                description=(
+                    "how the final partial batch of each split is handled. 'drop'\n"
+                    "(default) drops it, 'keep' keeps it for every split and\n"
+                    "'keep_eval' keeps it for all splits but train (so that the\n"
+                    "val/test results include every instance while the train step\n"
+                    "is only run on full batches)\n"
+                    " > e.g. hyper_parameters:dataset:remainder: 'keep_eval'"
+                ),
+            ),
         },
         "epochs": Numeric(is_type=int, description="hyper_parameters:epochs: <int>"),
+        KPH("val_every_n_steps", exact=True, required=False): Numeric(
+            is_type=int,
+            description=(
+                "run validation every n training steps rather than after each\n"
+                "pass through the training dataset\n"
+                " > e.g. hyper_parameters:val_every_n_steps: 500"
+            ),
+        ),
+        KPH("val_max_batches", exact=True, required=False): Numeric(
+            is_type=int,
+            description=(
+                "validate on (at most) the first n batches of the val dataset\n"
+                " > e.g. hyper_parameters:val_max_batches: 20"
+            ),
+        ),
+        KPH("val_fraction", exact=True, required=False): Numeric(
+            is_type=float,
+            description=(
+                "validate on a fixed fraction of the val batches (every\n"
+                "1/fraction-th batch)\n"
+                " > e.g. hyper_parameters:val_fraction: 0.25"
+            ),
+        ),
         KPH("early_stopping", exact=True, required=False): {
             "epochs": Numeric(is_type=int, description="patience"),
             "warm_up": Numeric(
                 is_type=int,
                 description="allow training to 'warm up' before keeping track",
             ),
+            # the loss of an objective is monitored (min) unless specified
+            KPH("monitor", exact=True, required=False): {
+                KPH("objective_name", multi=True): {
+                    "metric": Text(
+                        description=(
+                            "validation metric used to determine whether the\n"
+                            "objective is improving\n"
+                            " > e.g. hyper_parameters:early_stopping:monitor:main_obj:metric: 'meansquarederror'"
+                        )
+                    ),
+                    KPH("track", exact=True, required=False): Text(
+                        is_in_list=["min", "max"], to_lower=True
+                    ),
+                }
+            },
         },
     }
 }
@@ -41,7 +41,87 @@ LOGGING = {
                 is_type=int,
                 description="the frequency (as a number of training steps) at which to log tracker information",
             ),
-            "tensorboard": {"param_steps": Numeric(default_value=0, is_type=int)},
+            "tensorboard": {
+                "param_steps": Numeric(default_value=0, is_type=int),
+                KPH("param_sample_size", exact=True, required=False): Numeric(
+                    is_type=int,
+                    description=(
+                        "number of values sampled from each variable for the\n"
+                        "parameter histograms (all values if not set)\n"
+                        " > e.g. logging:track:tensorboard:param_sample_size: 10000"
+                    ),
+                ),
+                KPH("param_max_variables", exact=True, required=False): Numeric(
+                    is_type=int,
+                    description=(
+                        "max number of variables logged per parameter histogram\n"
+                        "call, the variables are rotated through\n"
+                        " > e.g. logging:track:tensorboard:param_max_variables: 20"
+                    ),
+                ),
+            },
+        },
+        KPH("profile", exact=True, required=False): {
+            KPH("start_steps", exact=True, required=False): Multi(
+                element_types=int,
+                description=(
+                    "training steps at which to begin capturing a tf.profiler\n"
+                    "trace (written to tf_logs/profile)\n"
+                    " > e.g. logging:profile:start_steps: [50, 200]"
+                ),
+            ),
+            "num_steps": Numeric(
+                default_value=10,
+                is_type=int,
+                description=(
+                    "number of training steps captured by each profile\n"
+                    " > e.g. logging:profile:num_steps: 10"
+                ),
+            ),
+            "validation": Bool(
+                default_value=False,
+                description=(
+                    "capture a trace of the first validation pass\n"
+                    " > e.g. logging:profile:validation: True"
+                ),
+            ),
+        },
+        KPH("checkpoint", exact=True, required=False): {
+            KPH("every_n_steps", exact=True, required=False): Numeric(
+                is_type=int,
+                description=(
+                    "save a checkpoint (model, optimizers, step counters) every\n"
+                    "n training steps\n"
+                    " > e.g. logging:checkpoint:every_n_steps: 500"
+                ),
+            ),
+            KPH("every_n_seconds", exact=True, required=False): Numeric(
+                is_type=int,
+                description=(
+                    "save a checkpoint every n seconds\n"
+                    " > e.g. logging:checkpoint:every_n_seconds: 600"
+                ),
+            ),
+            KPH("max_to_keep", exact=True, required=False): Numeric(
+                is_type=int,
+                description=(
+                    "number of (most recent) checkpoints to keep\n"
+                    " > e.g. logging:checkpoint:max_to_keep: 3"
+                ),
+            ),
+            KPH("best", exact=True, required=False): {
+                "objective": Text(
+                    description=(
+                        "objective whose validation loss (or metric) determines the\n"
+                        "best params\n"
+                        " > e.g. logging:checkpoint:best:objective: 'main_obj'"
+                    )
+                ),
+                KPH("metric", exact=True, required=False): Text(),
+                KPH("track", exact=True, required=False): Text(
+                    is_in_list=["min", "max"], to_lower=True
+                ),
+            },
         },
     }
 }
@@ -8,6 +8,7 @@ from crummycm.validation.types.values.element.text import Text
 from crummycm.validation.types.values.element.bool import Bool
 from crummycm.validation.types.values.compound.multi import Multi
 from yeahml.build.components.optimizer import return_available_optimizers
+from yeahml.train.sample_tasks.scheduler import return_available_schedulers
 
 OPTIMIZE = {
     "optimize": {
@@ -26,8 +27,53 @@ OPTIMIZE = {
                     KPH("other_options", required=False): VPH("optimizer_options"),
                 },
                 "objectives": VPH("optimizer_objectives"),
+                KPH("accumulate_steps", exact=True, required=False): Numeric(
+                    is_type=int,
+                    description=(
+                        "Number of micro-batches to accumulate the gradients over\n"
+                        "before they are applied by the optimizer\n"
+                        " > e.g. optimize:optimizers:'name':accumulate_steps: 4"
+                    ),
+                ),
+                KPH("layers", exact=True, required=False): Multi(
+                    element_types=Text(),
+                    description=(
+                        "Layers (graph nodes) the optimizer updates, gradients are\n"
+                        "only calculated for the variables of these layers\n"
+                        " > e.g. optimize:optimizers:'name':layers: ['dense_1', 'y_pred']"
+                    ),
+                ),
+                KPH("jit_compile", exact=True, required=False): Bool(
+                    description=(
+                        "Compile the steps of the optimizer with XLA, overrides\n"
+                        "performance:jit_compile\n"
+                        " > e.g. optimize:optimizers:'name':jit_compile: False"
+                    )
+                ),
+                KPH("objective_weights", exact=True, required=False): VPH(
+                    "optimizer_objective_weights"
+                ),
             }
-        }
-        # "directive": {"instructions": "SS"},
+        },
+        KPH("scheduler", exact=True, required=False): {
+            "type": Text(
+                is_in_list=return_available_schedulers(),
+                to_lower=True,
+                description=(
+                    "How the next optimizer (and objective) to train is selected\n"
+                    " > e.g. optimize:scheduler:type: 'round_robin'"
+                ),
+            ),
+            KPH("options", exact=True, required=False): VPH("scheduler_options"),
+        },
+        KPH("directive", exact=True, required=False): {
+            "instructions": Text(
+                description=(
+                    "Order the optimizers are trained in. ',' sequential, '|'\n"
+                    "alternate, '&' joint (a single step for all optimizers)\n"
+                    " > e.g. optimize:directive:instructions: '(main_opt & second_opt), third_opt'"
+                )
+            )
+        },
     }
 }
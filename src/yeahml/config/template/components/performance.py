@@ -7,6 +7,8 @@ from crummycm.validation.types.values.element.numeric import Numeric
 from crummycm.validation.types.values.element.text import Text
 from crummycm.validation.types.values.element.bool import Bool
 from crummycm.validation.types.values.compound.multi import Multi
+from yeahml.build.components.distribution import return_available_strategies
+from yeahml.build.components.precision import return_available_precision_policies
 
 
 # NOTE: neither loss nor metric are required, and yet, without one it is useless
@@ -35,6 +37,93 @@ PERFORMANCE = {
                     "dataset": Text(),
                 },
             }
-        }
+        },
+        KPH("compiled_step", exact=True, required=False): Bool(
+            description=(
+                "Run the forward pass, gradient calculation, optimizer update and\n"
+                "constraint projection as a single compiled step per optimizer\n"
+                " > e.g. performance:compiled_step: True"
+            )
+        ),
+        KPH("steps_per_execution", exact=True, required=False): Numeric(
+            is_type=int,
+            description=(
+                "Number of training steps to run within a single compiled call,\n"
+                "trackers are then updated every n steps\n"
+                " > e.g. performance:steps_per_execution: 8"
+            ),
+        ),
+        KPH("mixed_precision", exact=True, required=False): Text(
+            is_in_list=return_available_precision_policies(),
+            description=(
+                "Precision policy used to build and train the model. float16\n"
+                "is trained with (dynamic) loss scaling\n"
+                " > e.g. performance:mixed_precision: 'mixed_bfloat16'"
+            ),
+        ),
+        KPH("distribution", exact=True, required=False): {
+            "strategy": Text(
+                is_in_list=return_available_strategies(),
+                to_lower=True,
+                description=(
+                    "tf.distribute strategy the model is built and trained under\n"
+                    " > e.g. performance:distribution:strategy: 'mirrored'"
+                ),
+            ),
+            KPH("devices", exact=True, required=False): Multi(element_types=Text()),
+            KPH("num_cpu_devices", exact=True, required=False): Numeric(
+                is_type=int,
+                description=(
+                    "Number of logical devices to split the cpu into, used as the\n"
+                    "devices of the strategy if none are specified\n"
+                    " > e.g. performance:distribution:num_cpu_devices: 4"
+                ),
+            ),
+            # TF_CONFIG-like specification used by multi_worker_mirrored
+            KPH("cluster", exact=True, required=False): {
+                KPH("chief", exact=True, required=False): Multi(element_types=Text()),
+                "worker": Multi(
+                    element_types=Text(),
+                    description=(
+                        "Addresses of the workers\n"
+                        " > e.g. performance:distribution:cluster:worker: ['localhost:12345', 'localhost:12346']"
+                    ),
+                ),
+            },
+            KPH("task", exact=True, required=False): {
+                KPH("type", exact=True, required=False): Text(
+                    is_in_list=["chief", "worker"]
+                ),
+                "index": Numeric(
+                    is_type=int,
+                    description=(
+                        "Index of the current process in the cluster (for the type)\n"
+                        " > e.g. performance:distribution:task:index: 0"
+                    ),
+                ),
+            },
+        },
+        KPH("max_traces", exact=True, required=False): Numeric(
+            is_type=int,
+            description=(
+                "Number of times a single step function may be traced before a\n"
+                "retracing warning is logged\n"
+                " > e.g. performance:max_traces: 2"
+            ),
+        ),
+        KPH("jit_compile", exact=True, required=False): Bool(
+            description=(
+                "Compile the train, validation and eval steps with XLA, a step\n"
+                "that can't be compiled falls back to a tf.function\n"
+                " > e.g. performance:jit_compile: True"
+            )
+        ),
+        KPH("async_validation", exact=True, required=False): Bool(
+            description=(
+                "Run validation on a snapshot of the weights in a background\n"
+                "thread while training continues\n"
+                " > e.g. performance:async_validation: True"
+            )
+        ),
     }
 }
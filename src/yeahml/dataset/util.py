@@ -6,22 +6,45 @@ import tensorflow as tf
 from yeahml.dataset.handle_data import return_batched_iter
 
 
-def _apply_ds_hyperparams(hp_cdict: Dict[str, Any], dataset: Any) -> Any:
+def get_drop_remainder(hp_cdict: Dict[str, Any], split_name: str = "") -> bool:
+    # whether the final partial batch of the split is dropped. When it is kept
+    # the batch dim of the element_spec (and so the input signature of the step
+    # fns) is None, a single trace then covers both the full and the partial
+    # batch. NOTE: the losses and metrics are per instance (averaged by the
+    # number of instances), and so are exact over a partial batch without
+    # padding/masking
+    try:
+        remainder = hp_cdict["dataset"]["remainder"]
+    except (KeyError, TypeError):
+        remainder = "drop"
+    if remainder == "keep":
+        return False
+    elif remainder == "keep_eval":
+        # the train step is only run on full (static) batches
+        return split_name == "train"
+    elif remainder == "drop":
+        return True
+    else:
+        raise ValueError(
+            f"hyper_parameters:dataset:remainder ({remainder}) must be one of ['drop', 'keep', 'keep_eval']"
+        )
+
+
+def _apply_ds_hyperparams(
+    hp_cdict: Dict[str, Any], dataset: Any, split_name: str = ""
+) -> Any:
     # these are hyperparameters applied to the (already created) dataset. Right
-    # now only `batch` is supported, but an additional shuffle could be
-    # suppported in the future as well as a check as to whether a <method> has
-    # previously been applied.
+    # now only `batch` (and how the remainder is handled) is supported, but an
+    # additional shuffle could be suppported in the future as well as a check
+    # as to whether a <method> has previously been applied.
 
     try:
         batch_size = hp_cdict["dataset"]["batch"]
     except KeyError:
         batch_size = 1
 
-    # TODO: dataset.padded_batch
-    # dataset = dataset.padded_batch(
-    #     batch_size, padded_shapes=(500, 1), drop_remainder=True
-    # )
-    dataset = dataset.batch(batch_size, drop_remainder=True)
+    drop_remainder = get_drop_remainder(hp_cdict, split_name)
+    dataset = dataset.batch(batch_size, drop_remainder=drop_remainder)
 
     return dataset
 
@@ -45,7 +68,10 @@ def get_configured_dataset(
     hp_cdict: Dict[str, Any],
     ds: Any = None,
     ds_type: str = "",
+    split_name: str = "",
 ) -> Any:
+    # split_name: e.g. "train", used to determine whether the final partial
+    # batch is kept (see `hyper_parameters:dataset:remainder`)
     if not ds:
         if not ds_type:
             raise ValueError(
@@ -58,6 +84,6 @@ def get_configured_dataset(
         ), f"a {type(ds)} was passed as a training dataset, please pass an instance of {tf.data.Dataset}"
         dataset = ds
 
-    configured_dataset = _apply_ds_hyperparams(hp_cdict, dataset)
+    configured_dataset = _apply_ds_hyperparams(hp_cdict, dataset, split_name)
 
     return configured_dataset
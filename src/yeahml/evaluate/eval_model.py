@@ -10,6 +10,7 @@ from yeahml.build.components.metric import configure_metric
 from yeahml.dataset.handle_data import return_batched_iter  # datasets from tfrecords
 from yeahml.dataset.util import get_configured_dataset
 from yeahml.log.yf_logging import config_logger
+from yeahml.train.gradients.trace import jit_compile_available
 from yeahml.train.inference import inference_on_ds
 
 #####
@@ -19,7 +20,6 @@ from yeahml.train.util import (
     get_next_batch,
     re_init_iter,
 )
-from yeahml.train.gradients.gradients import get_validation_step_fn
 
 ################
 from yeahml.config.create_configs import make_hash
@@ -113,9 +113,7 @@ def create_ds_to_lm_mapping(perf_cdict):
             try:
                 _ = ds_to_chash[ds_name][conf_hash]
             except KeyError:
-                ds_to_chash[ds_name][conf_hash] = {
-                    "inference_fn": get_validation_step_fn()
-                }
+                ds_to_chash[ds_name][conf_hash] = {}
 
             try:
                 s = ds_to_chash[ds_name][conf_hash]["metric"]
@@ -257,6 +255,15 @@ def eval_model(
     # create output index
     chash_to_output_index = create_output_index(model, chash_to_in_config)
 
+    # compile the eval steps with XLA (falls back to a tf.function if the model
+    # can't be compiled)
+    try:
+        jit_compile = perf_cdict["jit_compile"]
+    except KeyError:
+        jit_compile = False
+    if jit_compile:
+        jit_compile = jit_compile_available(logger)
+
     # objectives to objects
     # TODO: "test" should be obtained from the config
     # this returns a in_config, which isn't really needed.
@@ -281,7 +288,6 @@ def eval_model(
             ), f"only supervised is currently allowed, not {cur_objective_config['type']} :("
             logger.info(f"current config: {cur_objective_config}")
 
-            cur_inference_fn = cur_hash_conf["inference_fn"]
             cur_metrics_objective_names = cur_hash_conf["metric"]
             cur_loss_objective_names = cur_hash_conf["loss"]
             cur_dataset_iter = dataset_iter_dict[cur_ds_name][split_name]
@@ -291,7 +297,6 @@ def eval_model(
             temp_ret = inference_on_ds(
                 model,
                 cur_dataset_iter,
-                cur_inference_fn,
                 cur_loss_objective_names,
                 cur_metrics_objective_names,
                 objectives_to_objects,
@@ -300,6 +305,7 @@ def eval_model(
                 eval_split,
                 logger,
                 pred_dict,
+                jit_compile=jit_compile,
             )
             ret_dict[cur_ds_name][in_hash] = temp_ret
 
@@ -0,0 +1,90 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import tensorflow as tf
+
+
+def create_shadow_model(model, logger=None):
+    """create a copy of the model (with separate variables) that can be used
+    to run inference on a snapshot of the weights while the original model
+    continues to be trained. None is returned if the model can't be cloned
+    """
+    try:
+        shadow_model = tf.keras.models.clone_model(model)
+    except (ValueError, TypeError, NotImplementedError) as e:
+        if logger:
+            logger.warning(f"unable to create a shadow model of {model.name}: {e}")
+        return None
+
+    if len(shadow_model.variables) != len(model.variables):
+        if logger:
+            logger.warning(
+                f"shadow model of {model.name} does not have the same variables"
+                f" ({len(shadow_model.variables)} != {len(model.variables)})"
+            )
+        return None
+
+    return shadow_model
+
+
+class AsyncInference:
+    """run inference (e.g. a validation pass) on a snapshot of the model
+    weights on a background thread. The weights are copied into the shadow
+    model before the inference fn is submitted so that training can continue
+    on the original model.
+
+    only a single pass is run at a time, submitting a new pass will wait for
+    the previous pass to complete. The result of each pass is returned (on
+    the calling thread) by `wait`, `poll` or `close` so that any state shared
+    with training is only updated by the caller
+    """
+
+    def __init__(self, model, shadow_model, logger=None):
+        self.model = model
+        self.shadow_model = shadow_model
+        self.logger = logger
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="yeahml_inference"
+        )
+        self._future = None
+
+        # NOTE: the variables are copied on device (no host round trip)
+        @tf.function
+        def copy_weights():
+            for shadow_v, v in zip(self.shadow_model.variables, self.model.variables):
+                shadow_v.assign(v)
+
+        self._copy_weights = copy_weights
+
+    def submit(self, inference_fn, *args, **kwargs):
+        # inference_fn is called with the shadow model as the first argument.
+        # NOTE: the result of the previous pass should be collected (`wait`)
+        # first, otherwise it is discarded
+        self.wait()
+        self._copy_weights()
+        self._future = self._executor.submit(
+            inference_fn, self.shadow_model, *args, **kwargs
+        )
+
+    def poll(self):
+        # the result of the current pass if it is complete (without blocking),
+        # otherwise None
+        if self._future and self._future.done():
+            return self.wait()
+        return None
+
+    def wait(self):
+        # block until the current pass (if any) is complete. any exception
+        # raised on the background thread is raised here
+        ret = None
+        if self._future:
+            ret = self._future.result()
+            self._future = None
+        return ret
+
+    def close(self):
+        ret = self.wait()
+        self._executor.shutdown()
+        return ret
+
+    def __str__(self):
+        return str(self.__class__) + ": " + str(self.__dict__)
@@ -0,0 +1,410 @@
+import json
+import time
+from pathlib import Path
+
+import tensorflow as tf
+
+from yeahml.train.setup.tracker.tracker import Tracker
+from yeahml.train.util import get_losses_to_update, get_metrics_to_update
+
+DEFAULT_MAX_TO_KEEP = 3
+
+
+def get_checkpoint_options():
+    # the variable values are copied and then written to disk on a background
+    # thread so that the training loop is not blocked on the write. NOTE: the
+    # python state (`TrainingState`) is not copied, it is serialized on the
+    # background thread, a snapshot of it is then taken in `Checkpointer.save`
+    try:
+        options = tf.train.CheckpointOptions(experimental_enable_async_checkpoint=True)
+    except TypeError:
+        # not available in older versions of tf, the checkpoint is written
+        # synchronously
+        options = tf.train.CheckpointOptions()
+    return options
+
+
+def get_checkpoint_cdict(log_cdict):
+    try:
+        ckpt_cdict = log_cdict["checkpoint"]
+    except KeyError:
+        ckpt_cdict = None
+    if not ckpt_cdict:
+        ckpt_cdict = {}
+    return ckpt_cdict
+
+
+def _to_json(obj):
+    # numpy values (e.g. the Tracker values)
+    try:
+        return obj.item()
+    except AttributeError:
+        raise TypeError(f"{obj} ({type(obj)}) is not json serializable")
+
+
+def get_tracker_state(tracker_dict):
+    # nested dict of the Tracker values in the (nested) tracker dict. Any
+    # other values (e.g. the optimizer objects) are not included
+    state = {}
+    for k, v in tracker_dict.items():
+        if isinstance(v, Tracker):
+            state[k] = dict(v.__dict__)
+        elif isinstance(v, dict):
+            sub_state = get_tracker_state(v)
+            if sub_state:
+                state[k] = sub_state
+    return state
+
+
+def load_tracker_state(tracker_dict, state):
+    for k, v in tracker_dict.items():
+        if k not in state:
+            continue
+        if isinstance(v, Tracker):
+            v.__dict__.update(state[k])
+        elif isinstance(v, dict):
+            load_tracker_state(v, state[k])
+
+
+def get_training_state(
+    obj_ds_to_epoch,
+    opt_obj_ds_to_training,
+    main_tracker_dict,
+    early_stopping=None,
+    task_state=None,
+):
+    # task_state: the state of the task selection (schedulers, execution plan
+    # and rng), see `get_task_state` in train_model
+    return {
+        "obj_ds_to_epoch": obj_ds_to_epoch,
+        "opt_obj_ds_to_training": opt_obj_ds_to_training,
+        "trackers": get_tracker_state(main_tracker_dict),
+        "early_stopping": early_stopping.state if early_stopping else None,
+        "task": task_state,
+    }
+
+
+def build_optimizers(model, optimizers_dict, opt_to_variables=None):
+    # create the optimizer variables (e.g. the adam slots) of each optimizer
+    # for the variables it updates. NOTE: an async checkpoint does not save
+    # the current values of variables that are created after it is first
+    # saved (e.g. the slots of an optimizer that has not been applied yet)
+    for opt_name, opt_conf in optimizers_dict.items():
+        optimizer = opt_conf["optimizer"]
+        if not hasattr(optimizer, "build"):
+            # e.g. a legacy optimizer, the slots are created when applied
+            continue
+        variables = None
+        if opt_to_variables:
+            variables = opt_to_variables.get(opt_name, None)
+        if variables is None:
+            variables = model.trainable_variables
+        with model.distribute_strategy.scope():
+            optimizer.build(variables)
+
+
+class TrainingState(tf.train.experimental.PythonState):
+    """python state of the training loop (e.g. the epoch counts and the
+    Tracker history) that is saved (as json) within the checkpoint"""
+
+    def __init__(self):
+        self.state = {}
+
+    def serialize(self):
+        return json.dumps(self.state, default=_to_json)
+
+    def deserialize(self, string_value):
+        self.state = json.loads(string_value)
+
+
+class Checkpointer:
+    """saves the model, every optimizer and the step counters with a
+    tf.train.CheckpointManager on a step and/or time schedule. A separate
+    "best" checkpoint (model params only) is kept, driven by the Tracker
+    (min/max) updates of the validation pass of an objective.
+
+    e.g.
+        logging:checkpoint:
+            every_n_steps: 500
+            every_n_seconds: 600
+            max_to_keep: 3
+            best:
+                objective: "main_obj"
+                metric: "meansquarederror"  # the loss is used if not specified
+                track: "min"
+
+    the best model may be a different model than the one being trained (e.g.
+    the shadow model used by async validation), it is expected to have the
+    same structure so that the best params can be restored into the model
+
+    so that a run can be resumed exactly, the checkpoint also includes the
+    gradient accumulators, the (train) metric objects, the position of the
+    train dataset iterators and the python state of the training loop
+    """
+
+    def __init__(
+        self,
+        model,
+        optimizers_dict,
+        save_model_path,
+        save_best_param_path,
+        ckpt_cdict,
+        best_model=None,
+        opt_to_accumulator=None,
+        opt_to_variables=None,
+        objectives_dict=None,
+        logger=None,
+    ):
+        self.logger = logger
+        self.options = get_checkpoint_options()
+        build_optimizers(model, optimizers_dict, opt_to_variables)
+
+        self.every_n_steps = ckpt_cdict.get("every_n_steps", None)
+        self.every_n_seconds = ckpt_cdict.get("every_n_seconds", None)
+        max_to_keep = ckpt_cdict.get("max_to_keep", DEFAULT_MAX_TO_KEEP)
+        for k, v in [
+            ("every_n_steps", self.every_n_steps),
+            ("every_n_seconds", self.every_n_seconds),
+            ("max_to_keep", max_to_keep),
+        ]:
+            if v is not None and v < 1:
+                raise ValueError(f"logging:checkpoint:{k} ({v}) must be greater than 0")
+
+        # the python counters of the training loop are copied into variables
+        # before each save
+        self.num_training_ops = tf.Variable(
+            0, dtype=tf.int64, trainable=False, name="num_training_ops"
+        )
+        self.opt_to_steps = {
+            opt_name: tf.Variable(
+                0, dtype=tf.int64, trainable=False, name=f"{opt_name}_steps"
+            )
+            for opt_name in optimizers_dict.keys()
+        }
+
+        accumulators = {}
+        if opt_to_accumulator:
+            for opt_name, accumulator in opt_to_accumulator.items():
+                if accumulator:
+                    accumulators[opt_name] = {
+                        "num_accumulated": accumulator.num_accumulated,
+                        "accumulated": accumulator._accumulated,
+                    }
+        # the partially accumulated train losses/metrics (reset each time the
+        # trackers are updated)
+        train_metrics = {}
+        if objectives_dict:
+            for obj_name, obj_dict in objectives_dict.items():
+                obj_metrics = []
+                if "loss" in obj_dict.keys() and obj_dict["loss"]:
+                    obj_metrics.extend(get_losses_to_update(obj_dict["loss"], "train"))
+                if "metrics" in obj_dict.keys():
+                    obj_metrics.extend(get_metrics_to_update(obj_dict, "train"))
+                train_metrics[obj_name] = obj_metrics
+
+        self.training_state = TrainingState()
+        self.checkpoint = tf.train.Checkpoint(
+            model=model,
+            optimizers={
+                opt_name: opt_conf["optimizer"]
+                for opt_name, opt_conf in optimizers_dict.items()
+            },
+            num_training_ops=self.num_training_ops,
+            opt_to_steps=self.opt_to_steps,
+            accumulators=accumulators,
+            train_metrics=train_metrics,
+            training_state=self.training_state,
+        )
+        # model/exp_time/save/checkpoints/ckpt-<num_training_ops>
+        ckpt_dir = Path(save_model_path).parent.joinpath("checkpoints")
+        self.manager = tf.train.CheckpointManager(
+            self.checkpoint, directory=str(ckpt_dir), max_to_keep=max_to_keep
+        )
+        # NOTE: the iterators are recreated after each pass and the async
+        # checkpoint only includes the objects that are tracked when it is
+        # created. The position of the iterators is then written (synchronously)
+        # to a separate checkpoint with the same number
+        # model/exp_time/save/checkpoints/iterators/ckpt-<num_training_ops>
+        self.iterator_checkpoint = tf.train.Checkpoint()
+        self.iterator_manager = tf.train.CheckpointManager(
+            self.iterator_checkpoint,
+            directory=str(ckpt_dir.joinpath("iterators")),
+            max_to_keep=max_to_keep,
+        )
+        self._last_save_time = time.time()
+        self._last_save_step = None
+
+        try:
+            best_cdict = ckpt_cdict["best"]
+        except KeyError:
+            best_cdict = None
+        self.best_checkpoint, self.best_manager = None, None
+        if best_cdict:
+            self.best_objective = best_cdict["objective"]
+            self.best_metric = best_cdict.get("metric", None)
+            self.best_track = best_cdict.get("track", "min")
+            if not self.best_metric and self.best_track != "min":
+                # NOTE: the loss trackers only track the min
+                raise ValueError(
+                    f"the loss of {self.best_objective} can only be tracked by 'min', not {self.best_track}"
+                )
+            self.best_checkpoint = tf.train.Checkpoint(
+                model=best_model if best_model else model
+            )
+            # model/exp_time/save/params/best_params-<num_training_ops>
+            best_path = Path(save_best_param_path)
+            self.best_manager = tf.train.CheckpointManager(
+                self.best_checkpoint,
+                directory=str(best_path.parent),
+                max_to_keep=1,
+                checkpoint_name=best_path.stem,
+            )
+
+    def should_save(self, prev_training_ops, num_training_ops):
+        if self.every_n_steps:
+            # a multiple of n was reached in (prev, cur]
+            if (num_training_ops // self.every_n_steps) > (
+                prev_training_ops // self.every_n_steps
+            ):
+                return True
+        if self.every_n_seconds:
+            if time.time() - self._last_save_time >= self.every_n_seconds:
+                return True
+        return False
+
+    def _track_iterators(self, dataset_iter_dict):
+        # the current iterators are tracked before each save/restore. NOTE:
+        # only the position in the train datasets is saved, validation always
+        # starts from the beginning
+        self.iterator_checkpoint.iterators = {
+            ds_name: split_to_iter["train"]
+            for ds_name, split_to_iter in dataset_iter_dict.items()
+            if "train" in split_to_iter
+        }
+
+    def save(
+        self,
+        num_training_ops,
+        opt_to_steps,
+        training_state=None,
+        dataset_iter_dict=None,
+    ):
+        if num_training_ops == self._last_save_step:
+            # nothing has changed since the last save
+            return self.manager.latest_checkpoint
+        self.num_training_ops.assign(num_training_ops)
+        for opt_name, steps in opt_to_steps.items():
+            self.opt_to_steps[opt_name].assign(steps)
+        if training_state:
+            # a snapshot of the python state, the loop continues to update the
+            # (nested) dicts and the Tracker lists while the state is serialized
+            # on the background thread. NOTE: the previous save may not have
+            # serialized its state yet
+            self._sync(self.checkpoint)
+            self.training_state.state = json.loads(
+                json.dumps(training_state, default=_to_json)
+            )
+        if dataset_iter_dict:
+            self._track_iterators(dataset_iter_dict)
+            self.iterator_manager.save(checkpoint_number=num_training_ops)
+        save_path = self.manager.save(
+            checkpoint_number=num_training_ops, options=self.options
+        )
+        self._last_save_time = time.time()
+        self._last_save_step = num_training_ops
+        if self.logger:
+            self.logger.info(f"checkpoint saved: {save_path}")
+        return save_path
+
+    def restore(self, checkpoint_path, dataset_iter_dict=None):
+        """restore the checkpoint (values of objects that have not been
+        created yet, e.g. the optimizer slots, are restored on creation) and
+        return the python state of the training loop
+
+        e.g.
+            {
+                "num_training_ops": 120,
+                "opt_to_steps": {"main_opt": 1920},
+                "training_state": {"obj_ds_to_epoch": {...}, "trackers": {...}},
+            }
+        """
+        self.checkpoint.restore(checkpoint_path).assert_existing_objects_matched()
+        num_training_ops = int(self.num_training_ops.numpy())
+
+        if dataset_iter_dict:
+            ckpt_path = Path(checkpoint_path)
+            iterator_path = ckpt_path.parent.joinpath("iterators").joinpath(
+                ckpt_path.name
+            )
+            if tf.io.gfile.exists(f"{iterator_path}.index"):
+                self._track_iterators(dataset_iter_dict)
+                self.iterator_checkpoint.restore(
+                    str(iterator_path)
+                ).assert_existing_objects_matched()
+            elif self.logger:
+                self.logger.warning(
+                    f"no iterator checkpoint found at {iterator_path}, the train datasets will start from the beginning"
+                )
+
+        self._last_save_step = num_training_ops
+        if self.logger:
+            self.logger.info(
+                f"restored {checkpoint_path}, num_training_ops: {num_training_ops}"
+            )
+        return {
+            "num_training_ops": num_training_ops,
+            "opt_to_steps": {
+                opt_name: int(v.numpy()) for opt_name, v in self.opt_to_steps.items()
+            },
+            "training_state": self.training_state.state,
+        }
+
+    def is_best(self, val_update):
+        # val_update is the update returned by the validation pass, e.g.
+        # {"main_obj": {"loss": {"mse": {"mean": {"min": True}}},
+        #               "metrics": {"meansquarederror": {"min": True, "max": False}}}}
+        try:
+            obj_update = val_update[self.best_objective]
+        except KeyError:
+            # the objective was not part of this validation pass
+            return False
+
+        if self.best_metric:
+            try:
+                return obj_update["metrics"][self.best_metric][self.best_track]
+            except (KeyError, TypeError):
+                raise KeyError(
+                    f"metric {self.best_metric} ({self.best_track}) is not tracked for {self.best_objective}: {obj_update['metrics']}"
+                )
+        for _, desc_update in obj_update["loss"].items():
+            for _, tracker_update in desc_update.items():
+                if tracker_update[self.best_track]:
+                    return True
+        return False
+
+    def save_best(self, val_update, num_training_ops):
+        # NOTE: this may be called from the async validation thread, in which
+        # case the best model is the (snapshot) shadow model
+        if not self.best_manager:
+            return None
+        if not self.is_best(val_update):
+            return None
+        save_path = self.best_manager.save(
+            checkpoint_number=num_training_ops, options=self.options
+        )
+        if self.logger:
+            self.logger.info(f"best params saved: {save_path}")
+        return save_path
+
+    def _sync(self, checkpoint):
+        # wait for the checkpoint to be written (if async)
+        if checkpoint and hasattr(checkpoint, "sync"):
+            checkpoint.sync()
+
+    def close(self):
+        # wait for any checkpoints that are still being written
+        for checkpoint in [self.checkpoint, self.best_checkpoint]:
+            self._sync(checkpoint)
+
+    def __str__(self):
+        return str(self.__class__) + ": " + str(self.__dict__)
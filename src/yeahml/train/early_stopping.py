@@ -0,0 +1,99 @@
+class EarlyStopping:
+    """watches the validation Tracker updates of each (optimizer, objective)
+    and marks the objective as stopped once it has not improved for
+    `patience` validation passes. The first `warm_up` validation passes are
+    not counted.
+
+    the loss of an objective is used (an improvement is a new min) unless a
+    metric (and whether to track the min or max) is specified for the
+    objective.
+
+    e.g.
+        hyper_parameters:early_stopping:
+            epochs: 3  # patience
+            warm_up: 2
+            monitor:
+                main_obj:
+                    metric: "meansquarederror"
+                    track: "min"
+
+    NOTE: `update` is called on the main thread once a validation pass is
+    collected (even if the pass was run on the async validation thread), the
+    stopped objectives are collected by the training loop with `pop_stopped`
+    """
+
+    def __init__(self, patience, warm_up=0, obj_to_monitor=None):
+        if patience < 1:
+            raise ValueError(
+                f"early_stopping:epochs ({patience}) must be greater than 0"
+            )
+        if warm_up < 0:
+            raise ValueError(f"early_stopping:warm_up ({warm_up}) must not be negative")
+        self.patience = patience
+        self.warm_up = warm_up
+        self.obj_to_monitor = obj_to_monitor if obj_to_monitor else {}
+        for obj_name, monitor in self.obj_to_monitor.items():
+            if not monitor.get("metric", None) and monitor.get("track", "min") != "min":
+                # NOTE: the loss trackers only track the min
+                raise ValueError(
+                    f"the loss of {obj_name} can only be tracked by 'min', not {monitor['track']}"
+                )
+
+        # {opt_name: {obj_name: {"num_checks": int, "num_bad": int, "stopped": bool}}}
+        self.state = {}
+        self._stopped = []
+
+    def _improved(self, obj_name, obj_update):
+        try:
+            monitor = self.obj_to_monitor[obj_name]
+        except KeyError:
+            monitor = {}
+        metric_name = monitor.get("metric", None)
+        track = monitor.get("track", "min")
+
+        if metric_name:
+            try:
+                return obj_update["metrics"][metric_name][track]
+            except (KeyError, TypeError):
+                raise KeyError(
+                    f"metric {metric_name} ({track}) is not tracked for {obj_name}: {obj_update['metrics']}"
+                )
+        for _, desc_update in obj_update["loss"].items():
+            for _, tracker_update in desc_update.items():
+                if tracker_update[track]:
+                    return True
+        return False
+
+    def update(self, optimizer_name, val_update):
+        # val_update is the update returned by the validation pass, e.g.
+        # {"main_obj": {"loss": {"mse": {"mean": {"min": True}}}, "metrics": ...}}
+        stopped = []
+        opt_state = self.state.setdefault(optimizer_name, {})
+        for obj_name, obj_update in val_update.items():
+            obj_state = opt_state.setdefault(
+                obj_name, {"num_checks": 0, "num_bad": 0, "stopped": False}
+            )
+            obj_state["num_checks"] += 1
+            if obj_state["num_checks"] <= self.warm_up:
+                continue
+            if self._improved(obj_name, obj_update):
+                obj_state["num_bad"] = 0
+            else:
+                obj_state["num_bad"] += 1
+            # NOTE: only the transition into the stopped state is recorded
+            if obj_state["num_bad"] >= self.patience and not obj_state.get(
+                "stopped", False
+            ):
+                obj_state["stopped"] = True
+                stopped.append((optimizer_name, obj_name))
+
+        self._stopped.extend(stopped)
+        return stopped
+
+    def pop_stopped(self):
+        # [(optimizer_name, objective_name)] stopped since the last call
+        stopped, self._stopped = self._stopped, []
+        return stopped
+
+    def __str__(self):
+        return str(self.__class__) + ": " + str(self.__dict__)
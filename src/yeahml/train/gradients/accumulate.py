@@ -0,0 +1,67 @@
+import tensorflow as tf
+
+
+class GradientAccumulator:
+    """sums the gradients of `accumulate_steps` micro-batches in variables
+    that are allocated once (one per trainable variable). The accumulated
+    gradients are averaged by the number of micro-batches so that the update
+    is equivalent to the gradient of the (mean) loss over the full effective
+    batch.
+
+    the methods may be called from within a tf.function
+    """
+
+    def __init__(self, variables, accumulate_steps, name="accumulator"):
+        self.name = name
+        self.accumulate_steps = accumulate_steps
+        self.variables = list(variables)
+        self.num_accumulated = tf.Variable(
+            0, dtype=tf.int64, trainable=False, name=f"{name}/num_accumulated"
+        )
+        self._accumulated = [
+            tf.Variable(
+                tf.zeros_like(v),
+                trainable=False,
+                name=f"{name}/{v.name.split(':')[0]}",
+            )
+            for v in self.variables
+        ]
+        # the variables that have received a gradient. this is determined when
+        # the calling fn is traced (a gradient is either None or it is not).
+        # variables without a gradient are returned as None rather than 0 so
+        # that the optimizer does not update them
+        self._has_grad = [False] * len(self.variables)
+
+    def accumulate(self, grads):
+        for i, (acc, grad) in enumerate(zip(self._accumulated, grads)):
+            if grad is None:
+                continue
+            self._has_grad[i] = True
+            if isinstance(grad, tf.IndexedSlices):
+                # only the gathered rows are updated
+                acc.scatter_add(grad)
+            else:
+                acc.assign_add(grad)
+        self.num_accumulated.assign_add(1)
+
+    def is_ready(self):
+        return self.num_accumulated >= self.accumulate_steps
+
+    def gradients(self):
+        num_accumulated = tf.maximum(self.num_accumulated, 1)
+        grads = []
+        for i, acc in enumerate(self._accumulated):
+            if self._has_grad[i]:
+                grads.append(acc / tf.cast(num_accumulated, acc.dtype))
+            else:
+                grads.append(None)
+        return grads
+
+    def reset(self):
+        for i, acc in enumerate(self._accumulated):
+            if self._has_grad[i]:
+                acc.assign(tf.zeros_like(acc))
+        self.num_accumulated.assign(0)
+
+    def __str__(self):
+        return str(self.__class__) + ": " + str(self.__dict__)
@@ -1,145 +1,599 @@
 import tensorflow as tf
 
-
-def _combine_gradients(obj_to_grads):
-    # TODO: need to research how best to combine the gradients here...
-    # combine all gradients. This portion (with in the optimizer loop)
-    # will combine the gradients as if it were trained jointly
-
-    # TODO: this needs to be smarter.. We need to make sure the gradients are
-    # combined (probably by tensor name), not just concatenated in a list
-    combined_gradients = None
-    for obj_name, grad_dict in obj_to_grads.items():
-        # TODO: we could add scaling/weighting here
-        if not combined_gradients:
-            combined_gradients = grad_dict["gradients"]
-        else:
-            combined_gradients += grad_dict["gradients"]
-    return combined_gradients
+from yeahml.build.components.precision import is_loss_scale_optimizer
+from yeahml.train.gradients.trace import create_tf_function
 
 
 # @tf.function
-def update_model_params(apply_grads_fn, obj_to_grads, model, cur_tf_optimizer):
-    # combine gradients and use optimizer to update model. apply contraints to
-    # model variables
-    combined_gradients = _combine_gradients(obj_to_grads)
+def update_model_params(apply_grads_fn, grads, model, variables=None):
+    # use optimizer to update model and apply contraints to model variables.
+    # NOTE: the objectives of a group share a single (fused) loss, so a single
+    # set of gradients (aligned with the variables) is applied -- the objective
+    # weights have already been applied to the losses (see `get_loss_weights`)
 
-    # apply gradients to the model
-    apply_grads_fn(model, combined_gradients, cur_tf_optimizer)
+    # apply gradients to the model (the optimizer is bound to the fn)
+    apply_grads_fn(grads)
 
     # apply constraints
-    for variable in model.variables:
+    _apply_constraints(model, variables)
+
+
+def update_model_params_from_accumulator(
+    apply_grads_fn, accumulator, model, variables=None
+):
+    # apply the (averaged) accumulated gradients and reset the accumulator
+    update_model_params(apply_grads_fn, accumulator.gradients(), model, variables)
+    accumulator.reset()
+
+
+def _to_float32(prediction):
+    # under a mixed precision policy the model outputs are float16/bfloat16,
+    # the losses and metrics are always computed in float32
+    if prediction.dtype in (tf.float16, tf.bfloat16):
+        prediction = tf.cast(prediction, tf.float32)
+    return prediction
+
+
+def _get_variables(model, variables=None):
+    # the variables updated by an optimizer, all trainable variables of the
+    # model unless a subset is specified (see `optimize:optimizers:'name':layers`)
+    if variables is None:
+        return model.trainable_variables
+    return variables
+
+
+def _apply_gradients(model, grads, optimizer, variables=None):
+    if is_loss_scale_optimizer(optimizer):
+        # the gradients were calculated from the scaled loss
+        grads = optimizer.get_unscaled_gradients(grads)
+
+    # NOTE: any gradient adjustments would happen here
+    optimizer.apply_gradients(zip(grads, _get_variables(model, variables)))
+
+
+def _update_params(model, grads, optimizer, accumulator=None, variables=None):
+    # apply the gradients (and constraints) from within a compiled step. if an
+    # accumulator is used, the gradients are only applied once every
+    # `accumulate_steps` micro-batches
+    if accumulator is None:
+        _apply_gradients(model, grads, optimizer, variables)
+        _apply_constraints(model, variables)
+    else:
+        accumulator.accumulate(grads)
+        if accumulator.is_ready():
+            _apply_gradients(model, accumulator.gradients(), optimizer, variables)
+            _apply_constraints(model, variables)
+            accumulator.reset()
+
+
+def _apply_constraints(model, variables=None):
+    # only the (updated) variables of the optimizer are projected
+    if variables is None:
+        variables = model.variables
+    for variable in variables:
         if variable.constraint is not None:
             variable.assign(variable.constraint(variable))
 
 
-def get_apply_grad_fn():
+def get_apply_grad_fn(
+    model,
+    optimizer,
+    variables=None,
+    trace_counter=None,
+    jit_compile=False,
+    logger=None,
+    name="apply_grad",
+):
 
     # https://github.com/tensorflow/tensorflow/issues/27120
     # this allows the model to continue to be trained on multiple calls
-    @tf.function
-    def apply_grad(model, grads, optimizer):
+    # NOTE: the model and optimizer are bound here (rather than passed as
+    # arguments) so that they are not part of the tracing signature
+    def apply_grad(grads):
 
-        # NOTE: this will throw an error for params that aren't updated by a
-        # specific task
-
-        # NOTE: any gradient adjustments would happen here
-        optimizer.apply_gradients(zip(grads, model.trainable_variables))
+        # NOTE: the grads are aligned with the variables of the optimizer
+        _apply_gradients(model, grads, optimizer, variables)
 
         return
 
-    return apply_grad
+    return create_tf_function(
+        apply_grad,
+        name,
+        trace_counter=trace_counter,
+        jit_compile=jit_compile,
+        logger=logger,
+    )
+
+
+def get_accumulate_grad_fn(accumulator, trace_counter=None, name="accumulate_grad"):
+    """add the gradients to the accumulator. True is returned once
+    `accumulate_steps` micro-batches have been accumulated and the (averaged)
+    gradients should be applied, see `GradientAccumulator`
+    """
+
+    def accumulate_grad(grads):
+        accumulator.accumulate(grads)
+        return accumulator.is_ready()
+
+    return create_tf_function(accumulate_grad, name, trace_counter=trace_counter)
+
+
+def _supervised_losses(
+    model,
+    x_batch,
+    y_batch,
+    loss_fns,
+    objective_indexes,
+    loss_descs_to_update,
+    loss_weights=None,
+):
+    """single forward pass of the model, the loss of each objective is
+    calculated from the shared outputs (to be called within a GradientTape)
+
+    predictions, losses and main_losses are aligned by objective, the loss and
+    main loss are `None` for an objective that only has metrics
+
+    loss_weights (if included, aligned by objective) scale the main loss of
+    each objective (see `optimize:optimizers:'name':objective_weights`), the
+    loss descriptions are updated with the unweighted loss
+    """
+    full_prediction = model(x_batch, training=True)
+
+    # NOTE: not sure how big of a performance hit this is
+    # TODO: add message
+    # tf.debugging.assert_shapes(
+    #     [(prediction, y_batch.shape), (y_batch, y_batch.shape)]
+    # )
+    predictions, losses, main_losses = [], [], []
+    for i, loss_fn in enumerate(loss_fns):
+        cur_objective_index = objective_indexes[i]
+        if isinstance(cur_objective_index, int):
+            prediction = full_prediction[cur_objective_index]
+        else:
+            prediction = full_prediction
+        prediction = _to_float32(prediction)
+        predictions.append(prediction)
+
+        if not loss_fn:
+            losses.append(None)
+            main_losses.append(None)
+            continue
+
+        # TODO: apply mask?
+        loss = loss_fn(y_batch, prediction)
+        losses.append(loss)
+
+        # TODO: need to verify this
+        for tf_desc_obj in loss_descs_to_update[i]:
+            tf_desc_obj.update_state(loss)
+
+        # TODO: custom weighting for training could be applied here
+        # weighted_losses = loss * weights_per_instance
+        main_loss = tf.reduce_mean(loss)
+        if loss_weights and loss_weights[i] != 1.0:
+            main_loss = main_loss * tf.cast(loss_weights[i], main_loss.dtype)
+        main_losses.append(main_loss)
+
+    return predictions, losses, main_losses
+
+
+def _scale_loss(final_loss, optimizer=None):
+    # the loss the gradients are calculated from
+    if is_loss_scale_optimizer(optimizer):
+        tape_loss = optimizer.get_scaled_loss(final_loss)
+    else:
+        tape_loss = final_loss
+
+    # when run on multiple replicas (tf.distribute), the gradients from
+    # each replica are summed when they are applied, the loss is scaled so
+    # that the sum is the gradient of the mean loss of the global batch
+    num_replicas = tf.distribute.get_strategy().num_replicas_in_sync
+    if num_replicas > 1:
+        tape_loss = tape_loss / num_replicas
+    return tape_loss
+
+
+def _calc_supervised_grads(
+    model,
+    batch,
+    loss_fns,
+    objective_indexes,
+    loss_descs_to_update,
+    optimizer=None,
+    variables=None,
+    loss_weights=None,
+):
+    """fused step for all objectives that read from the same dataset: a
+    single forward pass is made on the batch and every loss is computed
+    from the shared model outputs
+
+    loss_fns, objective_indexes and loss_descs_to_update are aligned by
+    objective. a loss_fn may be `None` for an objective that only has
+    metrics (the prediction is still returned for the metric update)
+
+    if the optimizer is a LossScaleOptimizer (mixed_float16), the gradients
+    are calculated from the scaled loss and must be unscaled before they are
+    applied (see `_apply_gradients`)
+
+    the gradients are only calculated for `variables` (if included), the
+    backward pass through the rest of the model is then skipped
+
+    loss_weights (if included) scale the loss of each objective before they
+    are summed, see `_supervised_losses`
+    """
+    # supervised implies a x, and y.. however, this maybe should change to a
+    # dict indexing
+    if not isinstance(loss_fns, list):
+        loss_fns = [loss_fns]
+    if not isinstance(objective_indexes, list):
+        objective_indexes = [objective_indexes]
+
+    """
+    # TODO: y_batch maybe shouldn't be taken from here. the issue is that we
+    # specify:
+    ```
+    in_config:
+    type: "supervised"
+    options:
+      prediction: "y_pred"
+      target: "x_image"
+    `
+    """
+    x_batch, y_batch = batch
+    with tf.GradientTape() as tape:
+        predictions, losses, main_losses = _supervised_losses(
+            model,
+            x_batch,
+            y_batch,
+            loss_fns,
+            objective_indexes,
+            loss_descs_to_update,
+            loss_weights=loss_weights,
+        )
+
+        # create joint loss for current group of objectives
+        # e.g. final_loss = loss1 + loss2 + regularization
+        # model.losses contains the kernel/bias constraints/regularizers and
+        # is only included once since there is only one forward pass
+        final_loss = tf.math.add_n(
+            [l for l in main_losses if l is not None] + model.losses
+        )
+
+        # TODO: update joint loss/desc?
+        tape_loss = _scale_loss(final_loss, optimizer)
+
+    # NOTE: this will calculate a gradient for each param of the optimizer.
+    # these gradients will be applied to the model later using
+    # optimizer.apply_gradients(zip(grads, variables))
+    grads = tape.gradient(tape_loss, _get_variables(model, variables))
+
+    return {
+        "gradients": grads,
+        "predictions": predictions,
+        "final_loss": final_loss,
+        "losses": losses,
+        "y_batch": y_batch,
+    }
 
 
 # TODO: this is supervised -- may make sense to organize these a a bit
-def get_get_supervised_grads_fn():
+def get_get_supervised_grads_fn(
+    model,
+    loss_fns,
+    objective_indexes,
+    loss_descs_to_update,
+    optimizer=None,
+    variables=None,
+    loss_weights=None,
+    input_signature=None,
+    trace_counter=None,
+    jit_compile=False,
+    logger=None,
+    name="get_grad",
+):
+    """the static pieces (model, loss fns, output indexes and the loss
+    descriptions) are bound by the closure so that only the batch is traced.
+    When `input_signature` is included (e.g. `[dataset.element_spec]`), the
+    fn is traced a single time for the dataset
+
+    the optimizer is only used to scale the loss (if it is a
+    LossScaleOptimizer), the gradients are applied by `apply_grad`
+
+    if jit_compile is set, the fn is compiled with XLA (falling back to a
+    tf.function if the model can't be compiled), see `create_tf_function`
+    """
 
     # https://github.com/tensorflow/tensorflow/issues/27120
     # this allows the model to continue to be trained on multiple calls
-    # TODO: at some point, we may need to allow for batches of different sizes
-    # - experimental_relax_shapes=True (doesn't appear to work for this case)
-    #   https://www.tensorflow.org/api_docs/python/tf/function
-    # - (input_signature=[tf.TensorSpec(shape=None, dtype=tf.float32)])
-    @tf.function
-    def get_grad(model, batch, loss_fns, cur_objective_index, loss_descs_to_update):
-        # supervised implies a x, and y.. however, this maybe should change to a
-        # dict indexing
-        if not isinstance(loss_fns, list):
-            loss_fns = [loss_fns]
-
-        """
-        # TODO: y_batch maybe shouldn't be taken from here. the issue is that we
-        # specify:
-        ```
-        in_config:
-        type: "supervised"
-        options:
-          prediction: "y_pred"
-          target: "x_image"
-        `
-        """
+    def get_grad(batch):
+        return _calc_supervised_grads(
+            model,
+            batch,
+            loss_fns,
+            objective_indexes,
+            loss_descs_to_update,
+            optimizer=optimizer,
+            variables=variables,
+            loss_weights=loss_weights,
+        )
+
+    return create_tf_function(
+        get_grad,
+        name,
+        input_signature,
+        trace_counter,
+        jit_compile=jit_compile,
+        logger=logger,
+    )
+
+
+def get_compiled_train_step_fn(
+    model,
+    loss_fns,
+    objective_indexes,
+    loss_descs_to_update,
+    optimizer,
+    accumulator=None,
+    variables=None,
+    loss_weights=None,
+    input_signature=None,
+    trace_counter=None,
+    jit_compile=False,
+    logger=None,
+    name="train_step",
+):
+    """a single tf.function per optimizer that performs the forward pass,
+    gradient calculation, applies the gradients with the optimizer, and
+    projects the constrained variables. This removes the python dispatch (and
+    host round trips) that occur between `get_grad`, `apply_grad` and the
+    per-variable constraints when run seperately
+
+    if an accumulator is included, the gradients are accumulated and only
+    applied every `accumulate_steps` calls
+    """
+
+    def train_step(batch):
+        grad_dict = _calc_supervised_grads(
+            model,
+            batch,
+            loss_fns,
+            objective_indexes,
+            loss_descs_to_update,
+            optimizer=optimizer,
+            variables=variables,
+            loss_weights=loss_weights,
+        )
+
+        # NOTE: the objectives are already combined in the (fused) loss, so
+        # there is only a single set of gradients to apply here
+        _update_params(model, grad_dict["gradients"], optimizer, accumulator, variables)
+
+        # the gradients are not needed outside of the step
+        del grad_dict["gradients"]
+
+        return grad_dict
+
+    return create_tf_function(
+        train_step,
+        name,
+        input_signature,
+        trace_counter,
+        jit_compile=jit_compile,
+        logger=logger,
+    )
+
+
+def get_joint_train_step_fn(
+    model,
+    loss_fns,
+    objective_indexes,
+    loss_descs_to_update,
+    optimizers,
+    opt_loss_indexes,
+    opt_variables=None,
+    loss_weights=None,
+    input_signature=None,
+    trace_counter=None,
+    jit_compile=False,
+    logger=None,
+    name="joint_train_step",
+):
+    """a single tf.function for optimizers that are trained jointly (see
+    `optimize:directive`). One forward pass is made for the objectives of all
+    the optimizers, the gradients for each optimizer are calculated from the
+    sum of the losses of its objectives and are then applied by each
+    optimizer before the constraints are projected once
+
+    loss_fns, objective_indexes and loss_descs_to_update are aligned by
+    objective, optimizers and opt_loss_indexes (the indexes of the objectives
+    of the optimizer) are aligned by optimizer
+    e.g.
+        optimizers: [<main_opt>, <second_opt>]
+        opt_loss_indexes: [[0], [1, 2]]
+
+    opt_variables (if included) are the variables of each optimizer (`None`
+    for all trainable variables), loss_weights (if included) are aligned by
+    objective
+    """
+    if not opt_variables:
+        opt_variables = [None] * len(optimizers)
+
+    def joint_train_step(batch):
         x_batch, y_batch = batch
-        with tf.GradientTape() as tape:
-            prediction = model(x_batch, training=True)
-
-            # NOTE: not sure how big of a performance hit this is
-            # TODO: add message
-            # tf.debugging.assert_shapes(
-            #     [(prediction, y_batch.shape), (y_batch, y_batch.shape)]
-            # )
-            if isinstance(cur_objective_index, int):
-                prediction = prediction[cur_objective_index]
-
-            # TODO: apply mask?
-            full_losses = []
-            for i, loss_fn in enumerate(loss_fns):
-                loss = loss_fn(y_batch, prediction)
-
-                # TODO: need to verify this
-                tf_desc_obj = loss_descs_to_update[i]
-                if tf_desc_obj:
-                    tf_desc_obj.update_state(loss)
-
-                # TODO: custom weighting for training could be applied here
-                # weighted_losses = loss * weights_per_instance
-                main_loss = tf.reduce_mean(loss)
-                # model.losses contains the kernel/bias constraints/regularizers
-                cur_loss = tf.add_n([main_loss] + model.losses)
-                # full_loss = tf.add_n(full_loss, cur_loss)
-                full_losses.append(cur_loss)
-                # create joint loss for current optimizer
-                # e.g. final_loss = tf.reduce_mean(loss1 + loss2)
-            final_loss = tf.reduce_mean(tf.math.add_n(full_losses))
-
-            # TODO: update joint loss/desc?
-
-        # TODO: maybe we should be able to specify which params to be optimized
-        # by specific optimizers
-        # NOTE: this will calculate a gradient for each model param. these
-        # gradients will be combined and applied to the model later using
-        # optimizer.apply_gradients(zip(grads, model.trainable_variables))
-        grads = tape.gradient(final_loss, model.trainable_variables)
+        with tf.GradientTape(persistent=True) as tape:
+            predictions, losses, main_losses = _supervised_losses(
+                model,
+                x_batch,
+                y_batch,
+                loss_fns,
+                objective_indexes,
+                loss_descs_to_update,
+                loss_weights=loss_weights,
+            )
+            final_losses, tape_losses = [], []
+            for i, optimizer in enumerate(optimizers):
+                final_loss = tf.math.add_n(
+                    [main_losses[j] for j in opt_loss_indexes[i]] + model.losses
+                )
+                final_losses.append(final_loss)
+                tape_losses.append(_scale_loss(final_loss, optimizer))
+
+        # all gradients are calculated (from the same forward pass) before any
+        # are applied
+        opt_grads = [
+            tape.gradient(tape_loss, _get_variables(model, variables))
+            for tape_loss, variables in zip(tape_losses, opt_variables)
+        ]
+        del tape
+        for optimizer, grads, variables in zip(optimizers, opt_grads, opt_variables):
+            _apply_gradients(model, grads, optimizer, variables)
+        if any(variables is None for variables in opt_variables):
+            _apply_constraints(model)
+        else:
+            _apply_constraints(
+                model, [v for variables in opt_variables for v in variables]
+            )
 
         return {
-            "gradients": grads,
-            "predictions": prediction,
-            "final_loss": final_loss,
-            "losses": loss,
+            "predictions": predictions,
+            "final_loss": tf.math.add_n(final_losses),
+            "losses": losses,
             "y_batch": y_batch,
         }
-        # return grads, prediction, final_loss, full_losses
 
-    return get_grad
+    return create_tf_function(
+        joint_train_step,
+        name,
+        input_signature,
+        trace_counter,
+        jit_compile=jit_compile,
+        logger=logger,
+    )
+
+
+def get_multi_train_step_fn(
+    steps_per_execution,
+    model,
+    loss_fns,
+    objective_indexes,
+    loss_descs_to_update,
+    metrics_to_update,
+    optimizer,
+    accumulator=None,
+    variables=None,
+    loss_weights=None,
+    strategy=None,
+    input_signature=None,
+    trace_counter=None,
+    name="multi_train_step",
+):
+    """run up to `steps_per_execution` training steps (each a compiled step,
+    see `get_compiled_train_step_fn`) on batches from the dataset iterator
+    within a single tf.function call. Since the predictions are not returned,
+    the metrics (for each objective) are updated within the step.
+
+    The number of steps run is returned and may be less than
+    `steps_per_execution` if the iterator is exhausted (0 indicates a
+    complete pass through the dataset)
+
+    the `input_signature` here is for the iterator e.g.
+        [tf.data.IteratorSpec(dataset.element_spec)]
+
+    NOTE: this fn is not jit compiled, the iterator ops can't be compiled by
+    XLA
+
+    if a (tf.distribute) strategy is included, the iterator is expected to be
+    from a distributed dataset and each step is run on every replica
+    """
+
+    def replica_step(batch):
+        grad_dict = _calc_supervised_grads(
+            model,
+            batch,
+            loss_fns,
+            objective_indexes,
+            loss_descs_to_update,
+            optimizer=optimizer,
+            variables=variables,
+            loss_weights=loss_weights,
+        )
+        _update_params(model, grad_dict["gradients"], optimizer, accumulator, variables)
+
+        for i, metric_objects in enumerate(metrics_to_update):
+            for metric_obj in metric_objects:
+                metric_obj.update_state(
+                    grad_dict["y_batch"], grad_dict["predictions"][i]
+                )
+
+        num_instances = tf.cast(tf.shape(batch[0])[0], tf.int64)
+        return tf.cast(grad_dict["final_loss"], tf.float32), num_instances
+
+    def multi_train_step(ds_iter):
+        num_steps = tf.constant(0, dtype=tf.int64)
+        num_instances = tf.constant(0, dtype=tf.int64)
+        loss_sum = tf.constant(0.0, dtype=tf.float32)
+        for _ in tf.range(steps_per_execution):
+            optional_batch = ds_iter.get_next_as_optional()
+            if not optional_batch.has_value():
+                break
+            batch = optional_batch.get_value()
+
+            if strategy:
+                replica_loss, replica_instances = strategy.run(
+                    replica_step, args=(batch,)
+                )
+                step_loss = strategy.reduce(
+                    tf.distribute.ReduceOp.MEAN, replica_loss, axis=None
+                )
+                step_instances = strategy.reduce(
+                    tf.distribute.ReduceOp.SUM, replica_instances, axis=None
+                )
+            else:
+                step_loss, step_instances = replica_step(batch)
+
+            num_steps += 1
+            num_instances += step_instances
+            loss_sum += step_loss
 
+        return {
+            "steps": num_steps,
+            "instances": num_instances,
+            "final_loss": tf.math.divide_no_nan(
+                loss_sum, tf.cast(num_steps, tf.float32)
+            ),
+        }
 
-def get_validation_step_fn():
-    @tf.function
-    def get_preds(model, batch, loss_fns, cur_objective_index, loss_descs_to_update):
-        # supervised implies a x, and y.. however, this maybe should change to a
-        # dict indexing
-        if not isinstance(loss_fns, list):
-            loss_fns = [loss_fns]
-
+    return create_tf_function(multi_train_step, name, input_signature, trace_counter)
+
+
+def get_validation_step_fn(
+    model,
+    loss_fns,
+    cur_objective_index,
+    loss_descs_to_update,
+    metrics_to_update=None,
+    strategy=None,
+    input_signature=None,
+    trace_counter=None,
+    jit_compile=False,
+    logger=None,
+    name="get_preds",
+):
+    """if metrics_to_update are included, the metrics are updated within the
+    step. This is required when a (tf.distribute) strategy is included since
+    the predictions are then only available on each replica and only the
+    (mean) final loss is returned
+
+    jit_compile is only used without a strategy (see `create_tf_function`)
+    """
+    # supervised implies a x, and y.. however, this maybe should change to a
+    # dict indexing
+    if not isinstance(loss_fns, list):
+        loss_fns = [loss_fns]
+    if not metrics_to_update:
+        metrics_to_update = []
+
+    def get_preds(batch):
         """
         # TODO: y_batch maybe shouldn't be taken from here. the issue is that we
         # specify:
@@ -160,6 +614,7 @@ def get_validation_step_fn():
         # )
         if isinstance(cur_objective_index, int):
             prediction = prediction[cur_objective_index]
+        prediction = _to_float32(prediction)
 
         # TODO: apply mask?
         full_losses = []
@@ -187,6 +642,9 @@ def get_validation_step_fn():
 
         # TODO: update joint loss/desc?
 
+        for metric_obj in metrics_to_update:
+            metric_obj.update_state(y_batch, prediction)
+
         return {
             "predictions": prediction,
             "final_loss": final_loss,
@@ -194,4 +652,24 @@ def get_validation_step_fn():
             "y_batch": y_batch,
         }
 
-    return get_preds
+    if strategy:
+
+        def distributed_get_preds(batch):
+            replica_dict = strategy.run(get_preds, args=(batch,))
+            final_loss = strategy.reduce(
+                tf.distribute.ReduceOp.MEAN, replica_dict["final_loss"], axis=None
+            )
+            return {"final_loss": final_loss}
+
+        return create_tf_function(
+            distributed_get_preds, name, input_signature, trace_counter
+        )
+
+    return create_tf_function(
+        get_preds,
+        name,
+        input_signature,
+        trace_counter,
+        jit_compile=jit_compile,
+        logger=logger,
+    )
@@ -0,0 +1,140 @@
+import functools
+
+import tensorflow as tf
+
+# a step function that creates variables on the first call (e.g. optimizer
+# slots) is traced twice by tf.function, anything beyond this is a retrace
+DEFAULT_MAX_TRACES = 2
+
+
+class TraceCounter:
+    """keeps track of the number of times each step function is traced. The
+    count is incremented from within the python function, which is only run
+    when tf.function (re)traces the function.
+    """
+
+    def __init__(self, logger=None, max_traces=DEFAULT_MAX_TRACES):
+        self.logger = logger
+        self.max_traces = max_traces
+        self.counts = {}
+
+    def record(self, name):
+        try:
+            self.counts[name] += 1
+        except KeyError:
+            self.counts[name] = 1
+
+        cur_count = self.counts[name]
+        if self.logger:
+            self.logger.debug(f"tracing {name} (trace: {cur_count})")
+            if cur_count > self.max_traces:
+                self.logger.warning(
+                    f"{name} has been traced {cur_count} times (> {self.max_traces}),"
+                    " retracing is expensive -- are the inputs changing shape/type?"
+                )
+
+    def __str__(self):
+        return str(self.__class__) + ": " + str(self.__dict__)
+
+    def __call__(self):
+        return self.counts
+
+
+def jit_compile_available(logger=None):
+    # XLA is not included in every build of tensorflow
+    try:
+        available = tf.test.is_built_with_xla()
+    except AttributeError:
+        available = True
+    if not available and logger:
+        logger.warning(
+            "jit_compile was requested but tensorflow was not built with XLA,"
+            " the step functions will not be jit compiled"
+        )
+    return available
+
+
+class JitFallbackFunction:
+    """a jit (XLA) compiled tf.function that falls back to the (non-jit)
+    tf.function if the graph can't be compiled (e.g. an op without an XLA
+    kernel). Compilation happens on the first call, so the fallback is only
+    considered until the jit compiled fn has run successfully once
+    """
+
+    def __init__(self, name, jit_fn, fallback_fn, logger=None):
+        self.name = name
+        self.jit_fn = jit_fn
+        self.fallback_fn = fallback_fn
+        self.logger = logger
+        self.compiled = False
+        self.failed = False
+
+    def __call__(self, *args, **kwargs):
+        if self.failed:
+            return self.fallback_fn(*args, **kwargs)
+        if self.compiled:
+            return self.jit_fn(*args, **kwargs)
+
+        try:
+            ret = self.jit_fn(*args, **kwargs)
+        except (
+            tf.errors.InvalidArgumentError,
+            tf.errors.UnimplementedError,
+            tf.errors.InternalError,
+        ) as e:
+            # NOTE: XLA compiles the graph before any of it is run, so a failed
+            # compilation does not update any state
+            self.failed = True
+            if self.logger:
+                reason = str(e.message if hasattr(e, "message") else e)
+                self.logger.warning(
+                    f"{self.name} could not be jit compiled, falling back to"
+                    f" tf.function: {reason.splitlines()[0] if reason else type(e)}"
+                )
+            return self.fallback_fn(*args, **kwargs)
+
+        self.compiled = True
+        if self.logger:
+            self.logger.debug(f"{self.name} is jit compiled")
+        return ret
+
+    def __str__(self):
+        return str(self.__class__) + ": " + str(self.__dict__)
+
+
+def create_tf_function(
+    python_fn,
+    name,
+    input_signature=None,
+    trace_counter=None,
+    jit_compile=False,
+    logger=None,
+):
+    """wrap the python step function in a tf.function. if a trace_counter is
+    included, each trace of the function is recorded under `name`
+
+    if jit_compile is set, the function is compiled with XLA and falls back to
+    the (non-jit) tf.function with a logged reason if it can't be compiled,
+    see `JitFallbackFunction`
+    """
+
+    if trace_counter:
+
+        @functools.wraps(python_fn)
+        def _counted_fn(*args, **kwargs):
+            trace_counter.record(name)
+            return python_fn(*args, **kwargs)
+
+        fn = _counted_fn
+    else:
+        fn = python_fn
+
+    if jit_compile:
+        return JitFallbackFunction(
+            name,
+            tf.function(fn, input_signature=input_signature, jit_compile=True),
+            tf.function(fn, input_signature=input_signature),
+            logger=logger,
+        )
+
+    return tf.function(fn, input_signature=input_signature)
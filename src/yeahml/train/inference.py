@@ -1,10 +1,9 @@
-from yeahml.train.update_progress.tf_objectives import (
-    update_tf_val_metrics,
-    update_supervised_tf_metrics,
-)
+from yeahml.train.gradients.gradients import get_validation_step_fn
+from yeahml.train.update_progress.tf_objectives import update_supervised_tf_metrics
+from yeahml.train.update_progress.readback import DeferredReadback
 from yeahml.train.update_progress.tracker import (
-    update_loss_trackers,
-    update_val_metrics_trackers,
+    add_loss_trackers,
+    add_metrics_trackers,
 )
 from yeahml.train.util import get_losses_to_update, get_next_batch, re_init_iter
 import tensorflow as tf
@@ -15,7 +14,7 @@ def inference_dataset(
     loss_objective_names,
     metrics_objective_names,
     dataset_iter_dict,
-    cur_val_fn,
+    obj_to_val_fn,
     opt_tracker_dict,
     cur_objective,
     cur_ds_name,
@@ -27,15 +26,27 @@ def inference_dataset(
     v_writer,
     logger,
     split_name,
+    readback=None,
+    defer_updates=False,
 ):
+    # defer_updates: the values are read (and written to tensorboard), but the
+    # trackers are not updated. A fn is then returned that updates the
+    # trackers (and returns the update), e.g. so that the trackers are only
+    # updated on the main thread when the pass is run on a background thread
     logger.debug(
         f"START inference on {split_name}, num_train_instances: {num_train_instances}"
     )
+    # the losses and metrics of all objectives are read once the pass is
+    # complete, see `DeferredReadback`
+    if not readback:
+        readback = DeferredReadback()
 
     # TODO: need to check for loss/metrics overlap?
     cur_update = {}
     for cur_objective in loss_objective_names:
-        cur_obj_output_index = objective_to_output_index[cur_objective]
+        # the step fn for each objective is created (with the output index and
+        # loss descriptions bound) before training, see `get_validation_steps`
+        cur_val_fn = obj_to_val_fn[cur_objective]
         cur_in_conf = objectives_dict[cur_objective]["in_config"]
         cur_ds_name = cur_in_conf["dataset"]
         cur_ds_iter_dict = dataset_iter_dict[cur_ds_name]
@@ -48,8 +59,6 @@ def inference_dataset(
         # loss
         loss_conf = objectives_dict[cur_objective]["loss"]
 
-        tf_val_loss_descs_to_update = get_losses_to_update(loss_conf, split_name)
-
         # metrics
         metrics_conf = objectives_dict[cur_objective]["metrics"]
 
@@ -58,24 +67,14 @@ def inference_dataset(
 
         while cur_batch:
 
-            val_dict = cur_val_fn(
-                model,
-                cur_batch,
-                loss_conf["object"],
-                cur_obj_output_index,
-                tf_val_loss_descs_to_update,
-            )
+            # NOTE: the loss descriptions and metrics are updated within the
+            # step (see `get_validation_steps`)
+            val_dict = cur_val_fn(cur_batch)
             # {"predictions": prediction,
             # "final_loss": final_loss,
             # "losses": loss,
             # "y_batch": y_batch,}
 
-            # update tf objects
-            # update_tf_loss_descriptions(val_dict, tf_val_loss_descs_to_update)
-            update_tf_val_metrics(
-                val_dict, metrics_conf, split_name, cur_in_conf["type"]
-            )
-
             # next batch until end
             cur_batch = get_next_batch(cur_val_iter)
 
@@ -84,11 +83,12 @@ def inference_dataset(
             cur_ds_name, split_name, dataset_dict
         )
 
-        # update trackers
+        # update trackers (on flush)
         cur_loss_tracker_dict = opt_tracker_dict[cur_objective]["loss"][cur_ds_name][
             split_name
         ]
-        cur_loss_update = update_loss_trackers(
+        add_loss_trackers(
+            readback,
             loss_conf["track"][split_name],
             cur_loss_tracker_dict,
             num_train_instances,
@@ -96,14 +96,20 @@ def inference_dataset(
             tb_writer=v_writer,
             ds_name=cur_ds_name,
             objective_name=cur_objective,
+            path=(cur_objective, "loss"),
         )
+        cur_update[cur_objective] = {
+            "loss": {loss_name: {} for loss_name in loss_conf["track"][split_name]},
+            "metrics": None,
+        }
 
         # metrics are optional -- there many only be a loss
         if metrics_conf:
             cur_metric_tracker_dict = opt_tracker_dict[cur_objective]["metrics"][
                 cur_ds_name
             ][split_name]
-            cur_metrics_update = update_val_metrics_trackers(
+            add_metrics_trackers(
+                readback,
                 metrics_conf,
                 cur_metric_tracker_dict,
                 split_name,
@@ -112,23 +118,29 @@ def inference_dataset(
                 tb_writer=v_writer,
                 ds_name=cur_ds_name,
                 objective_name=cur_objective,
+                path=(cur_objective, "metrics"),
             )
-        else:
-            cur_metrics_update = None
-
-        cur_update[cur_objective] = {
-            "loss": cur_loss_update,
-            "metrics": cur_metrics_update,
-        }
+            cur_update[cur_objective]["metrics"] = {
+                metric_name: {} for metric_name in metrics_conf
+            }
 
+    read_values = readback.read()
     logger.info(f"done inference on {split_name} - {num_train_instances}")
-    return cur_update
+
+    def apply_updates():
+        for obj_name, obj_update in readback.apply(read_values).items():
+            for update_type, type_update in obj_update.items():
+                cur_update[obj_name][update_type].update(type_update)
+        return cur_update
+
+    if defer_updates:
+        return apply_updates
+    return apply_updates()
 
 
 def inference_on_ds(
     model,
     cur_dataset_iter,
-    cur_inference_fn,
     cur_loss_objective_names,
     cur_metrics_objective_names,
     objectives_to_objects,
@@ -137,6 +149,7 @@ def inference_on_ds(
     eval_split,
     logger,
     pred_dict=None,
+    jit_compile=False,
 ):
     split_name = eval_split
     logger.debug(f"START inference_on_ds on {split_name}")
@@ -162,6 +175,19 @@ def inference_on_ds(
                 metric_tf_obj = split_to_metric[split_name]
                 supervised_met_objects.append(metric_tf_obj)
 
+    # the static pieces are bound to the step fn and the signature is taken
+    # from the dataset so that it is only traced once
+    cur_inference_fn = get_validation_step_fn(
+        model,
+        loss_objects,
+        cur_pred_index,
+        loss_descriptions,
+        input_signature=[cur_dataset_iter.element_spec],
+        jit_compile=jit_compile,
+        logger=logger,
+        name=f"{split_name}_step",
+    )
+
     cur_batch = get_next_batch(cur_dataset_iter)
 
     temp_ret = None
@@ -183,9 +209,7 @@ def inference_on_ds(
 
     while cur_batch:
 
-        inference_dict = cur_inference_fn(
-            model, cur_batch, loss_objects, cur_pred_index, loss_descriptions
-        )
+        inference_dict = cur_inference_fn(cur_batch)
         # {"predictions": prediction,
         # "final_loss": final_loss,
         # "losses": loss,
@@ -0,0 +1,139 @@
+import contextlib
+import threading
+
+import tensorflow as tf
+
+
+class Profiler:
+    """captures `tf.profiler` traces for windows of training steps (and
+    optionally the first validation pass). The traces are written to
+    `profile_path` (e.g. <model_run_path>/tf_logs/profile) and can be viewed
+    in the tensorboard profile plugin
+
+    a window begins once `start` training steps have been run and ends
+    `num_steps` steps later. Only one trace can be captured at a time, a
+    window that can't be started (e.g. the validation pass is being
+    profiled) is started as soon as possible, or skipped if it has passed
+
+    e.g.
+        logging:profile:
+            start_steps: [50, 200]
+            num_steps: 10
+            validation: True
+
+    NOTE: the validation pass may be run on the async validation thread, the
+    trace is then stopped once the pass is collected by the training loop
+    """
+
+    def __init__(
+        self,
+        profile_path,
+        start_steps=None,
+        num_steps=10,
+        validation=False,
+        logger=None,
+    ):
+        if num_steps < 1:
+            raise ValueError(
+                f"logging:profile:num_steps ({num_steps}) must be greater than 0"
+            )
+        start_steps = sorted(start_steps) if start_steps else []
+        for start in start_steps:
+            if start < 0:
+                raise ValueError(
+                    f"logging:profile:start_steps ({start}) must not be negative"
+                )
+        self.profile_path = profile_path
+        # [(start, stop)], the windows that have yet to be captured
+        self.windows = [(start, start + num_steps) for start in start_steps]
+        self.validation = validation
+        self.logger = logger
+
+        # None, "train" or "val"
+        self.active = None
+        self._stop_at = None
+        self._lock = threading.Lock()
+
+    def _log(self, msg, warning=False):
+        if self.logger:
+            if warning:
+                self.logger.warning(msg)
+            else:
+                self.logger.info(msg)
+
+    def _start(self, kind, run_name):
+        # each trace is written to its own run (e.g. profile/train_50_60) so
+        # that traces started within the same second are not overwritten
+        run_path = self.profile_path.joinpath(run_name)
+        run_path.mkdir(parents=True, exist_ok=True)
+        tf.profiler.experimental.start(str(run_path))
+        self.active = kind
+
+    def _stop(self):
+        tf.profiler.experimental.stop()
+        self.active = None
+
+    def update(self, num_training_ops):
+        # called after each training step (or multi step), starts and stops
+        # the step windows
+        if not self.windows and self.active != "train":
+            return
+        with self._lock:
+            if self.active == "train":
+                if num_training_ops >= self._stop_at:
+                    self._stop()
+                    self._log(f"profile stopped at step {num_training_ops}")
+            if self.active:
+                return
+            while self.windows and num_training_ops >= self.windows[0][0]:
+                start, stop = self.windows.pop(0)
+                if num_training_ops >= stop:
+                    self._log(
+                        f"profile window [{start}, {stop}) was skipped, a trace was already being captured",
+                        warning=True,
+                    )
+                    continue
+                self._start("train", f"train_{start}_{stop}")
+                self._stop_at = stop
+                self._log(
+                    f"profile started at step {num_training_ops} (window [{start}, {stop}))"
+                )
+                break
+
+    def trace_step(self, step):
+        # step marker (used by the profile plugin to show the step times),
+        # only while a step window is being captured
+        if self.active == "train":
+            return tf.profiler.experimental.Trace("train", step_num=step, _r=1)
+        return contextlib.nullcontext()
+
+    def start_validation(self):
+        # True if the validation pass is to be profiled (the trace started),
+        # only the first pass that doesn't overlap a step window is profiled
+        if not self.validation:
+            return False
+        with self._lock:
+            if not self.validation or self.active:
+                return False
+            self.validation = False
+            self._start("val", "val")
+        self._log("profile started for the validation pass")
+        return True
+
+    def stop_validation(self):
+        with self._lock:
+            if self.active == "val":
+                self._stop()
+        self._log("profile stopped for the validation pass")
+
+    def close(self):
+        # a window that extends past the end of training is stopped here
+        with self._lock:
+            if self.active:
+                self._stop()
+                self._log("profile stopped at the end of training")
+        if self.windows:
+            self._log(f"profile windows {self.windows} were not reached", warning=True)
+
+    def __str__(self):
+        return str(self.__class__) + ": " + str(self.__dict__)
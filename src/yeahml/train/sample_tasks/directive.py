@@ -0,0 +1,140 @@
+from yeahml.config.default.types.compound.directive import (
+    ACCEPTED_OPTERATORS,
+    SINGLE_OP_DEF,
+    parse_instructions,
+)
+
+
+class ExecutionPlan:
+    """the order in which the optimizers are trained, compiled from the
+    parsed directive instructions
+
+    - `,` sequential: each member is trained until it is complete, then the next
+    - `|` alternate: the members take turns (a pass each) until all are complete
+    - `&` joint: the optimizers are trained together, on a single (fused) step
+
+    e.g.
+        optimize:directive:
+            instructions: "(main_opt & second_opt), third_opt"
+
+    main_opt and second_opt are trained jointly until both are complete, then
+    third_opt is trained.
+
+    `next_unit` returns the optimizer(s) to train next, a unit with more than
+    one optimizer is trained jointly
+    """
+
+    def __init__(self, parsed_instructions, optimizer_names):
+        self.parsed_instructions = parsed_instructions
+        # outermost instruction, e.g. "YEAHML_2"
+        self.root = max(
+            parsed_instructions.keys(), key=lambda k: int(k.split("_")[-1])
+        )
+        # alternate instruction name -> index of the member to train next
+        self.cursors = {}
+
+        referenced = set()
+        for inst_name, inst in parsed_instructions.items():
+            operation = inst["operation"]
+            members = inst["optimizers"]
+            if operation == SINGLE_OP_DEF:
+                members = [members]
+            elif operation not in ACCEPTED_OPTERATORS:
+                raise ValueError(
+                    f"operation {operation} is not one of {list(ACCEPTED_OPTERATORS.keys())}"
+                )
+            for member in members:
+                if member in parsed_instructions:
+                    if operation == "&":
+                        # the members of a joint step must be optimizers
+                        raise ValueError(
+                            f"a group ({member}) can not be trained jointly: {inst}"
+                        )
+                    continue
+                if member not in optimizer_names:
+                    raise ValueError(
+                        f"optimizer {member} in the directive is not one of {optimizer_names}"
+                    )
+                referenced.add(member)
+
+        unreferenced = [n for n in optimizer_names if n not in referenced]
+        if unreferenced:
+            # these would never be trained (and training would not end)
+            raise ValueError(
+                f"optimizers {unreferenced} are not included in the directive"
+            )
+
+    def joint_units(self):
+        # [(optimizer_name, ...)] of every joint instruction
+        units = []
+        for _, inst in self.parsed_instructions.items():
+            if inst["operation"] == "&":
+                units.append(tuple(inst["optimizers"]))
+        return units
+
+    def _next(self, member, training_names):
+        try:
+            inst = self.parsed_instructions[member]
+        except KeyError:
+            # optimizer name
+            if member in training_names:
+                return (member,)
+            return None
+
+        operation = inst["operation"]
+        members = inst["optimizers"]
+        if operation == SINGLE_OP_DEF:
+            return self._next(members, training_names)
+        elif operation == "&":
+            unit = tuple([m for m in members if m in training_names])
+            return unit if unit else None
+        elif operation == ",":
+            for m in members:
+                unit = self._next(m, training_names)
+                if unit:
+                    return unit
+            return None
+        elif operation == "|":
+            cursor = self.cursors.get(member, 0)
+            for i in range(len(members)):
+                ind = (cursor + i) % len(members)
+                unit = self._next(members[ind], training_names)
+                if unit:
+                    self.cursors[member] = ind + 1
+                    return unit
+            return None
+
+    def next_unit(self, training_names):
+        # training_names: optimizers that still have objectives to train
+        return self._next(self.root, training_names)
+
+    def get_state(self):
+        # the cursors are saved in the checkpoint so that a resumed run
+        # continues the alternation, see `set_state`
+        return {"cursors": dict(self.cursors)}
+
+    def set_state(self, state):
+        self.cursors = dict(state["cursors"])
+
+    def __str__(self):
+        return str(self.__class__) + ": " + str(self.__dict__)
+
+
+def get_execution_plan(directive_cdict, optimizer_names):
+    """create the execution plan from the directive, None if not specified
+    (the optimizers are then selected by the scheduler)
+
+    e.g.
+        optimize:directive:
+            instructions: "(main_opt & second_opt) | third_opt"
+    """
+    if not directive_cdict:
+        return None
+    try:
+        instructions = directive_cdict["instructions"]
+    except KeyError:
+        instructions = None
+    if not instructions:
+        return None
+
+    return ExecutionPlan(parse_instructions(instructions), list(optimizer_names))
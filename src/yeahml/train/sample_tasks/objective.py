@@ -1,16 +1,26 @@
 import random
 
 
-def select_objective(loss_objective_names):
+def select_objective(
+    loss_objective_names, rng=None, scheduler=None, name_to_losses=None
+):
 
-    # TODO: eventually, I'd like to pass loss/gradient information here and make
-    # an adaptive decision
+    # NOTE: the scheduler (see `sample_tasks/scheduler.py`) may make an adaptive
+    # decision from the validation losses in name_to_losses
 
     if len(loss_objective_names) == 1:
         select = loss_objective_names[0]
+    elif scheduler:
+        select = scheduler.select(
+            loss_objective_names, rng=rng, name_to_losses=name_to_losses
+        )
     else:
         # naive approach
-        ind = random.randint(0, len(loss_objective_names) - 1)
+        # NOTE: a seeded rng is used when training on multiple workers so that
+        # every worker selects the same objective
+        if not rng:
+            rng = random
+        ind = rng.randint(0, len(loss_objective_names) - 1)
         select = loss_objective_names[ind]
 
     return select
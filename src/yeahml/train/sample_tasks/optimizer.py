@@ -1,18 +1,27 @@
 import random
 
 
-def select_optimizer(list_of_opt_names):
+def select_optimizer(list_of_opt_names, rng=None, scheduler=None, name_to_losses=None):
 
-    # TODO: eventually, I'd like to pass loss/gradient information here and make
-    # an adaptive decision
+    # NOTE: the scheduler (see `sample_tasks/scheduler.py`) may make an adaptive
+    # decision from the validation losses in name_to_losses
 
     if len(list_of_opt_names) == 1:
         selected_opt_name = list_of_opt_names[0]
     else:
         if len(list_of_opt_names) == 0:
             raise ValueError(f"trying to select optimizer from no optimizers")
-        # naive approach
-        ind = random.randint(0, len(list_of_opt_names) - 1)
-        selected_opt_name = list_of_opt_names[ind]
+        if scheduler:
+            selected_opt_name = scheduler.select(
+                list_of_opt_names, rng=rng, name_to_losses=name_to_losses
+            )
+        else:
+            # naive approach
+            # NOTE: a seeded rng is used when training on multiple workers so
+            # that every worker selects the same optimizer
+            if not rng:
+                rng = random
+            ind = rng.randint(0, len(list_of_opt_names) - 1)
+            selected_opt_name = list_of_opt_names[ind]
 
     return selected_opt_name
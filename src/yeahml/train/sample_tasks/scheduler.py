@@ -0,0 +1,226 @@
+import math
+import random
+
+
+def return_available_schedulers():
+    return ["random", "round_robin", "weighted", "ucb"]
+
+
+class Scheduler:
+    """selects the next optimizer (or objective) to train from a list of names
+
+    `name_to_losses` is only created (by the training loop) if `uses_losses`
+    is set, it contains the validation loss values of each name, e.g.
+        {"main_opt": [[0.9, 0.5, 0.4]], "second_opt": [[1.2, 1.1], [0.3, 0.2]]}
+    where there is a list of values for each (loss) objective of the name
+    """
+
+    uses_losses = False
+
+    def select(self, names, rng=None, name_to_losses=None):
+        raise NotImplementedError
+
+    def get_state(self):
+        # the (json serializable) state that is saved in the checkpoint so
+        # that a resumed run continues the selection, see `set_state`
+        return {}
+
+    def set_state(self, state):
+        pass
+
+    def __str__(self):
+        return str(self.__class__) + ": " + str(self.__dict__)
+
+
+class RandomScheduler(Scheduler):
+    # uniform at random
+    def select(self, names, rng=None, name_to_losses=None):
+        # NOTE: a seeded rng is used when training on multiple workers so that
+        # every worker makes the same selection
+        if not rng:
+            rng = random
+        ind = rng.randint(0, len(names) - 1)
+        return names[ind]
+
+
+class RoundRobinScheduler(Scheduler):
+    # in order (of when the names were first seen), the names that are no
+    # longer training are skipped
+    def __init__(self):
+        self.order = []
+        self.last_selected = None
+
+    def select(self, names, rng=None, name_to_losses=None):
+        for name in names:
+            if name not in self.order:
+                self.order.append(name)
+        start = 0
+        if self.last_selected is not None:
+            start = self.order.index(self.last_selected) + 1
+        for i in range(len(self.order)):
+            name = self.order[(start + i) % len(self.order)]
+            if name in names:
+                self.last_selected = name
+                return name
+
+    def get_state(self):
+        return {"order": list(self.order), "last_selected": self.last_selected}
+
+    def set_state(self, state):
+        self.order = list(state["order"])
+        self.last_selected = state["last_selected"]
+
+
+class WeightedScheduler(Scheduler):
+    """at random, proportional to the configured weight of each name (names
+    without a weight have a weight of 1)
+
+    e.g.
+        optimize:scheduler:
+            type: "weighted"
+            options:
+                weights: {"main_opt": 3, "second_opt": 1}
+    """
+
+    def __init__(self, weights=None):
+        self.weights = weights if weights else {}
+        for name, weight in self.weights.items():
+            if weight < 0:
+                raise ValueError(f"weight of {name} ({weight}) must not be negative")
+
+    def select(self, names, rng=None, name_to_losses=None):
+        if not rng:
+            rng = random
+        weights = [self.weights.get(name, 1.0) for name in names]
+        if not sum(weights):
+            # all remaining names have a weight of 0
+            weights = None
+        return rng.choices(names, weights=weights)[0]
+
+
+def relative_improvement(values, window):
+    # mean (per validation pass) relative decrease of the values over the most
+    # recent `window` passes
+    if not values or len(values) < 2:
+        return 0.0
+    window = min(window, len(values) - 1)
+    prev, cur = float(values[-window - 1]), float(values[-1])
+    return (prev - cur) / (abs(prev) + 1e-12) / window
+
+
+class UCBScheduler(Scheduler):
+    """upper confidence bound bandit where the reward of a name is the
+    (relative) improvement of its validation loss(es) over the most recent
+    `window` validation passes. Steps are then spent on the names that are
+    reducing their loss the fastest, while `exploration` controls how often
+    the other names are revisited
+
+    e.g.
+        optimize:scheduler:
+            type: "ucb"
+            options:
+                exploration: 0.5
+                window: 3
+    """
+
+    uses_losses = True
+
+    def __init__(self, exploration=1.0, window=3):
+        if exploration < 0:
+            raise ValueError(f"exploration ({exploration}) must not be negative")
+        if window < 1:
+            raise ValueError(f"window ({window}) must be greater than 0")
+        self.exploration = exploration
+        self.window = window
+        self.num_selected = {}
+
+    def reward(self, name, name_to_losses):
+        try:
+            loss_values = name_to_losses[name]
+        except (KeyError, TypeError):
+            return 0.0
+        improvements = [relative_improvement(v, self.window) for v in loss_values]
+        if not improvements:
+            return 0.0
+        return sum(improvements) / len(improvements)
+
+    def select(self, names, rng=None, name_to_losses=None):
+        selected = None
+        # each name is selected once before the bound is used
+        for name in names:
+            if not self.num_selected.get(name, 0):
+                selected = name
+                break
+
+        if not selected:
+            total = sum(self.num_selected[name] for name in names)
+            best_score = None
+            for name in names:
+                score = self.reward(name, name_to_losses) + self.exploration * (
+                    math.sqrt(math.log(total) / self.num_selected[name])
+                )
+                if best_score is None or score > best_score:
+                    selected, best_score = name, score
+
+        self.num_selected[selected] = self.num_selected.get(selected, 0) + 1
+        return selected
+
+    def get_state(self):
+        return {"num_selected": dict(self.num_selected)}
+
+    def set_state(self, state):
+        self.num_selected = dict(state["num_selected"])
+
+
+def get_scheduler(scheduler_cdict=None):
+    """create a scheduler from the config, random if not specified
+
+    e.g.
+        optimize:scheduler:
+            type: "round_robin"
+    """
+    if not scheduler_cdict:
+        return RandomScheduler()
+
+    scheduler_type = scheduler_cdict["type"]
+    try:
+        options = scheduler_cdict["options"]
+    except KeyError:
+        options = None
+    if not options:
+        options = {}
+
+    if scheduler_type == "random":
+        scheduler = RandomScheduler(**options)
+    elif scheduler_type == "round_robin":
+        scheduler = RoundRobinScheduler(**options)
+    elif scheduler_type == "weighted":
+        scheduler = WeightedScheduler(**options)
+    elif scheduler_type == "ucb":
+        scheduler = UCBScheduler(**options)
+    else:
+        raise ValueError(
+            f"scheduler {scheduler_type} is not one of {return_available_schedulers()}"
+        )
+
+    return scheduler
+
+
+def get_loss_values(
+    opt_tracker_dict, objective_names, objectives_dict, split_name="val"
+):
+    # [[values]] of the loss trackers of each objective (one list per loss
+    # description) e.g. [[0.9, 0.5, 0.4]] for {"mse": {"mean": yml.Tracker}}
+    loss_values = []
+    for obj_name in objective_names:
+        ds_name = objectives_dict[obj_name]["in_config"]["dataset"]
+        try:
+            loss_tracker_dict = opt_tracker_dict[obj_name]["loss"][ds_name][split_name]
+        except (KeyError, TypeError):
+            # metric only objective
+            continue
+        for _, desc_dict in loss_tracker_dict.items():
+            for _, tracker in desc_dict.items():
+                if tracker.values:
+                    loss_values.append(list(tracker.values))
+    return loss_values
@@ -1,3 +1,5 @@
+import tensorflow as tf
+
 from yeahml.dataset.util import get_configured_dataset
 
 
@@ -31,7 +33,58 @@ def get_datasets(datasets, data_cdict, hp_cdict):
                     raise KeyError(
                         f"The datasets included do not contain {dataset_name}:{data_split_name} -- datasets:{datasets}"
                     )
-                tf_ds = get_configured_dataset(data_cdict, hp_cdict, ds=tf_ds_raw)
+                tf_ds = get_configured_dataset(
+                    data_cdict, hp_cdict, ds=tf_ds_raw, split_name=data_split_name
+                )
                 datasets_dict[dataset_name][data_split_name] = tf_ds
 
     return datasets_dict
+
+
+def subsample_datasets(datasets_dict, split_name, max_batches=None, fraction=None):
+    # a deterministic subset of the (batched) split is used so that the values
+    # from each pass are comparable. `fraction` keeps every 1/fraction-th
+    # batch (shard) and `max_batches` then keeps the first n batches (take)
+    if fraction is not None:
+        if not 0.0 < fraction <= 1.0:
+            raise ValueError(f"fraction ({fraction}) must be in (0, 1]")
+        num_shards = max(int(round(1.0 / fraction)), 1)
+    else:
+        num_shards = 1
+    if max_batches is not None and max_batches < 1:
+        raise ValueError(f"max_batches ({max_batches}) must be greater than 0")
+
+    sub_datasets_dict = {}
+    for dataset_name, split_to_ds in datasets_dict.items():
+        sub_datasets_dict[dataset_name] = {}
+        for data_split_name, tf_ds in split_to_ds.items():
+            if data_split_name == split_name:
+                if num_shards > 1:
+                    tf_ds = tf_ds.shard(num_shards, 0)
+                if max_batches:
+                    tf_ds = tf_ds.take(max_batches)
+            sub_datasets_dict[dataset_name][data_split_name] = tf_ds
+
+    return sub_datasets_dict
+
+
+def distribute_datasets(strategy, datasets_dict):
+    # the batches of each dataset are split across the replicas of the
+    # strategy. NOTE: hyper_parameters:dataset:batch is the global batch size
+    # when there are multiple workers, each worker reads every dataset and
+    # keeps only its shard. The datasets are sharded by element (DATA) since
+    # they are not necessarily file based
+    options = tf.data.Options()
+    options.experimental_distribute.auto_shard_policy = (
+        tf.data.experimental.AutoShardPolicy.DATA
+    )
+
+    dist_datasets_dict = {}
+    for dataset_name, split_to_ds in datasets_dict.items():
+        dist_datasets_dict[dataset_name] = {}
+        for data_split_name, tf_ds in split_to_ds.items():
+            tf_ds = tf_ds.with_options(options)
+            dist_tf_ds = strategy.experimental_distribute_dataset(tf_ds)
+            dist_datasets_dict[dataset_name][data_split_name] = dist_tf_ds
+
+    return dist_datasets_dict
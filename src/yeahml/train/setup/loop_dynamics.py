@@ -1,4 +1,8 @@
 from yeahml.build.components.optimizer import configure_optimizer
+from yeahml.build.components.precision import (
+    configure_loss_scale_optimizer,
+    requires_loss_scaling,
+)
 from yeahml.train.setup.tracker.loss import (
     create_joint_loss_tracker,
     create_loss_trackers,
@@ -6,19 +10,122 @@ from yeahml.train.setup.tracker.loss import (
 from yeahml.train.setup.tracker.metric import create_metric_trackers
 
 
-def get_optimizers(optim_cdict):
+def get_optimizers(optim_cdict, precision_policy_name=None):
 
     optimizers_dict = {}
     for opt_name, opt_dict in optim_cdict["optimizers"].items():
         configured_optimizer = configure_optimizer(opt_dict)
+        if requires_loss_scaling(precision_policy_name):
+            configured_optimizer = configure_loss_scale_optimizer(configured_optimizer)
+
+        # relative weight of the loss of each objective (default 1)
+        try:
+            objective_weights = opt_dict["objective_weights"]
+        except KeyError:
+            objective_weights = None
+        if not objective_weights:
+            objective_weights = {}
+
+        for obj_name, weight in objective_weights.items():
+            if obj_name not in opt_dict["objectives"]:
+                raise ValueError(
+                    f"objective {obj_name} (objective_weights) is not an objective of {opt_name}: {opt_dict['objectives']}"
+                )
+            if weight < 0:
+                raise ValueError(
+                    f"weight of {obj_name} ({weight}) for {opt_name} must not be negative"
+                )
+
         optimizers_dict[opt_name] = {
             "optimizer": configured_optimizer,
             "objectives": opt_dict["objectives"],
+            "objective_weights": objective_weights,
         }
 
     return optimizers_dict
 
 
+def get_loss_weights(optimizer_conf, objective_names, loss_objective_names):
+    """the weight of the loss of each objective (aligned with objective_names)
+    that is trained by the optimizer, None if all objectives have a weight of 1.
+    The weighted losses are summed (in a single fused step), which is
+    equivalent to weighting the gradient of each objective
+
+    e.g.
+        optimize:optimizers:
+            main_opt:
+                objectives: ["main_obj", "second_obj"]
+                objective_weights: {"main_obj": 3.0}
+        -> [3.0, 1.0]
+    """
+    objective_weights = optimizer_conf.get("objective_weights", {})
+    # metric only objectives do not have a loss
+    weights = [
+        (
+            float(objective_weights.get(obj_name, 1.0))
+            if obj_name in loss_objective_names
+            else 1.0
+        )
+        for obj_name in objective_names
+    ]
+    if all(w == 1.0 for w in weights):
+        return None
+    return weights
+
+
+def map_dataset_to_objectives(objective_names, objectives_dict):
+    """group objectives by the dataset specified in their in_config so that
+    objectives reading from the same dataset can share a batch (and a forward
+    pass)
+
+    e.g.
+        {"abalone": ["main_obj", "second_obj"]}
+    """
+    # TODO: this could be grouped by a hash of the full in_config, but the
+    # dataset is currently the only component that determines the batch
+    ds_to_objectives = {}
+    for objective_name in objective_names:
+        ds_name = objectives_dict[objective_name]["in_config"]["dataset"]
+        try:
+            ds_to_objectives[ds_name].append(objective_name)
+        except KeyError:
+            ds_to_objectives[ds_name] = [objective_name]
+
+    return ds_to_objectives
+
+
+def get_optimizer_variables(model, layer_names=None):
+    """the trainable variables of the named layers (graph nodes) that an
+    optimizer owns, None (all trainable variables of the model) if no layers
+    are specified
+
+    e.g.
+        optimize:optimizers:
+            decoder_opt:
+                layers: ["dense_3", "dense_out"]
+    """
+    if not layer_names:
+        return None
+
+    variables = []
+    for layer_name in layer_names:
+        try:
+            layer = model.get_layer(layer_name)
+        except ValueError:
+            raise ValueError(
+                f"layer {layer_name} is not in the model: {[l.name for l in model.layers]}"
+            )
+        for v in layer.trainable_variables:
+            # a layer may be listed more than once or share variables
+            if not any(v is cur_v for cur_v in variables):
+                variables.append(v)
+
+    if not variables:
+        raise ValueError(f"layers {layer_names} do not have any trainable variables")
+
+    return variables
+
+
 def _return_loss_trackers(raw_obj_dict):
 
     loss_tracker_dict = None
@@ -1,4 +1,7 @@
+import shutil
+import tempfile
 import time
+from pathlib import Path
 
 import tensorflow as tf
 
@@ -14,6 +17,18 @@ def create_model_run_path(full_exp_path):
     return model_run_path
 
 
+def create_worker_run_path(task_id):
+    # when training on multiple workers, only the chief writes to the model run
+    # path. the other workers write to a temporary location
+    return Path(tempfile.mkdtemp(prefix=f"yeahml_worker_{task_id}_"))
+
+
+def remove_worker_run_path(worker_run_path):
+    # the temporary location of a non-chief worker is removed once training
+    # is complete
+    shutil.rmtree(worker_run_path, ignore_errors=True)
+
+
 def create_model_training_paths(model_run_path):
     # model/exp_time/save/
     run_save = model_run_path.joinpath("save")
@@ -31,6 +46,22 @@ def create_model_training_paths(model_run_path):
     return save_model_path, save_best_param_path
 
 
+def get_checkpoint_dir(model_run_path):
+    # model/exp_time/save/checkpoints
+    return model_run_path.joinpath("save").joinpath("checkpoints")
+
+
+def get_latest_checkpoint(full_exp_path):
+    # the checkpoint of the most recent run (of the experiment) that has one
+    if not full_exp_path.exists():
+        return None, None
+    for model_run_path in sorted(full_exp_path.glob("run_*"), reverse=True):
+        ckpt_path = tf.train.latest_checkpoint(str(get_checkpoint_dir(model_run_path)))
+        if ckpt_path:
+            return model_run_path, ckpt_path
+    return None, None
+
+
 def get_tb_writers(model_run_path):
     # Tensorboard
     # TODO: eventually, this needs to be flexible enough to allow for new writes
@@ -41,3 +72,8 @@ def get_tb_writers(model_run_path):
     v_writer = tf.summary.create_file_writer(str(tb_logdir.joinpath("val")))
 
     return tr_writer, v_writer
+
+
+def get_noop_tb_writers():
+    # used by non-chief workers, nothing is written
+    return tf.summary.create_noop_writer(), tf.summary.create_noop_writer()
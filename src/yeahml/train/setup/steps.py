@@ -0,0 +1,398 @@
+import tensorflow as tf
+
+from yeahml.train.gradients.gradients import (
+    get_compiled_train_step_fn,
+    get_get_supervised_grads_fn,
+    get_joint_train_step_fn,
+    get_multi_train_step_fn,
+    get_validation_step_fn,
+)
+from yeahml.train.setup.loop_dynamics import (
+    get_loss_weights,
+    map_dataset_to_objectives,
+)
+from yeahml.train.util import get_losses_to_update, get_metrics_to_update
+
+
+def get_group_steps(
+    model,
+    optimizer_name,
+    tf_optimizer,
+    ds_to_objectives,
+    loss_objective_names,
+    metrics_objective_names,
+    objectives_dict,
+    objective_to_output_index,
+    dataset_dict,
+    compiled_step=False,
+    steps_per_execution=1,
+    accumulator=None,
+    variables=None,
+    optimizer_conf=None,
+    strategy=None,
+    trace_counter=None,
+    jit_compile=False,
+    logger=None,
+):
+    """create the training step fns for each group of objectives (objectives
+    of the current optimizer that share a dataset). The fns are created once
+    with the static pieces bound and an input signature from the dataset so
+    that they are not retraced during training
+
+    the accumulator (if included) is shared by all groups of the optimizer.
+    if variables are included, the gradients are only calculated (and
+    applied) for those variables
+
+    the loss of each objective is weighted by the `objective_weights` of the
+    optimizer_conf (if included), see `get_loss_weights`
+
+    if a (tf.distribute) strategy is included, the datasets are expected to be
+    distributed and only the multi step fn is created (the metrics are then
+    updated on each replica)
+
+    if jit_compile is set, the get_grad and train step fns are compiled with
+    XLA (the multi step fn is not, see `get_multi_train_step_fn`)
+
+    e.g.
+        {
+            "abalone": {
+                "objectives": ["main_obj", "second_obj"],
+                "loss_objectives": ["main_obj", "second_obj"],
+                "metrics_objectives": ["main_obj"],
+                "optimizers": ["main_opt"],
+                "opt_to_loss_objectives": {"main_opt": ["main_obj", "second_obj"]},
+                "opt_to_metrics_objectives": {"main_opt": ["main_obj"]},
+                "get_grads_fn": <tf.function>,
+                "train_step_fn": <tf.function> or None,
+                "multi_step_fn": <tf.function> or None,
+                "joint_step_fn": None,
+            }
+        }
+    """
+
+    ds_to_group = {}
+    for ds_name, objective_names in ds_to_objectives.items():
+        cur_loss_objectives = [o for o in objective_names if o in loss_objective_names]
+        cur_metrics_objectives = [
+            o for o in objective_names if o in metrics_objective_names
+        ]
+
+        loss_fns, output_indexes = [], []
+        loss_descs_to_update, metrics_to_update = [], []
+        for obj_name in objective_names:
+            if obj_name in cur_loss_objectives:
+                loss_conf = objectives_dict[obj_name]["loss"]
+                loss_fns.append(loss_conf["object"])
+                loss_descs_to_update.append(get_losses_to_update(loss_conf, "train"))
+            else:
+                # metric only objective, only the prediction is needed
+                loss_fns.append(None)
+                loss_descs_to_update.append([])
+            output_indexes.append(objective_to_output_index[obj_name])
+            if obj_name in cur_metrics_objectives:
+                metrics_to_update.append(
+                    get_metrics_to_update(objectives_dict[obj_name], "train")
+                )
+            else:
+                metrics_to_update.append([])
+
+        loss_weights = None
+        if optimizer_conf:
+            loss_weights = get_loss_weights(
+                optimizer_conf, objective_names, cur_loss_objectives
+            )
+
+        fn_name = f"{optimizer_name}:{ds_name}"
+        if strategy:
+            multi_step_fn = get_multi_train_step_fn(
+                steps_per_execution,
+                model,
+                loss_fns,
+                output_indexes,
+                loss_descs_to_update,
+                metrics_to_update,
+                tf_optimizer,
+                accumulator=accumulator,
+                variables=variables,
+                loss_weights=loss_weights,
+                strategy=strategy,
+                trace_counter=trace_counter,
+                name=f"{fn_name}:multi_train_step",
+            )
+            ds_to_group[ds_name] = {
+                "objectives": objective_names,
+                "loss_objectives": cur_loss_objectives,
+                "metrics_objectives": cur_metrics_objectives,
+                "optimizers": [optimizer_name],
+                "opt_to_loss_objectives": {optimizer_name: cur_loss_objectives},
+                "opt_to_metrics_objectives": {optimizer_name: cur_metrics_objectives},
+                "get_grads_fn": None,
+                "train_step_fn": None,
+                "multi_step_fn": multi_step_fn,
+                "joint_step_fn": None,
+            }
+            continue
+
+        element_spec = dataset_dict[ds_name]["train"].element_spec
+
+        # TODO: check config to see which fn to get supervised/etc
+        get_grads_fn = get_get_supervised_grads_fn(
+            model,
+            loss_fns,
+            output_indexes,
+            loss_descs_to_update,
+            optimizer=tf_optimizer,
+            variables=variables,
+            loss_weights=loss_weights,
+            input_signature=[element_spec],
+            trace_counter=trace_counter,
+            jit_compile=jit_compile,
+            logger=logger,
+            name=f"{fn_name}:get_grad",
+        )
+
+        train_step_fn = None
+        if compiled_step:
+            train_step_fn = get_compiled_train_step_fn(
+                model,
+                loss_fns,
+                output_indexes,
+                loss_descs_to_update,
+                tf_optimizer,
+                accumulator=accumulator,
+                variables=variables,
+                loss_weights=loss_weights,
+                input_signature=[element_spec],
+                trace_counter=trace_counter,
+                jit_compile=jit_compile,
+                logger=logger,
+                name=f"{fn_name}:train_step",
+            )
+
+        multi_step_fn = None
+        if steps_per_execution > 1:
+            multi_step_fn = get_multi_train_step_fn(
+                steps_per_execution,
+                model,
+                loss_fns,
+                output_indexes,
+                loss_descs_to_update,
+                metrics_to_update,
+                tf_optimizer,
+                accumulator=accumulator,
+                variables=variables,
+                loss_weights=loss_weights,
+                input_signature=[tf.data.IteratorSpec(element_spec)],
+                trace_counter=trace_counter,
+                name=f"{fn_name}:multi_train_step",
+            )
+
+        ds_to_group[ds_name] = {
+            "objectives": objective_names,
+            "loss_objectives": cur_loss_objectives,
+            "metrics_objectives": cur_metrics_objectives,
+            "optimizers": [optimizer_name],
+            "opt_to_loss_objectives": {optimizer_name: cur_loss_objectives},
+            "opt_to_metrics_objectives": {optimizer_name: cur_metrics_objectives},
+            "get_grads_fn": get_grads_fn,
+            "train_step_fn": train_step_fn,
+            "multi_step_fn": multi_step_fn,
+            "joint_step_fn": None,
+        }
+
+    return ds_to_group
+
+
+def get_joint_group_steps(
+    model,
+    optimizer_names,
+    optimizers_dict,
+    opt_to_loss_objectives,
+    opt_to_metrics_objectives,
+    objectives_dict,
+    objective_to_output_index,
+    dataset_dict,
+    opt_to_variables=None,
+    trace_counter=None,
+    jit_compile=False,
+    logger=None,
+):
+    """create the (fused) training step fn for each dataset used by a group of
+    optimizers that are trained jointly. The objectives of every optimizer in
+    the group that read from the dataset share a single forward pass, see
+    `get_joint_train_step_fn`
+
+    opt_to_variables (if included) are the variables of each optimizer, the
+    loss of each objective is weighted by its optimizer (see `get_loss_weights`)
+
+    e.g.
+        {
+            "abalone": {
+                "objectives": ["main_obj", "second_obj"],
+                "loss_objectives": ["main_obj", "second_obj"],
+                "metrics_objectives": ["main_obj", "second_obj"],
+                "optimizers": ["main_opt", "second_opt"],
+                "opt_to_loss_objectives": {
+                    "main_opt": ["main_obj"], "second_opt": ["second_obj"]
+                },
+                "opt_to_metrics_objectives": {
+                    "main_opt": ["main_obj"], "second_opt": ["second_obj"]
+                },
+                "get_grads_fn": None,
+                "train_step_fn": None,
+                "multi_step_fn": None,
+                "joint_step_fn": <tf.function>,
+            }
+        }
+    """
+    obj_to_opt = {}
+    for opt_name in optimizer_names:
+        for obj_name in optimizers_dict[opt_name]["objectives"]:
+            if obj_name in obj_to_opt:
+                # the train loss descriptions and metrics of an objective are
+                # reset when read and can't be tracked for two optimizers
+                raise ValueError(
+                    f"objective {obj_name} is included in both {obj_to_opt[obj_name]} and {opt_name}, which are trained jointly"
+                )
+            obj_to_opt[obj_name] = opt_name
+
+    ds_to_group = {}
+    for ds_name, objective_names in map_dataset_to_objectives(
+        list(obj_to_opt.keys()), objectives_dict
+    ).items():
+        loss_fns, output_indexes, loss_descs_to_update = [], [], []
+        cur_loss_objectives, cur_metrics_objectives = [], []
+        for obj_name in objective_names:
+            opt_name = obj_to_opt[obj_name]
+            if obj_name in opt_to_loss_objectives[opt_name]:
+                loss_conf = objectives_dict[obj_name]["loss"]
+                loss_fns.append(loss_conf["object"])
+                loss_descs_to_update.append(get_losses_to_update(loss_conf, "train"))
+                cur_loss_objectives.append(obj_name)
+            else:
+                loss_fns.append(None)
+                loss_descs_to_update.append([])
+            output_indexes.append(objective_to_output_index[obj_name])
+            if obj_name in opt_to_metrics_objectives[opt_name]:
+                cur_metrics_objectives.append(obj_name)
+
+        # only the optimizers with a loss on the dataset are updated
+        cur_optimizers, opt_loss_indexes = [], []
+        opt_to_cur_loss_objectives, opt_to_cur_metrics_objectives = {}, {}
+        for opt_name in optimizer_names:
+            loss_indexes = [
+                i
+                for i, obj_name in enumerate(objective_names)
+                if obj_to_opt[obj_name] == opt_name and obj_name in cur_loss_objectives
+            ]
+            if not loss_indexes:
+                continue
+            cur_optimizers.append(opt_name)
+            opt_loss_indexes.append(loss_indexes)
+            opt_to_cur_loss_objectives[opt_name] = [
+                objective_names[i] for i in loss_indexes
+            ]
+            opt_to_cur_metrics_objectives[opt_name] = [
+                o for o in cur_metrics_objectives if obj_to_opt[o] == opt_name
+            ]
+        if not cur_optimizers:
+            continue
+
+        # weights are aligned with objective_names, each objective is weighted
+        # by its optimizer
+        loss_weights = [1.0] * len(objective_names)
+        for opt_name in cur_optimizers:
+            opt_weights = get_loss_weights(
+                optimizers_dict[opt_name],
+                opt_to_cur_loss_objectives[opt_name],
+                opt_to_cur_loss_objectives[opt_name],
+            )
+            if opt_weights:
+                for obj_name, weight in zip(
+                    opt_to_cur_loss_objectives[opt_name], opt_weights
+                ):
+                    loss_weights[objective_names.index(obj_name)] = weight
+        if all(w == 1.0 for w in loss_weights):
+            loss_weights = None
+
+        element_spec = dataset_dict[ds_name]["train"].element_spec
+        joint_step_fn = get_joint_train_step_fn(
+            model,
+            loss_fns,
+            output_indexes,
+            loss_descs_to_update,
+            [optimizers_dict[opt_name]["optimizer"] for opt_name in cur_optimizers],
+            opt_loss_indexes,
+            opt_variables=[
+                opt_to_variables[opt_name] if opt_to_variables else None
+                for opt_name in cur_optimizers
+            ],
+            loss_weights=loss_weights,
+            input_signature=[element_spec],
+            trace_counter=trace_counter,
+            jit_compile=jit_compile,
+            logger=logger,
+            name=f"{'&'.join(cur_optimizers)}:{ds_name}:joint_train_step",
+        )
+
+        ds_to_group[ds_name] = {
+            "objectives": objective_names,
+            "loss_objectives": cur_loss_objectives,
+            "metrics_objectives": cur_metrics_objectives,
+            "optimizers": cur_optimizers,
+            "opt_to_loss_objectives": opt_to_cur_loss_objectives,
+            "opt_to_metrics_objectives": opt_to_cur_metrics_objectives,
+            "get_grads_fn": None,
+            "train_step_fn": None,
+            "multi_step_fn": None,
+            "joint_step_fn": joint_step_fn,
+        }
+
+    return ds_to_group
+
+
+def get_validation_steps(
+    model,
+    loss_objective_names,
+    objectives_dict,
+    objective_to_output_index,
+    dataset_dict,
+    split_name="val",
+    strategy=None,
+    trace_counter=None,
+    jit_compile=False,
+    logger=None,
+):
+    """create a validation step fn for each objective with a loss. The
+    metrics of the objective are updated within the step
+
+    e.g.
+        {"main_obj": <tf.function>}
+    """
+    obj_to_val_fn = {}
+    for obj_name in loss_objective_names:
+        loss_conf = objectives_dict[obj_name]["loss"]
+        ds_name = objectives_dict[obj_name]["in_config"]["dataset"]
+        try:
+            cur_ds = dataset_dict[ds_name][split_name]
+        except KeyError:
+            raise ValueError(f"{ds_name} does not have a '{split_name}' dataset")
+        # NOTE: the signature of a distributed dataset is left to tf.function
+        input_signature = None if strategy else [cur_ds.element_spec]
+        obj_to_val_fn[obj_name] = get_validation_step_fn(
+            model,
+            loss_conf["object"],
+            objective_to_output_index[obj_name],
+            get_losses_to_update(loss_conf, split_name),
+            metrics_to_update=get_metrics_to_update(
+                objectives_dict[obj_name], split_name
+            ),
+            strategy=strategy,
+            input_signature=input_signature,
+            trace_counter=trace_counter,
+            jit_compile=jit_compile and not strategy,
+            logger=logger,
+            name=f"{obj_name}:{ds_name}:{split_name}_step",
+        )
+
+    return obj_to_val_fn
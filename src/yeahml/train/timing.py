@@ -0,0 +1,200 @@
+import csv
+import json
+import math
+import time
+from contextlib import contextmanager
+
+# the timed phases of the training loop. NOTE: the forward pass, loss and
+# gradient calculation are a single (fused) step fn, and so `prediction` and
+# `loss` are included in `calc_gradient` (or `train_step` when the params are
+# also updated within the step, e.g. compiled/joint/multi step)
+TIMED_PHASES = [
+    "obtain_batch",
+    "calc_gradient",
+    "train_step",
+    "apply_gradient",
+    "metric",
+    "tracker",
+    "tensorboard",
+    "validation",
+    "checkpoint",
+]
+
+# the time spent waiting on the input pipeline, reported on its own
+INPUT_STALL_PHASE = "obtain_batch"
+
+# durations are counted in log spaced buckets (each 5% wider than the last)
+# so that the percentiles are approximate (within 5%) and the memory is fixed
+_MIN_TIME = 1e-6
+_BUCKET_RATIO = 1.05
+_LOG_BUCKET_RATIO = math.log(_BUCKET_RATIO)
+
+REPORT_COLUMNS = [
+    "phase",
+    "optimizer",
+    "objective",
+    "dataset",
+    "count",
+    "total",
+    "mean",
+    "p50",
+    "p95",
+    "max",
+]
+
+
+class DurationHistogram:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = {}
+
+    def record(self, duration):
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+        if duration <= _MIN_TIME:
+            ind = 0
+        else:
+            ind = int(math.log(duration / _MIN_TIME) / _LOG_BUCKET_RATIO) + 1
+        self.buckets[ind] = self.buckets.get(ind, 0) + 1
+
+    def percentile(self, q):
+        # upper edge of the bucket containing the q (0-1) percentile
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for ind in sorted(self.buckets.keys()):
+            cumulative += self.buckets[ind]
+            if cumulative >= target:
+                return min(_MIN_TIME * _BUCKET_RATIO ** ind, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "max": self.max,
+        }
+
+    def __str__(self):
+        return str(self.__class__) + ": " + str(self.__dict__)
+
+
+class PhaseTimer:
+    """wall clock timers around the phases of the training loop, aggregated
+    (p50/p95/max) per phase, optimizer, objective and dataset
+
+    NOTE: the step fns may run asynchronously (e.g. on a gpu), the time is
+    then attributed to the phase that waits on the result (e.g. the tracker
+    readback). no syncs are added so that the timings don't slow training
+
+    e.g.
+        with timer.time("calc_gradient", "main_opt", "main_obj", "abalone"):
+            grad_dict = get_grads_fn(batch)
+    """
+
+    def __init__(self):
+        self.histograms = {}
+        self.start_time = time.perf_counter()
+        self.end_time = None
+
+    def record(self, phase, duration, optimizer=None, objective=None, dataset=None):
+        key = (phase, optimizer, objective, dataset)
+        try:
+            histogram = self.histograms[key]
+        except KeyError:
+            histogram = DurationHistogram()
+            self.histograms[key] = histogram
+        histogram.record(duration)
+
+    @contextmanager
+    def time(self, phase, optimizer=None, objective=None, dataset=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(
+                phase, time.perf_counter() - start, optimizer, objective, dataset
+            )
+
+    def stop(self):
+        self.end_time = time.perf_counter()
+
+    def report(self):
+        """
+        e.g.
+            {
+                "total_time": 12.3,
+                "input_stall": {"time": 1.2, "fraction": 0.098},
+                "phases": [
+                    {
+                        "phase": "calc_gradient",
+                        "optimizer": "main_opt",
+                        "objective": "main_obj",
+                        "dataset": "abalone",
+                        "count": 120, "total": 4.1, "mean": 0.034,
+                        "p50": 0.031, "p95": 0.052, "max": 0.61,
+                    },
+                    ...
+                ],
+            }
+        """
+        end_time = self.end_time if self.end_time else time.perf_counter()
+        total_time = end_time - self.start_time
+
+        phases = []
+        for key in sorted(self.histograms.keys(), key=lambda k: [str(v) for v in k]):
+            phase, optimizer, objective, dataset = key
+            phase_dict = {
+                "phase": phase,
+                "optimizer": optimizer,
+                "objective": objective,
+                "dataset": dataset,
+            }
+            phase_dict.update(self.histograms[key].summary())
+            phases.append(phase_dict)
+
+        # NOTE: None if the batches were not obtained by the loop (e.g. they
+        # are obtained within a multi step fn)
+        stall_times = [
+            h.total for k, h in self.histograms.items() if k[0] == INPUT_STALL_PHASE
+        ]
+        stall_time, stall_fraction = None, None
+        if stall_times:
+            stall_time = sum(stall_times)
+            stall_fraction = stall_time / total_time if total_time else 0.0
+        return {
+            "total_time": total_time,
+            "input_stall": {"time": stall_time, "fraction": stall_fraction},
+            "phases": phases,
+        }
+
+    def write_report(self, out_dir, report=None):
+        # timings.json and timings.csv (the input stall is the first row)
+        if not report:
+            report = self.report()
+        json_path = out_dir.joinpath("timings.json")
+        with open(json_path, "w") as fp:
+            json.dump(report, fp, indent=2)
+
+        csv_path = out_dir.joinpath("timings.csv")
+        with open(csv_path, "w", newline="") as fp:
+            writer = csv.DictWriter(fp, fieldnames=REPORT_COLUMNS)
+            writer.writeheader()
+            writer.writerow(
+                {"phase": "input_stall", "total": report["input_stall"]["time"]}
+            )
+            for phase_dict in report["phases"]:
+                writer.writerow(phase_dict)
+
+        return json_path, csv_path
+
+    def __str__(self):
+        return str(self.__class__) + ": " + str(self.__dict__)
@@ -1,31 +1,72 @@
 import pathlib
+import random
 from typing import Any, Dict
 from yeahml.build.components.callbacks.objects.base import CallbackContainer as CBC
+from yeahml.build.components.callbacks.objects.base import CB_STATE_OPTIONS
 
 import tensorflow as tf
 
 # from tensorflow.python.keras import callbacks as callbacks_module
 
 
+from yeahml.build.components.distribution import (
+    get_distribution_cdict,
+    get_task_id,
+    is_chief,
+    is_distributed,
+)
+from yeahml.build.components.precision import get_precision_policy_name
 from yeahml.log.yf_logging import config_logger
+from yeahml.train.async_inference import AsyncInference, create_shadow_model
+from yeahml.train.checkpoint import (
+    Checkpointer,
+    get_checkpoint_cdict,
+    get_training_state,
+    load_tracker_state,
+)
+from yeahml.train.early_stopping import EarlyStopping
+from yeahml.train.gradients.accumulate import GradientAccumulator
 from yeahml.train.gradients.gradients import (
+    get_accumulate_grad_fn,
     get_apply_grad_fn,
-    get_get_supervised_grads_fn,
-    get_validation_step_fn,
     update_model_params,
+    update_model_params_from_accumulator,
+)
+from yeahml.train.gradients.trace import (
+    DEFAULT_MAX_TRACES,
+    TraceCounter,
+    jit_compile_available,
 )
 from yeahml.train.inference import inference_dataset
 
 # select which task to optimize
+from yeahml.train.sample_tasks.directive import get_execution_plan
 from yeahml.train.sample_tasks.objective import select_objective
 from yeahml.train.sample_tasks.optimizer import select_optimizer
-from yeahml.train.setup.datasets import get_datasets
-from yeahml.train.setup.objectives import get_objectives
+from yeahml.train.sample_tasks.scheduler import get_loss_values, get_scheduler
+from yeahml.train.setup.datasets import (
+    distribute_datasets,
+    get_datasets,
+    subsample_datasets,
+)
+from yeahml.train.setup.objectives import (
+    get_objective_to_output_index,
+    get_objectives,
+)
+from yeahml.train.setup.steps import (
+    get_group_steps,
+    get_joint_group_steps,
+    get_validation_steps,
+)
 from yeahml.train.setup.callbacks import get_callbacks
 from yeahml.train.setup.paths import (
     create_model_run_path,
     create_model_training_paths,
+    create_worker_run_path,
+    get_latest_checkpoint,
+    get_noop_tb_writers,
     get_tb_writers,
+    remove_worker_run_path,
 )
 from yeahml.train.setup.tracker.metric import (
     create_metric_trackers,
@@ -35,14 +76,17 @@ from yeahml.train.setup.tracker.tracker import (
     create_joint_dict_tracker,
     record_joint_losses,
 )
+from yeahml.train.profiler import Profiler
+from yeahml.train.timing import PhaseTimer
+from yeahml.train.update_progress.param_summary import ParamSummarizer
+from yeahml.train.update_progress.readback import DeferredReadback
 from yeahml.train.update_progress.tf_objectives import update_metric_objects
 from yeahml.train.update_progress.tracker import (
-    update_loss_trackers,
-    update_metrics_tracking,
+    add_loss_trackers,
+    add_metrics_trackers,
 )
 from yeahml.train.util import (
     convert_to_single_pass_iterator,
-    get_losses_to_update,
     get_next_batch,
     re_init_iter,
 )
@@ -52,7 +96,9 @@ from yeahml.build.components.callbacks.objects.printer import Printer as printer
 
 from yeahml.train.setup.loop_dynamics import (  # obtain_optimizer_loss_mapping,; create_grouped_metrics,; map_in_config_to_objective,
     create_full_dict,
+    get_optimizer_variables,
     get_optimizers,
+    map_dataset_to_objectives,
 )
 
 
@@ -115,10 +161,57 @@ particular optimizer (it will eval at the same time this optimizer is run)
 """
 
 
-def log_model_params(tr_writer, g_train_step, model):
-    with tr_writer.as_default():
-        for v in model.variables:
-            tf.summary.histogram(v.name.split(":")[0], v.numpy(), step=g_train_step)
+def run_validation(
+    model,
+    obj_to_val_fn,
+    num_train_instances,
+    num_training_ops,
+    v_writer,
+    inference_kwargs,
+    optimizer_name=None,
+    param_summarizer=None,
+    profiling=False,
+):
+    # validation pass followed by a histogram of the params used during the
+    # validation. The model may be a snapshot of the model being trained (see
+    # `AsyncInference`), the step counts are then those of the snapshot (and
+    # the param_summarizer is for the snapshot)
+    # NOTE: this may be run on a background thread, only the val results are
+    # returned -- the trackers, early stopping, best params and profiler (which
+    # are shared with the training loop) are updated by `finish_validation` on
+    # the main thread
+    apply_updates = inference_dataset(
+        model,
+        obj_to_val_fn=obj_to_val_fn,
+        num_train_instances=num_train_instances,
+        num_training_ops=num_training_ops,
+        v_writer=v_writer,
+        defer_updates=True,
+        **inference_kwargs,
+    )
+    if param_summarizer:
+        param_summarizer(v_writer, num_training_ops)
+    return {
+        "apply_updates": apply_updates,
+        "optimizer_name": optimizer_name,
+        "num_training_ops": num_training_ops,
+        "profiling": profiling,
+    }
+
+
+def finish_validation(
+    val_result, checkpointer=None, early_stopping=None, profiler=None
+):
+    # called on the main thread with the result of `run_validation`
+    if val_result["profiling"]:
+        profiler.stop_validation()
+    cur_val_update = val_result["apply_updates"]()
+    # the best params are saved if the tracked value improved
+    if checkpointer:
+        checkpointer.save_best(cur_val_update, val_result["num_training_ops"])
+    if early_stopping:
+        early_stopping.update(val_result["optimizer_name"], cur_val_update)
+    return cur_val_update
 
 
 def update_epoch_dict(
@@ -152,13 +245,34 @@ def determine_if_training(opt_obj_ds_to_training):
     return False
 
 
-# def start_profiler(profile_path, profiling):
-#     if not profiling:
-#         tf.profiler.experimental.start(str(profile_path))
+def stop_objectives(opt_obj_ds_to_training, opt_obj_names):
+    # mark all datasets of each (optimizer, objective) as no longer training
+    for opt_name, obj_name in opt_obj_names:
+        for ds_name, ds_to_training in opt_obj_ds_to_training[opt_name][
+            obj_name
+        ].items():
+            for split_name in ds_to_training.keys():
+                ds_to_training[split_name] = False
+    return opt_obj_ds_to_training
 
 
-# def stop_profiler():
-#     tf.profiler.experimental.stop()
+def crossed_interval(prev_num, cur_num, interval):
+    # True if a multiple of the interval was reached in (prev_num, cur_num].
+    # When stepping by 1, this is equivalent to `cur_num % interval == 0`
+    if interval <= 0:
+        return False
+    return (cur_num // interval) > (prev_num // interval)
+
+
+def get_training_objectives(opt_to_training):
+    # objectives (of a single optimizer) that are still training on any dataset
+    training_objectives = []
+    for obj_name, obj_to_training in opt_to_training.items():
+        for ds_name, ds_to_training in obj_to_training.items():
+            if any(ds_to_training.values()):
+                training_objectives.append(obj_name)
+                break
+    return training_objectives
 
 
 def get_train_iter(dataset_iter_dict, cur_ds_name, split_name):
@@ -169,8 +283,51 @@ def get_train_iter(dataset_iter_dict, cur_ds_name, split_name):
     return cur_train_iter
 
 
+def get_task_state(opt_scheduler, unit_to_obj_scheduler, execution_plan, task_rng):
+    # the state of the task selection that is saved in the checkpoint so that a
+    # resumed run makes the same selections. NOTE: the `random` module is used
+    # by the schedulers if there is no (seeded) task_rng
+    return {
+        "opt_scheduler": opt_scheduler.get_state(),
+        # e.g. {"main_opt & second_opt": {...}}
+        "obj_schedulers": {
+            " & ".join(unit): obj_scheduler.get_state()
+            for unit, obj_scheduler in unit_to_obj_scheduler.items()
+        },
+        "execution_plan": execution_plan.get_state() if execution_plan else None,
+        "rng": (task_rng if task_rng else random).getstate(),
+    }
+
+
+def load_task_state(
+    task_state,
+    opt_scheduler,
+    unit_to_obj_scheduler,
+    execution_plan,
+    task_rng,
+    scheduler_cdict=None,
+):
+    # the objective schedulers of the units that were selected before the run
+    # was interrupted are created and added to unit_to_obj_scheduler
+    opt_scheduler.set_state(task_state["opt_scheduler"])
+    for unit_str, obj_state in task_state["obj_schedulers"].items():
+        obj_scheduler = get_scheduler(scheduler_cdict)
+        obj_scheduler.set_state(obj_state)
+        unit_to_obj_scheduler[tuple(unit_str.split(" & "))] = obj_scheduler
+    if execution_plan and task_state["execution_plan"]:
+        execution_plan.set_state(task_state["execution_plan"])
+    # NOTE: json converts the tuples of the rng state to lists
+    version, internal_state, gauss_next = task_state["rng"]
+    (task_rng if task_rng else random).setstate(
+        (version, tuple(internal_state), gauss_next)
+    )
+
+
 def train_model(
-    model: Any, config_dict: Dict[str, Dict[str, Any]], datasets: dict = None
+    model: Any,
+    config_dict: Dict[str, Dict[str, Any]],
+    datasets: dict = None,
+    resume: bool = False,
 ) -> Dict[str, Any]:
 
     # TODO: option to reinitialize model?
@@ -195,26 +352,108 @@ def train_model(
         .joinpath(model_cdict["name"])
     )
 
+    # the model is built under the strategy (see build_model). when training on
+    # multiple workers, only the chief writes to the model run path
+    strategy = model.distribute_strategy
+    distributed = is_distributed(strategy)
+    chief = is_chief(strategy)
+
+    # when resuming, training is continued from the latest checkpoint of the
+    # most recent run (and written to the same run path)
+    resume_run_path, resume_ckpt_path = None, None
+    if resume:
+        resume_run_path, resume_ckpt_path = get_latest_checkpoint(full_exp_path)
+
     # build paths and obtain tb writers
-    model_run_path = create_model_run_path(full_exp_path)
-    # profile_path = model_run_path.joinpath("tf_logs").joinpath("profile")
+    if chief:
+        if resume_run_path:
+            model_run_path = resume_run_path
+        else:
+            model_run_path = create_model_run_path(full_exp_path)
+    else:
+        model_run_path = create_worker_run_path(get_task_id(strategy))
     save_model_path, save_best_param_path = create_model_training_paths(model_run_path)
-    tr_writer, v_writer = get_tb_writers(model_run_path)
-    log_model_params(tr_writer, 0, model)
+    if chief:
+        tr_writer, v_writer = get_tb_writers(model_run_path)
+    else:
+        tr_writer, v_writer = get_noop_tb_writers()
 
     logger = config_logger(model_run_path, log_cdict, "train")
+    if resume and not resume_ckpt_path:
+        logger.warning(
+            f"resume was specified but no checkpoint was found in {full_exp_path}, starting from the beginning"
+        )
     # get datasets
     # train_ds, val_ds = get_datasets(datasets, data_cdict, hp_cdict)
     dataset_dict = get_datasets(datasets, data_cdict, hp_cdict)
 
-    # {optimizer_name: {"optimizer": tf.obj, "objective": [objective_name]}}
-    optimizers_dict = get_optimizers(optim_cdict)
-
-    # {objective_name: "in_config": {...}, "loss": {...}, "metric": {...}}
-    # TODO: "train", "val" should be obtained from the config
-    objectives_dict = get_objectives(
-        perf_cdict["objectives"], dataset_dict, target_splits=["train", "val"]
-    )
+    # validation may be run on a (deterministic) subset of the val datasets
+    try:
+        val_max_batches = hp_cdict["val_max_batches"]
+    except KeyError:
+        val_max_batches = None
+    try:
+        val_fraction = hp_cdict["val_fraction"]
+    except KeyError:
+        val_fraction = None
+    if val_max_batches or val_fraction:
+        dataset_dict = subsample_datasets(
+            dataset_dict, "val", max_batches=val_max_batches, fraction=val_fraction
+        )
+
+    # the precision policy is set when the model is built, the optimizers are
+    # wrapped for loss scaling if needed (mixed_float16)
+    precision_policy_name = get_precision_policy_name(perf_cdict)
+    if model.dtype_policy.name != precision_policy_name:
+        logger.warning(
+            f"model was built with the {model.dtype_policy.name} precision policy"
+            f" but performance:mixed_precision is {precision_policy_name}"
+        )
+
+    # the optimizers and the metrics/loss descriptions are also created under
+    # the strategy so that their variables are mirrored/synced across replicas
+    dist_strategy_name = get_distribution_cdict(perf_cdict)["strategy"]
+    if dist_strategy_name != "default" and not distributed:
+        logger.warning(
+            f"performance:distribution:strategy is {dist_strategy_name} but the"
+            " model was not built under a distribution strategy"
+        )
+
+    with strategy.scope():
+        # {optimizer_name: {"optimizer": tf.obj, "objective": [objective_name]}}
+        optimizers_dict = get_optimizers(optim_cdict, precision_policy_name)
+
+        # {objective_name: "in_config": {...}, "loss": {...}, "metric": {...}}
+        # TODO: "train", "val" should be obtained from the config
+        objectives_dict = get_objectives(
+            perf_cdict["objectives"], dataset_dict, target_splits=["train", "val"]
+        )
+
+    if distributed:
+        logger.info(
+            f"replicas in sync: {strategy.num_replicas_in_sync}, chief: {chief}"
+        )
+        dataset_dict = distribute_datasets(strategy, dataset_dict)
+
+    # every worker must run the same steps (the gradients/metrics are reduced
+    # across workers), the optimizer/objective selection is then seeded
+    task_rng = None
+    if distributed:
+        try:
+            task_rng = random.Random(meta_cdict["random_seed"])
+        except KeyError:
+            task_rng = random.Random(42)
+
+    # the scheduler selects the next optimizer to train, and (separately for
+    # each optimizer) the next objective
+    try:
+        scheduler_cdict = optim_cdict["scheduler"]
+    except KeyError:
+        scheduler_cdict = None
+    opt_scheduler = get_scheduler(scheduler_cdict)
+    # the objective scheduler of each (unit of) optimizer(s), created when the
+    # unit is first selected
+    unit_to_obj_scheduler = {}
 
     # create callbacks
     custom_callbacks = get_callbacks(cb_cdict)
@@ -224,27 +463,236 @@ def train_model(
         dataset_names=list(dataset_dict.keys()),
         objective_names=list(objectives_dict.keys()),
     )
-    # TODO: call all cbc methods at the appropriate time
+    # NOTE: the hooks are obtained (from the dispatch table of the container)
+    # once per group and a hook without callbacks is None, so that the batch
+    # loop only checks the hook. The obtain_task hooks are called before the
+    # task is known and only call the global callbacks
+    global_hooks = cbc.hooks()
+
+    # when set, the gradient calculation, gradient application and the
+    # constraints are performed in a single compiled step for each optimizer
+    try:
+        compiled_step = perf_cdict["compiled_step"]
+    except KeyError:
+        compiled_step = False
+
+    # number of training steps to run within a single (compiled) call. the
+    # trackers/tensorboard are then updated every `steps_per_execution` steps
+    try:
+        steps_per_execution = perf_cdict["steps_per_execution"]
+    except KeyError:
+        steps_per_execution = 1
+    if steps_per_execution < 1:
+        raise ValueError(
+            f"steps_per_execution ({steps_per_execution}) must be greater than 0"
+        )
+
+    # when set, validation is run every n training steps (of any optimizer)
+    # rather than after each pass through a training dataset
+    try:
+        val_every_n_steps = hp_cdict["val_every_n_steps"]
+    except KeyError:
+        val_every_n_steps = None
+    if val_every_n_steps is not None and val_every_n_steps < 1:
+        raise ValueError(
+            f"val_every_n_steps ({val_every_n_steps}) must be greater than 0"
+        )
+
+    # an objective is stopped once its validation loss (or monitored metric)
+    # has not improved for `early_stopping:epochs` validation passes
+    try:
+        es_cdict = hp_cdict["early_stopping"]
+    except KeyError:
+        es_cdict = None
+    early_stopping = None
+    if es_cdict:
+        try:
+            obj_to_monitor = es_cdict["monitor"]
+        except KeyError:
+            obj_to_monitor = None
+        early_stopping = EarlyStopping(
+            es_cdict["epochs"],
+            warm_up=es_cdict["warm_up"],
+            obj_to_monitor=obj_to_monitor,
+        )
+
+    # when distributed, the steps are always run by the multi step fn so that
+    # the metrics are updated on each replica
+    multi_step = steps_per_execution > 1 or distributed
+
+    # the step fns are created once (below) with an input signature, a warning
+    # is logged if any of them is traced more than `max_traces` times
+    try:
+        max_traces = perf_cdict["max_traces"]
+    except KeyError:
+        max_traces = DEFAULT_MAX_TRACES
+    trace_counter = TraceCounter(logger, max_traces=max_traces)
+
+    # when set, the step fns are compiled with XLA (each falls back to a
+    # tf.function, with the reason logged, if it can't be compiled). this may
+    # be overridden for each optimizer (optimize:optimizers:'name':jit_compile)
+    try:
+        jit_compile = perf_cdict["jit_compile"]
+    except KeyError:
+        jit_compile = False
+    opt_to_jit_compile = {}
+    for opt_name in optimizers_dict.keys():
+        try:
+            cur_jit_compile = optim_cdict["optimizers"][opt_name]["jit_compile"]
+        except KeyError:
+            cur_jit_compile = None
+        if cur_jit_compile is None:
+            cur_jit_compile = jit_compile
+        opt_to_jit_compile[opt_name] = bool(cur_jit_compile)
+    if any(opt_to_jit_compile.values()):
+        if distributed:
+            logger.warning(
+                "jit_compile is not currently supported with performance:distribution, the step fns will not be jit compiled"
+            )
+            opt_to_jit_compile = {k: False for k in opt_to_jit_compile.keys()}
+        elif not jit_compile_available(logger):
+            opt_to_jit_compile = {k: False for k in opt_to_jit_compile.keys()}
+        elif multi_step:
+            # the iterator ops can't be compiled
+            logger.info(
+                "performance:steps_per_execution train steps are not jit compiled"
+            )
+
+    # when set, validation is run on a snapshot of the weights (copied into a
+    # shadow model) on a background thread while training continues
+    try:
+        async_validation = perf_cdict["async_validation"]
+    except KeyError:
+        async_validation = False
+    async_validator = None
+    if async_validation:
+        if distributed:
+            # the collectives of the validation steps would be interleaved with
+            # those of the training steps
+            raise ValueError(
+                "performance:async_validation is not currently supported with performance:distribution"
+            )
+        shadow_model = create_shadow_model(model, logger)
+        if shadow_model:
+            async_validator = AsyncInference(model, shadow_model, logger)
+        else:
+            logger.warning("async validation is not available, validating in place")
+    val_model = async_validator.shadow_model if async_validator else model
+
+    # the losses and metrics due at a tracker step (or validation pass) are
+    # read from the device in a single call. NOTE: validation may be run on a
+    # background thread and so has its own readback
+    train_readback = DeferredReadback("train_readback", trace_counter)
+    val_readback = DeferredReadback("val_readback", trace_counter)
+
+    # histograms of the model params are computed in-graph (on a sample of
+    # each variable, if set) and written on a background thread. Only the chief
+    # writes to tensorboard
+    tb_cdict = log_cdict["track"]["tensorboard"]
+    try:
+        param_sample_size = tb_cdict["param_sample_size"]
+    except KeyError:
+        param_sample_size = None
+    try:
+        param_max_variables = tb_cdict["param_max_variables"]
+    except KeyError:
+        param_max_variables = None
+    param_summarizer, val_param_summarizer = None, None
+    if chief:
+        param_summarizer = ParamSummarizer(
+            model,
+            sample_size=param_sample_size,
+            max_variables=param_max_variables,
+            logger=logger,
+        )
+        val_param_summarizer = param_summarizer
+        if val_model is not model:
+            val_param_summarizer = ParamSummarizer(
+                val_model,
+                sample_size=param_sample_size,
+                max_variables=param_max_variables,
+                logger=logger,
+            )
+        param_summarizer(tr_writer, 0)
+
+    objective_to_output_index = get_objective_to_output_index(model, objectives_dict)
 
     # create a tf.function for applying gradients for each optimizer
     # TODO: I am not 100% about this logic for maping the optimizer to the
     #   apply_gradient fn... this needs to be confirmed to work as expected
     opt_to_validation_fn = {}
-    opt_to_get_grads_fn, opt_to_app_grads_fn = {}, {}
+    opt_to_app_grads_fn = {}
+    # gradients may be accumulated over micro-batches before being applied
+    opt_to_accumulator, opt_to_accumulate_fn = {}, {}
     opt_to_steps = {}
+    # the variables each optimizer updates (None for all trainable variables)
+    opt_to_variables = {}
     # used to determine which objectives to loop to calculate losses
     opt_to_loss_objectives = {}
     # used to determine which objectives to obtain to calculate metrics
     opt_to_metrics_objectives = {}
+    # objectives that can share a batch are grouped by dataset and the step
+    # fns for each group are created here
+    opt_to_ds_to_group = {}
 
     for cur_optimizer_name, cur_optimizer_config in optimizers_dict.items():
 
-        # TODO: check config to see which fn to get supervised/etc
-        opt_to_get_grads_fn[cur_optimizer_name] = get_get_supervised_grads_fn()
-        opt_to_app_grads_fn[cur_optimizer_name] = get_apply_grad_fn()
-        opt_to_validation_fn[cur_optimizer_name] = get_validation_step_fn()
+        # the gradients are only calculated for the layers (graph nodes) the
+        # optimizer owns, the backward pass through the other layers is skipped
+        try:
+            layer_names = optim_cdict["optimizers"][cur_optimizer_name]["layers"]
+        except KeyError:
+            layer_names = None
+        cur_variables = get_optimizer_variables(model, layer_names)
+        opt_to_variables[cur_optimizer_name] = cur_variables
+        if cur_variables is not None:
+            logger.info(
+                f"{cur_optimizer_name} updates {len(cur_variables)} of {len(model.trainable_variables)} trainable variables"
+            )
+
+        opt_to_app_grads_fn[cur_optimizer_name] = get_apply_grad_fn(
+            model,
+            cur_optimizer_config["optimizer"],
+            variables=cur_variables,
+            trace_counter=trace_counter,
+            jit_compile=opt_to_jit_compile[cur_optimizer_name],
+            logger=logger,
+            name=f"{cur_optimizer_name}:apply_grad",
+        )
         opt_to_steps[cur_optimizer_name] = 0
 
+        # number of micro-batches to accumulate the gradients over before they
+        # are applied by the optimizer
+        try:
+            accumulate_steps = optim_cdict["optimizers"][cur_optimizer_name][
+                "accumulate_steps"
+            ]
+        except KeyError:
+            accumulate_steps = 1
+        if accumulate_steps < 1:
+            raise ValueError(
+                f"accumulate_steps ({accumulate_steps}) for {cur_optimizer_name} must be greater than 0"
+            )
+        if accumulate_steps > 1 and distributed:
+            raise ValueError(
+                f"accumulate_steps ({accumulate_steps}) for {cur_optimizer_name} is not currently supported with performance:distribution"
+            )
+        if accumulate_steps > 1:
+            accumulator = GradientAccumulator(
+                cur_variables or model.trainable_variables,
+                accumulate_steps,
+                name=f"{cur_optimizer_name}_accumulator",
+            )
+            opt_to_accumulate_fn[cur_optimizer_name] = get_accumulate_grad_fn(
+                accumulator,
+                trace_counter=trace_counter,
+                name=f"{cur_optimizer_name}:accumulate_grad",
+            )
+        else:
+            accumulator = None
+            opt_to_accumulate_fn[cur_optimizer_name] = None
+        opt_to_accumulator[cur_optimizer_name] = accumulator
+
         loss_objective_names = []
         metrics_objective_names = []
         for cur_objective in cur_optimizer_config["objectives"]:
@@ -258,13 +706,85 @@ def train_model(
         opt_to_loss_objectives[cur_optimizer_name] = loss_objective_names
         opt_to_metrics_objectives[cur_optimizer_name] = metrics_objective_names
 
-    # TODO: training_directive may be empty.
-    # {
-    #     "YEAHML_1": {"optimizers": ["YEAHML_0", "second_opt"], "operation": "&"},
-    #     "YEAHML_0": {"optimizers": ["main_opt", "second_opt"], "operation": ","},
-    # }
-    # TODO: I will need to parse this to create a cleaner directive to follow
-    # training_directive = optim_cdict["directive"]
+        opt_to_ds_to_group[cur_optimizer_name] = get_group_steps(
+            model,
+            cur_optimizer_name,
+            cur_optimizer_config["optimizer"],
+            map_dataset_to_objectives(
+                cur_optimizer_config["objectives"], objectives_dict
+            ),
+            loss_objective_names,
+            metrics_objective_names,
+            objectives_dict,
+            objective_to_output_index,
+            dataset_dict,
+            compiled_step=compiled_step,
+            steps_per_execution=steps_per_execution,
+            accumulator=accumulator,
+            variables=cur_variables,
+            optimizer_conf=cur_optimizer_config,
+            strategy=strategy if distributed else None,
+            trace_counter=trace_counter,
+            jit_compile=opt_to_jit_compile[cur_optimizer_name],
+            logger=logger,
+        )
+        opt_to_validation_fn[cur_optimizer_name] = get_validation_steps(
+            val_model,
+            loss_objective_names,
+            objectives_dict,
+            objective_to_output_index,
+            dataset_dict,
+            split_name="val",
+            strategy=strategy if distributed else None,
+            trace_counter=trace_counter,
+            jit_compile=opt_to_jit_compile[cur_optimizer_name],
+            logger=logger,
+        )
+
+    # when a directive is specified, the optimizers are trained in the order
+    # (sequential/alternate/joint) it describes rather than by the scheduler
+    # e.g. "(main_opt & second_opt), third_opt"
+    try:
+        directive_cdict = optim_cdict["directive"]
+    except KeyError:
+        directive_cdict = None
+    execution_plan = get_execution_plan(directive_cdict, optimizers_dict.keys())
+    if execution_plan:
+        if scheduler_cdict:
+            logger.warning(
+                "optimize:scheduler is only used to select objectives when optimize:directive is specified"
+            )
+        for joint_unit in execution_plan.joint_units():
+            if multi_step:
+                raise ValueError(
+                    f"jointly training {joint_unit} is not currently supported with performance:steps_per_execution or performance:distribution"
+                )
+            for opt_name in joint_unit:
+                if opt_to_accumulator[opt_name]:
+                    raise ValueError(
+                        f"{opt_name} is trained jointly ({joint_unit}) and can not accumulate gradients"
+                    )
+    # the (joint) step fns of a group of optimizers, created when the group is
+    # first trained
+    unit_to_ds_to_group = {}
+
+    # the model, optimizers and step counters are saved on a schedule, and the
+    # params of the validated model are saved when the tracked value improves
+    ckpt_cdict = get_checkpoint_cdict(log_cdict)
+    checkpointer = None
+    if ckpt_cdict or resume:
+        checkpointer = Checkpointer(
+            model,
+            optimizers_dict,
+            save_model_path,
+            save_best_param_path,
+            ckpt_cdict,
+            best_model=val_model,
+            opt_to_accumulator=opt_to_accumulator,
+            opt_to_variables=opt_to_variables,
+            objectives_dict=objectives_dict,
+            logger=logger,
+        )
 
     main_tracker_dict = create_full_dict(
         optimizers_dict=optimizers_dict,
@@ -302,88 +822,282 @@ def train_model(
             # currently there is only one ds per objective
             opt_obj_ds_to_training[opt_name][ln][ds_name] = {"train": True}
 
-    # TODO: this is hardcoded for supervised settings
-    # tf.keras models output the model outputs in a list, we need to get the
-    # of each prediction we care about from that output to use in the loss
-    # function
-    # NOTE: I'm not sure how I feel about this -- is it better to have multiple
-    # "tf.models" that share params (is that even possible) -- or is it better
-    # to do this where it is one "tf.model"?
-    if isinstance(model.output, list):
-        MODEL_OUTPUT_ORDER = [n.name.split("/")[0] for n in model.output]
-        objective_to_output_index = {}
-        for obj_name, obj_dict in objectives_dict.items():
-            try:
-                pred_name = obj_dict["in_config"]["options"]["prediction"]
-                out_index = MODEL_OUTPUT_ORDER.index(pred_name)
-                objective_to_output_index[obj_name] = out_index
-            except KeyError:
-                # TODO: perform check later
-                objective_to_output_index[obj_name] = None
-    else:
-        # TODO: this is hardcoded to assume supervised
-        objective_to_output_index = {}
-        for obj_name, obj_dict in objectives_dict.items():
-            objective_to_output_index[obj_name] = None
-
     list_of_optimizers = list(optimizers_dict.keys())
 
+    # the state of the interrupted run is restored (the train datasets continue
+    # from the position they were saved at)
+    if resume_ckpt_path:
+        restored = checkpointer.restore(resume_ckpt_path, dataset_iter_dict)
+        num_training_ops = restored["num_training_ops"]
+        opt_to_steps = {**opt_to_steps, **restored["opt_to_steps"]}
+        training_state = restored["training_state"]
+        obj_ds_to_epoch = training_state["obj_ds_to_epoch"]
+        opt_obj_ds_to_training = training_state["opt_obj_ds_to_training"]
+        load_tracker_state(main_tracker_dict, training_state["trackers"])
+        if early_stopping and training_state.get("early_stopping", None):
+            early_stopping.state = training_state["early_stopping"]
+        if training_state.get("task", None):
+            load_task_state(
+                training_state["task"],
+                opt_scheduler,
+                unit_to_obj_scheduler,
+                execution_plan,
+                task_rng,
+                scheduler_cdict=scheduler_cdict,
+            )
+        list_of_optimizers = [
+            opt_name
+            for opt_name in list_of_optimizers
+            if get_training_objectives(opt_obj_ds_to_training[opt_name])
+        ]
+        is_training = determine_if_training(opt_obj_ds_to_training)
+        logger.info(
+            f"resumed at num_training_ops: {num_training_ops}, epochs: {obj_ds_to_epoch}"
+        )
+
+    # wall clock time of each phase of the loop, see `PhaseTimer`
+    timer = PhaseTimer()
+
+    # tf.profiler traces of windows of training steps, see `Profiler`
+    try:
+        profile_cdict = log_cdict["profile"]
+    except KeyError:
+        profile_cdict = {}
+    try:
+        profile_start_steps = profile_cdict["start_steps"]
+    except KeyError:
+        profile_start_steps = None
+    profiler = Profiler(
+        model_run_path.joinpath("tf_logs").joinpath("profile"),
+        start_steps=profile_start_steps,
+        num_steps=profile_cdict.get("num_steps", 10),
+        validation=profile_cdict.get("validation", False),
+        logger=logger,
+    )
+    # a window may begin at step 0
+    profiler.update(num_training_ops)
+
     logger.info("START - training")
     while is_training:
-        cur_optimizer_name = select_optimizer(list_of_optimizers)
-        cur_optimizer_config = optimizers_dict[cur_optimizer_name]
-        logger.info(f"optimizer: {cur_optimizer_name}")
+        # NOTE: the state before the task is selected is saved in the
+        # checkpoints of the task, so that a resumed run selects the same task
+        # and continues its (partial) pass
+        task_state = None
+        if checkpointer:
+            task_state = get_task_state(
+                opt_scheduler, unit_to_obj_scheduler, execution_plan, task_rng
+            )
+        if global_hooks.pre_obtain_task:
+            global_hooks.pre_obtain_task()
+        # NOTE: a unit with more than one optimizer is trained jointly (see
+        # `optimize:directive`)
+        if execution_plan:
+            cur_unit = execution_plan.next_unit(list_of_optimizers)
+        else:
+            # NOTE: the validation losses are only gathered if used by the
+            # scheduler
+            opt_to_losses = None
+            if opt_scheduler.uses_losses:
+                opt_to_losses = {
+                    opt_name: get_loss_values(
+                        main_tracker_dict[opt_name],
+                        opt_to_loss_objectives[opt_name],
+                        objectives_dict,
+                    )
+                    for opt_name in list_of_optimizers
+                }
+            cur_unit = (
+                select_optimizer(
+                    list_of_optimizers,
+                    rng=task_rng,
+                    scheduler=opt_scheduler,
+                    name_to_losses=opt_to_losses,
+                ),
+            )
+        logger.info(f"optimizer: {' & '.join(cur_unit)}")
         continue_optimizer = True
         # apply_current_optimizer is used to remain using a single optimizer
 
-        # get optimizer
-        cur_tf_optimizer = cur_optimizer_config["optimizer"]
-
         # loss
         # opt_name :loss :main_obj :ds_name :split_name :loss_name:desc_name
         # opt_name :metric :main_obj: ds_name :split_name :metric_name
-        opt_tracker_dict = main_tracker_dict[cur_optimizer_name]
 
         # NOTE: if there are multiple objectives, they will be trained *jointly*
         # cur_optimizer_config:
         #   {'optimizer': <tf.opt{}>, 'objectives': ['main_obj']}
         # cur_apply_grad_fn = opt_name_to_gradient_fn[cur_optimizer_name]
-        get_grads_fn = opt_to_get_grads_fn[cur_optimizer_name]
-        apply_grads_fn = opt_to_app_grads_fn[cur_optimizer_name]
-
-        # TODO: these should really be grouped by the in config (likely by
-        # creating a hash) this allows us to group objectives by what
-        # dataset their using so that we can reuse the same batch.
-        # NOTE: for now, I'm saving the prediction and gt (if supervised) in
-        # the grad_dict
-        loss_objective_names = opt_to_loss_objectives[cur_optimizer_name]
-        metrics_objective_names = opt_to_metrics_objectives[cur_optimizer_name]
-
-        obj_to_grads = {}
-        # TODO: the losses should be grouped by the ds used so that we only
-        # obtain+run the batch once+ensuring it's the same batch
+        if cur_unit not in unit_to_obj_scheduler:
+            unit_to_obj_scheduler[cur_unit] = get_scheduler(scheduler_cdict)
+        cur_obj_scheduler = unit_to_obj_scheduler[cur_unit]
+
         loss_update_dict, update_metrics_dict = {}, {}
         while continue_optimizer:
-            cur_objective = select_objective(loss_objective_names)
+            opt_to_training_objectives = {
+                opt_name: get_training_objectives(opt_obj_ds_to_training[opt_name])
+                for opt_name in cur_unit
+            }
+            training_objectives = []
+            for opt_name in cur_unit:
+                for obj_name in opt_to_training_objectives[opt_name]:
+                    if obj_name not in training_objectives:
+                        training_objectives.append(obj_name)
+            obj_to_losses = None
+            if cur_obj_scheduler.uses_losses:
+                obj_to_losses = {}
+                for opt_name in cur_unit:
+                    for obj_name in opt_to_training_objectives[opt_name]:
+                        obj_to_losses[obj_name] = get_loss_values(
+                            main_tracker_dict[opt_name], [obj_name], objectives_dict
+                        )
+            cur_objective = select_objective(
+                training_objectives,
+                rng=task_rng,
+                scheduler=cur_obj_scheduler,
+                name_to_losses=obj_to_losses,
+            )
             logger.info(f"objective: {cur_objective}")
             continue_objective = True
+            if global_hooks.post_obtain_task:
+                global_hooks.post_obtain_task()
 
             # TODO: next step -- continue_objective = True
             # each loss may be being optimized by data from different datasets
             cur_ds_name = objectives_dict[cur_objective]["in_config"]["dataset"]
-            loss_conf = objectives_dict[cur_objective]["loss"]
-            tf_train_loss_descs_to_update = get_losses_to_update(loss_conf, "train")
 
+            # all objectives that use the same dataset are trained jointly on
+            # the same batch. If the unit has more than one optimizer, the
+            # optimizers that are still training on the dataset are trained by
+            # a single (joint) step
+            cur_ds_unit = tuple(
+                [
+                    opt_name
+                    for opt_name in cur_unit
+                    if any(
+                        objectives_dict[obj_name]["in_config"]["dataset"] == cur_ds_name
+                        for obj_name in opt_to_training_objectives[opt_name]
+                    )
+                ]
+            )
+            if len(cur_ds_unit) > 1:
+                if cur_ds_unit not in unit_to_ds_to_group:
+                    unit_to_ds_to_group[cur_ds_unit] = get_joint_group_steps(
+                        model,
+                        cur_ds_unit,
+                        optimizers_dict,
+                        opt_to_loss_objectives,
+                        opt_to_metrics_objectives,
+                        objectives_dict,
+                        objective_to_output_index,
+                        dataset_dict,
+                        opt_to_variables=opt_to_variables,
+                        trace_counter=trace_counter,
+                        jit_compile=all(
+                            opt_to_jit_compile[opt_name] for opt_name in cur_ds_unit
+                        ),
+                        logger=logger,
+                    )
+                cur_group = unit_to_ds_to_group[cur_ds_unit][cur_ds_name]
+            else:
+                cur_group = opt_to_ds_to_group[cur_ds_unit[0]][cur_ds_name]
+            cur_objectives = cur_group["objectives"]
+            logger.info(f"objectives sharing {cur_ds_name}: {cur_objectives}")
+            cur_loss_objectives = cur_group["loss_objectives"]
+            cur_metrics_objectives = cur_group["metrics_objectives"]
+            cur_group_optimizers = cur_group["optimizers"]
+            joint_step_fn = cur_group["joint_step_fn"]
+            # the phases are timed per (optimizer(s), objective, dataset)
+            timer_key = (" & ".join(cur_group_optimizers), cur_objective, cur_ds_name)
+
+            # NOTE: the gradients of a joint step are applied within the step
+            # and are not accumulated
+            cur_optimizer_name = cur_group_optimizers[0]
+            apply_grads_fn = opt_to_app_grads_fn[cur_optimizer_name]
+            cur_accumulator = opt_to_accumulator[cur_optimizer_name]
+            cur_accumulate_fn = opt_to_accumulate_fn[cur_optimizer_name]
+
+            # the states that are run within the (fused) step, the hooks of
+            # these states are called before/after the step
+            cb_hooks = cbc.hooks(cur_group_optimizers, cur_objectives, cur_ds_name)
+            if multi_step:
+                step_states = CB_STATE_OPTIONS[CB_STATE_OPTIONS.index("obtain_batch") :]
+            elif joint_step_fn or compiled_step:
+                step_states = ["prediction", "loss", "calc_gradient", "apply_gradient"]
+            else:
+                step_states = ["prediction", "loss", "calc_gradient"]
+            pre_step_hook = cb_hooks.combine("pre", step_states)
+            post_step_hook = cb_hooks.combine("post", step_states)
+
+            if cb_hooks.pre_task:
+                cb_hooks.pre_task()
+            if cb_hooks.pre_obtain_dataset:
+                cb_hooks.pre_obtain_dataset()
             cur_train_iter = get_train_iter(dataset_iter_dict, cur_ds_name, "train")
+            if cb_hooks.post_obtain_dataset:
+                cb_hooks.post_obtain_dataset()
 
+            # NOTE: the task continues until the end of the dataset pass (or
+            # the objective is stopped early)
+            if cb_hooks.pre_dataset_pass:
+                cb_hooks.pre_dataset_pass()
             while continue_objective:
-                cur_batch = get_next_batch(cur_train_iter)
-                if not cur_batch:
+                if multi_step:
+                    # multiple steps are run (and the params updated) within a
+                    # single call. 0 steps indicates the pass is complete
+                    # NOTE: the batches are obtained within the step, so the
+                    # batch hooks wrap the call. Whether a batch was obtained
+                    # is only known after the call, the final (empty) call is
+                    # also wrapped
+                    if cb_hooks.pre_batch:
+                        cb_hooks.pre_batch()
+                    if pre_step_hook:
+                        pre_step_hook()
+                    with profiler.trace_step(num_training_ops + 1), timer.time(
+                        "train_step", *timer_key
+                    ):
+                        multi_step_dict = cur_group["multi_step_fn"](cur_train_iter)
+                    if post_step_hook:
+                        post_step_hook()
+                    cur_num_steps = int(multi_step_dict["steps"])
+                    pass_complete = cur_num_steps == 0
+                    if pass_complete and cb_hooks.post_batch:
+                        cb_hooks.post_batch()
+                else:
+                    if cb_hooks.pre_obtain_batch:
+                        cb_hooks.pre_obtain_batch()
+                    with timer.time("obtain_batch", *timer_key):
+                        cur_batch = get_next_batch(cur_train_iter)
+                    if cb_hooks.post_obtain_batch:
+                        cb_hooks.post_obtain_batch()
+                    pass_complete = not cur_batch
+
+                    # NOTE: the batch hooks are called once a batch is
+                    # obtained (the end of the dataset is not a batch)
+                    if cb_hooks.pre_batch and not pass_complete:
+                        cb_hooks.pre_batch()
+
+                if pass_complete:
+
+                    # apply any gradients remaining from a partial accumulation
+                    # so that the end of the dataset is not dropped
+                    if cur_accumulator:
+                        if int(cur_accumulator.num_accumulated) > 0:
+                            if cb_hooks.pre_apply_gradient:
+                                cb_hooks.pre_apply_gradient()
+                            with timer.time("apply_gradient", *timer_key):
+                                update_model_params_from_accumulator(
+                                    apply_grads_fn,
+                                    cur_accumulator,
+                                    model,
+                                    opt_to_variables[cur_optimizer_name],
+                                )
+                            if cb_hooks.post_apply_gradient:
+                                cb_hooks.post_apply_gradient()
 
                     # dataset pass is complete
-                    obj_ds_to_epoch = update_epoch_dict(
-                        obj_ds_to_epoch, cur_objective, cur_ds_name, "train"
-                    )
+                    for obj_name in cur_loss_objectives:
+                        obj_ds_to_epoch = update_epoch_dict(
+                            obj_ds_to_epoch, obj_name, cur_ds_name, "train"
+                        )
 
                     if (
                         obj_ds_to_epoch[cur_objective][cur_ds_name]["train"]
@@ -393,9 +1107,13 @@ def train_model(
                         # update this particular combination to false -
                         # eventually this logic will be "smarter" i.e. not
                         # based entirely on number of epochs.
-                        opt_obj_ds_to_training[cur_optimizer_name][cur_objective][
-                            cur_ds_name
-                        ]["train"] = False
+                        for opt_name in cur_group_optimizers:
+                            for obj_name in cur_group["opt_to_loss_objectives"][
+                                opt_name
+                            ]:
+                                opt_obj_ds_to_training[opt_name][obj_name][cur_ds_name][
+                                    "train"
+                                ] = False
 
                         # this objective is done. see if they're all done
                         is_training = determine_if_training(opt_obj_ds_to_training)
@@ -404,10 +1122,14 @@ def train_model(
                         # ideally, we would decided (in an intelligent way) when
                         # we're done training a group of objectives by
                         # evaluating the loss curves
-                        list_of_optimizers.remove(cur_optimizer_name)
-                        logger.info(
-                            f"{cur_optimizer_name} removed from list of opt. remaining: {list_of_optimizers}"
-                        )
+                        for opt_name in cur_group_optimizers:
+                            if not get_training_objectives(
+                                opt_obj_ds_to_training[opt_name]
+                            ) and (opt_name in list_of_optimizers):
+                                list_of_optimizers.remove(opt_name)
+                                logger.info(
+                                    f"{opt_name} removed from list of opt. remaining: {list_of_optimizers}"
+                                )
                         logger.info(f"is_training: {is_training}")
                         # TODO: determine whether to move to the next objective
                         # NOTE: currently, move to the next objective
@@ -432,140 +1154,333 @@ def train_model(
                     )
 
                     # perform validation after each pass through the training
-                    # dataset
-                    # NOTE: the location of this 'validation' may change
+                    # dataset (unless validating on a step frequency)
                     # TODO: there is an error here where the first objective
                     # will be validated on the last epoch and then one more
                     # time.
-                    # TODO: ensure the metrics are reset
-                    #  iterate validation after iterating entire training..
-                    # this will/should change to update on a set frequency --
-                    # also, maybe we don't want to run the "full" validation,
-                    # only a (random) subset?
-
-                    # validation pass
-                    cur_val_update = inference_dataset(
-                        model,
-                        loss_objective_names,
-                        metrics_objective_names,
-                        dataset_iter_dict,
-                        opt_to_validation_fn[cur_optimizer_name],
-                        opt_tracker_dict,
-                        cur_objective,
-                        cur_ds_name,
-                        dataset_dict,
-                        opt_to_steps[cur_optimizer_name],
-                        num_training_ops,
-                        objective_to_output_index,
-                        objectives_dict,
-                        v_writer,
-                        logger,
-                        split_name="val",
-                    )
-
-                    # log params used during validation in other location
-                    log_model_params(v_writer, num_training_ops, model)
+                    run_val = not val_every_n_steps
 
                     # TODO: has run entire ds -- for now, time to break out of
                     # this ds eventually, something smarter will need to be done
                     # here in the training loop, not just after an epoch
                     continue_objective = False
 
-                else:
-
-                    grad_dict = get_grads_fn(
-                        model,
-                        cur_batch,
-                        loss_conf["object"],
-                        objective_to_output_index[cur_objective],
-                        tf_train_loss_descs_to_update,
+                elif multi_step:
+                    prev_training_ops = num_training_ops
+                    # the batches are shared by all objectives in the group
+                    opt_to_steps[cur_optimizer_name] += int(
+                        multi_step_dict["instances"]
                     )
+                    num_training_ops += cur_num_steps
+
+                    # the metrics were updated within the steps
+                    obj_to_grads = None
+
+                else:
+                    prev_training_ops = num_training_ops
+
+                    # NOTE: the prediction, loss and gradients are calculated
+                    # by a single (fused) step and are timed together
+                    if joint_step_fn:
+                        # the params are updated (by every optimizer in the
+                        # group) within the step
+                        step_phase, step_fn = "train_step", joint_step_fn
+                    elif compiled_step:
+                        # the params are updated within the step
+                        step_phase = "train_step"
+                        step_fn = cur_group["train_step_fn"]
+                    else:
+                        step_phase = "calc_gradient"
+                        step_fn = cur_group["get_grads_fn"]
+                    if pre_step_hook:
+                        pre_step_hook()
+                    with profiler.trace_step(num_training_ops + 1), timer.time(
+                        step_phase, *timer_key
+                    ):
+                        grad_dict = step_fn(cur_batch)
+                    if post_step_hook:
+                        post_step_hook()
                     # grad_dict contains {
                     #     "gradients": grads,
-                    #     "predictions": prediction,
+                    #     "predictions": [prediction_per_objective],
                     #     "final_loss": final_loss,
-                    #     "losses": loss,
+                    #     "losses": [loss_per_objective],
+                    #     "y_batch": y_batch,
                     # }
 
-                    # TODO: see note above about ensuring the same batch is used for
-                    # losses with the same dataset specified
-                    opt_to_steps[cur_optimizer_name] += cur_batch[0].shape[0]
+                    # the batch is shared by all objectives in the group
+                    for opt_name in cur_group_optimizers:
+                        opt_to_steps[opt_name] += cur_batch[0].shape[0]
                     num_training_ops += 1
-                    # if num_training_ops > 5:
-                    #     start_profiler(profile_path, profiling)
-                    # elif num_training_ops > 10:
-                    #     stop_profiler()
-
-                    # TODO: currently this only stores the last grad dict per objective
-                    obj_to_grads[cur_objective] = grad_dict
-
-                    # NOTE: the steps here aren't accurate (due to note above about)
-                    # using the same batches for objectives/losses that specify the
-                    # same datasets
-                    # update_tf_loss_descriptions(
-                    #     grad_dict, tf_train_loss_descs_to_update
-                    # )
-                    # # TODO: add to tensorboard
-
-                    # create histograms of model parameters
-                    if log_cdict["track"]["tensorboard"]["param_steps"] > 0:
-                        if (
-                            num_training_ops
-                            % log_cdict["track"]["tensorboard"]["param_steps"]
-                            == 0
-                        ):
-                            log_model_params(tr_writer, num_training_ops, model)
 
-                    # update Tracker
-                    if log_cdict["track"]["tracker_steps"] > 0:
-                        if num_training_ops % log_cdict["track"]["tracker_steps"] == 0:
-                            cur_loss_tracker_dict = opt_tracker_dict[cur_objective][
-                                "loss"
-                            ][cur_ds_name]["train"]
-                            cur_loss_update = update_loss_trackers(
-                                loss_conf["track"]["train"],
-                                cur_loss_tracker_dict,
-                                opt_to_steps[cur_optimizer_name],
-                                num_training_ops,
-                                tb_writer=tr_writer,
-                                ds_name=cur_ds_name,
-                                objective_name=cur_objective,
-                            )
-
-                            loss_update_dict[cur_objective] = cur_loss_update
-
-                    # TODO: this is a hacky way of seeing if training on a batch was run
-                    if obj_to_grads:
-                        update_model_params(
-                            apply_grads_fn, obj_to_grads, model, cur_tf_optimizer
-                        )
+                    obj_to_grads = {}
+                    for i, obj_name in enumerate(cur_objectives):
+                        obj_to_grads[obj_name] = {
+                            "predictions": grad_dict["predictions"][i],
+                            "y_batch": grad_dict["y_batch"],
+                        }
+
+                    # a single (fused) gradient is calculated for the group
+                    if not compiled_step and not joint_step_fn:
+                        with timer.time("apply_gradient", *timer_key):
+                            if cur_accumulate_fn:
+                                # NOTE: the gradients are only applied once
+                                # every `accumulate_steps` micro-batches
+                                if cur_accumulate_fn(grad_dict["gradients"]):
+                                    if cb_hooks.pre_apply_gradient:
+                                        cb_hooks.pre_apply_gradient()
+                                    update_model_params_from_accumulator(
+                                        apply_grads_fn,
+                                        cur_accumulator,
+                                        model,
+                                        opt_to_variables[cur_optimizer_name],
+                                    )
+                                    if cb_hooks.post_apply_gradient:
+                                        cb_hooks.post_apply_gradient()
+                            else:
+                                if cb_hooks.pre_apply_gradient:
+                                    cb_hooks.pre_apply_gradient()
+                                update_model_params(
+                                    apply_grads_fn,
+                                    grad_dict["gradients"],
+                                    model,
+                                    opt_to_variables[cur_optimizer_name],
+                                )
+                                if cb_hooks.post_apply_gradient:
+                                    cb_hooks.post_apply_gradient()
 
+                    if cb_hooks.pre_metric:
+                        cb_hooks.pre_metric()
+                    with timer.time("metric", *timer_key):
                         update_metric_objects(
-                            metrics_objective_names,
+                            cur_metrics_objectives,
                             objectives_dict,
                             obj_to_grads,
                             "train",
                         )
+                    if cb_hooks.post_metric:
+                        cb_hooks.post_metric()
+
+                if not pass_complete:
+                    # start/stop the profile windows
+                    profiler.update(num_training_ops)
 
-                        if log_cdict["track"]["tracker_steps"] > 0:
-                            if (
-                                num_training_ops % log_cdict["track"]["tracker_steps"]
-                                == 0
-                            ):
-                                update_metrics_dict = update_metrics_tracking(
-                                    metrics_objective_names,
-                                    objectives_dict,
-                                    opt_tracker_dict,
-                                    obj_to_grads,
-                                    opt_to_steps[cur_optimizer_name],
+                    # create histograms of model parameters
+                    if crossed_interval(
+                        prev_training_ops,
+                        num_training_ops,
+                        log_cdict["track"]["tensorboard"]["param_steps"],
+                    ):
+                        if param_summarizer:
+                            with timer.time("tensorboard", *timer_key):
+                                param_summarizer(tr_writer, num_training_ops)
+
+                    run_val = bool(val_every_n_steps) and crossed_interval(
+                        prev_training_ops, num_training_ops, val_every_n_steps
+                    )
+
+                    # update Tracker
+                    if crossed_interval(
+                        prev_training_ops,
+                        num_training_ops,
+                        log_cdict["track"]["tracker_steps"],
+                    ):
+                        # the losses and metrics of the group are read (and
+                        # reset) in a single call, see `DeferredReadback`
+                        for opt_name in cur_group_optimizers:
+                            opt_tracker_dict = main_tracker_dict[opt_name]
+                            for obj_name in cur_group["opt_to_loss_objectives"][
+                                opt_name
+                            ]:
+                                cur_loss_conf = objectives_dict[obj_name]["loss"][
+                                    "track"
+                                ]["train"]
+                                add_loss_trackers(
+                                    train_readback,
+                                    cur_loss_conf,
+                                    opt_tracker_dict[obj_name]["loss"][cur_ds_name][
+                                        "train"
+                                    ],
+                                    opt_to_steps[opt_name],
                                     num_training_ops,
+                                    tb_writer=tr_writer,
+                                    ds_name=cur_ds_name,
+                                    objective_name=obj_name,
+                                    path=("loss", obj_name),
+                                )
+                                loss_update_dict[obj_name] = {
+                                    loss_name: {} for loss_name in cur_loss_conf
+                                }
+
+                            for obj_name in cur_group["opt_to_metrics_objectives"][
+                                opt_name
+                            ]:
+                                cur_metrics_conf = objectives_dict[obj_name]["metrics"]
+                                add_metrics_trackers(
+                                    train_readback,
+                                    cur_metrics_conf,
+                                    opt_tracker_dict[obj_name]["metrics"][cur_ds_name][
+                                        "train"
+                                    ],
                                     "train",
+                                    opt_to_steps[opt_name],
+                                    num_training_ops,
                                     tb_writer=tr_writer,
                                     ds_name=cur_ds_name,
-                                    objective_name=cur_objective,
+                                    objective_name=obj_name,
+                                    path=("metrics", obj_name),
                                 )
+                                update_metrics_dict[obj_name] = {
+                                    metric_name: {} for metric_name in cur_metrics_conf
+                                }
+
+                        readback_update = train_readback.flush(
+                            timer=timer, timer_key=timer_key
+                        )
+                        for obj_name, obj_update in readback_update.get(
+                            "loss", {}
+                        ).items():
+                            loss_update_dict[obj_name].update(obj_update)
+                        for obj_name, obj_update in readback_update.get(
+                            "metrics", {}
+                        ).items():
+                            update_metrics_dict[obj_name].update(obj_update)
+
+                    # NOTE: saved after the trackers are updated so that the
+                    # saved trackers and (train) metric objects are consistent
+                    if checkpointer:
+                        if checkpointer.should_save(
+                            prev_training_ops, num_training_ops
+                        ):
+                            with timer.time("checkpoint", *timer_key):
+                                checkpointer.save(
+                                    num_training_ops,
+                                    opt_to_steps,
+                                    training_state=get_training_state(
+                                        obj_ds_to_epoch,
+                                        opt_obj_ds_to_training,
+                                        main_tracker_dict,
+                                        early_stopping=early_stopping,
+                                        task_state=task_state,
+                                    ),
+                                    dataset_iter_dict=dataset_iter_dict,
+                                )
+
+                    if cb_hooks.post_batch:
+                        cb_hooks.post_batch()
+
+                if run_val:
+                    # validation pass (for each optimizer in the group)
+                    for opt_name in cur_group_optimizers:
+                        val_inference_kwargs = {
+                            "loss_objective_names": opt_to_loss_objectives[opt_name],
+                            "metrics_objective_names": opt_to_metrics_objectives[
+                                opt_name
+                            ],
+                            "dataset_iter_dict": dataset_iter_dict,
+                            "opt_tracker_dict": main_tracker_dict[opt_name],
+                            "cur_objective": cur_objective,
+                            "cur_ds_name": cur_ds_name,
+                            "dataset_dict": dataset_dict,
+                            "objective_to_output_index": objective_to_output_index,
+                            "objectives_dict": objectives_dict,
+                            "logger": logger,
+                            "split_name": "val",
+                            "readback": val_readback,
+                        }
+                        # NOTE: when async, only the time the loop is blocked
+                        # (copying the weights, waiting on the previous pass)
+                        # is recorded
+                        with timer.time(
+                            "validation", opt_name, cur_objective, cur_ds_name
+                        ):
+                            if async_validator:
+                                # the weights are copied (and the step counts
+                                # captured) now, the trackers are updated when the
+                                # pass is collected (once it is complete, see
+                                # `poll`). the previous pass is collected first
+                                prev_val_result = async_validator.wait()
+                                if prev_val_result:
+                                    finish_validation(
+                                        prev_val_result,
+                                        checkpointer=checkpointer,
+                                        early_stopping=early_stopping,
+                                        profiler=profiler,
+                                    )
+                                async_validator.submit(
+                                    run_validation,
+                                    opt_to_validation_fn[opt_name],
+                                    opt_to_steps[opt_name],
+                                    num_training_ops,
+                                    v_writer,
+                                    val_inference_kwargs,
+                                    optimizer_name=opt_name,
+                                    param_summarizer=val_param_summarizer,
+                                    profiling=profiler.start_validation(),
+                                )
+                            else:
+                                cur_val_update = finish_validation(
+                                    run_validation(
+                                        model,
+                                        opt_to_validation_fn[opt_name],
+                                        opt_to_steps[opt_name],
+                                        num_training_ops,
+                                        v_writer,
+                                        val_inference_kwargs,
+                                        optimizer_name=opt_name,
+                                        param_summarizer=val_param_summarizer,
+                                        profiling=profiler.start_validation(),
+                                    ),
+                                    checkpointer=checkpointer,
+                                    early_stopping=early_stopping,
+                                    profiler=profiler,
+                                )
+
+                # a completed async validation pass is applied (on this thread)
+                if async_validator:
+                    val_result = async_validator.poll()
+                    if val_result:
+                        finish_validation(
+                            val_result,
+                            checkpointer=checkpointer,
+                            early_stopping=early_stopping,
+                            profiler=profiler,
+                        )
+
+                # objectives that have stopped improving are no longer trained
+                if early_stopping:
+                    stopped = early_stopping.pop_stopped()
+                    if stopped:
+                        logger.info(f"early stopping (optimizer, objective): {stopped}")
+                        opt_obj_ds_to_training = stop_objectives(
+                            opt_obj_ds_to_training, stopped
+                        )
+                        list_of_optimizers = [
+                            opt_name
+                            for opt_name in list_of_optimizers
+                            if get_training_objectives(opt_obj_ds_to_training[opt_name])
+                        ]
+                        is_training = determine_if_training(opt_obj_ds_to_training)
+                        logger.info(
+                            f"remaining optimizers: {list_of_optimizers}, is_training: {is_training}"
+                        )
+                        # NOTE: the other objectives that share the dataset are
+                        # trained (with the stopped objective) in the same step
+                        if not any(
+                            cur_objective
+                            in get_training_objectives(opt_obj_ds_to_training[opt_name])
+                            for opt_name in cur_group_optimizers
+                        ):
+                            continue_objective = False
 
                 update_dict = {"loss": loss_update_dict, "metrics": update_metrics_dict}
+
+            # NOTE: called on every exit from the pass (the end of the dataset
+            # or the objective stopped early)
+            if cb_hooks.post_dataset_pass:
+                cb_hooks.post_dataset_pass()
+            if cb_hooks.post_task:
+                cb_hooks.post_task()
             continue_optimizer = False
         # one pass of training (a batch from each objective) with the
         # current optimizer
@@ -573,7 +1488,61 @@ def train_model(
     # TODO: I think the 'joint' should likely be the optimizer name, not the
     # combination of losses name, this would also simplify the creation of these
 
-    return_dict = {"tracker": main_tracker_dict}
+    # wait for any remaining validation pass before the trackers are returned
+    if async_validator:
+        val_result = async_validator.close()
+        if val_result:
+            finish_validation(
+                val_result,
+                checkpointer=checkpointer,
+                early_stopping=early_stopping,
+                profiler=profiler,
+            )
+    if param_summarizer:
+        param_summarizer.close()
+    if val_param_summarizer and val_param_summarizer is not param_summarizer:
+        val_param_summarizer.close()
+    profiler.close()
+
+    if checkpointer:
+        checkpointer.save(
+            num_training_ops,
+            opt_to_steps,
+            training_state=get_training_state(
+                obj_ds_to_epoch,
+                opt_obj_ds_to_training,
+                main_tracker_dict,
+                early_stopping=early_stopping,
+                task_state=get_task_state(
+                    opt_scheduler, unit_to_obj_scheduler, execution_plan, task_rng
+                ),
+            ),
+            dataset_iter_dict=dataset_iter_dict,
+        )
+        checkpointer.close()
+
+    # the time spent in each phase of the loop (e.g. waiting on the input
+    # pipeline) is written to the run dir as timings.json and timings.csv
+    timer.stop()
+    timing_report = timer.report()
+    timer.write_report(model_run_path, timing_report)
+    input_stall = timing_report["input_stall"]
+    if input_stall["time"] is not None:
+        logger.info(
+            f"input stall: {input_stall['time']:.4f}s"
+            f" ({input_stall['fraction']:.2%} of {timing_report['total_time']:.4f}s)"
+        )
+
+    logger.info(f"step fn traces: {trace_counter()}")
+
+    return_dict = {
+        "tracker": main_tracker_dict,
+        "traces": trace_counter(),
+        "timings": timing_report,
+    }
+
+    if not chief:
+        remove_worker_run_path(model_run_path)
 
     return return_dict
 
@@ -589,7 +1558,6 @@ def train_model(
 
     # TODO: save best params with update dict and save params
     # accordingly
-    # TODO: use early_stopping:epochs and early_stopping:warmup
     # if cur_val_loss_ < best_val_loss:
     #     if e == 0:
     #         # on the first time params are saved, try to save the model
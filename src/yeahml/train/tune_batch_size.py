@@ -0,0 +1,323 @@
+import copy
+import os
+import resource
+import sys
+import threading
+import time
+from typing import Any, Dict
+
+import tensorflow as tf
+
+from yeahml.build.components.distribution import is_distributed
+from yeahml.build.components.precision import get_precision_policy_name
+from yeahml.train.gradients.trace import jit_compile_available
+from yeahml.train.setup.datasets import get_datasets
+from yeahml.train.setup.loop_dynamics import (
+    get_optimizer_variables,
+    get_optimizers,
+    map_dataset_to_objectives,
+)
+from yeahml.train.setup.objectives import (
+    get_objective_to_output_index,
+    get_objectives,
+)
+from yeahml.train.setup.steps import get_group_steps
+
+
+def _get_memory_device():
+    # the (first) gpu, if available. The peak memory of the device is then
+    # used rather than the peak rss of the process
+    gpus = tf.config.list_logical_devices("GPU")
+    if gpus:
+        return gpus[0].name.replace("/device:", "")
+    return None
+
+
+def _get_rss():
+    # the current rss of the process in bytes, None if not available (e.g. on
+    # macos, where there is no /proc)
+    try:
+        with open("/proc/self/statm", "r") as fp:
+            return int(fp.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _get_max_rss():
+    # the peak rss of the process (over its lifetime) in bytes
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on macos
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MemorySampler:
+    """the memory in use during a trial, of the gpu (if available) or the rss
+    of the process, which is sampled on a background thread every `interval`
+    seconds
+
+    `stop` returns (peak, increase) in bytes, where peak is the most memory
+    in use during the trial (including e.g. the model and anything loaded
+    before the trial) and increase is the peak less the memory in use when
+    the trial started
+
+    NOTE: if the current rss can't be read, the peak rss of the process is
+    used, the peak is then that of all trials so far (which, as the batch size
+    increases, is usually that of the current trial)
+    """
+
+    def __init__(self, device_name=None, interval=0.005):
+        self.device_name = device_name
+        self.interval = interval
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._start_memory, self._peak = None, None
+
+    def _sample(self):
+        while not self._stop_event.wait(self.interval):
+            self._peak = max(self._peak, _get_rss())
+
+    def start(self):
+        if self.device_name:
+            tf.config.experimental.reset_memory_stats(self.device_name)
+            self._start_memory = tf.config.experimental.get_memory_info(
+                self.device_name
+            )["current"]
+            return
+        self._start_memory = _get_rss()
+        if self._start_memory is None:
+            self._start_memory = _get_max_rss()
+            return
+        self._peak = self._start_memory
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self.device_name:
+            peak = tf.config.experimental.get_memory_info(self.device_name)["peak"]
+        elif self._thread:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+            peak = max(self._peak, _get_rss())
+        else:
+            peak = _get_max_rss()
+        return peak, max(peak - self._start_memory, 0)
+
+
+def _run_trial(model, config_dict, datasets, batch_size, num_steps, warmup_steps):
+    # time `num_steps` steps of the compiled train step of each optimizer (on
+    # each of its datasets) at the batch size. The step fns are created for the
+    # trial (the input signature includes the batch size). None if a train
+    # dataset is smaller than the batch size
+    hp_cdict = copy.deepcopy(config_dict["hyper_parameters"])
+    if not hp_cdict.get("dataset", None):
+        hp_cdict["dataset"] = {}
+    hp_cdict["dataset"]["batch"] = batch_size
+    # the trials are timed on full (static) batches only
+    hp_cdict["dataset"]["remainder"] = "drop"
+    perf_cdict = config_dict["performance"]
+    optim_cdict = config_dict["optimize"]
+
+    dataset_dict = get_datasets(datasets, config_dict["data"], hp_cdict)
+    optimizers_dict = get_optimizers(optim_cdict, get_precision_policy_name(perf_cdict))
+    objectives_dict = get_objectives(
+        perf_cdict["objectives"], dataset_dict, target_splits=["train"]
+    )
+    objective_to_output_index = get_objective_to_output_index(model, objectives_dict)
+
+    try:
+        jit_compile = perf_cdict["jit_compile"]
+    except KeyError:
+        jit_compile = False
+    jit_compile = jit_compile and jit_compile_available()
+
+    num_instances, seconds = 0, 0.0
+    for opt_name, opt_conf in optimizers_dict.items():
+        try:
+            layer_names = optim_cdict["optimizers"][opt_name]["layers"]
+        except KeyError:
+            layer_names = None
+        loss_objective_names, metrics_objective_names = [], []
+        for obj_name in opt_conf["objectives"]:
+            if objectives_dict[obj_name].get("loss", None):
+                loss_objective_names.append(obj_name)
+            if objectives_dict[obj_name].get("metrics", None):
+                metrics_objective_names.append(obj_name)
+        ds_to_group = get_group_steps(
+            model,
+            opt_name,
+            opt_conf["optimizer"],
+            map_dataset_to_objectives(opt_conf["objectives"], objectives_dict),
+            loss_objective_names,
+            metrics_objective_names,
+            objectives_dict,
+            objective_to_output_index,
+            dataset_dict,
+            compiled_step=True,
+            variables=get_optimizer_variables(model, layer_names),
+            optimizer_conf=opt_conf,
+            jit_compile=jit_compile,
+        )
+        for ds_name, group in ds_to_group.items():
+            train_ds = dataset_dict[ds_name]["train"]
+            # NOTE: a dataset smaller than the batch size has no (full) batches
+            if not list(train_ds.take(1)):
+                return None
+            train_iter = iter(train_ds.repeat())
+            step_fn = group["train_step_fn"]
+
+            # the first step(s) include the trace (and compilation)
+            for _ in range(warmup_steps):
+                out = step_fn(next(train_iter))
+            out["final_loss"].numpy()
+
+            start = time.perf_counter()
+            for _ in range(num_steps):
+                out = step_fn(next(train_iter))
+            # wait for the (async) steps to complete
+            out["final_loss"].numpy()
+            seconds += time.perf_counter() - start
+            num_instances += num_steps * batch_size
+
+    return num_instances, seconds
+
+
+def tune_batch_size(
+    model: Any,
+    config_dict: Dict[str, Dict[str, Any]],
+    datasets: dict = None,
+    start_batch: int = None,
+    max_batch: int = 4096,
+    growth: int = 2,
+    num_steps: int = 10,
+    warmup_steps: int = 2,
+    memory_budget: int = None,
+    min_improvement: float = 0.05,
+    patience: int = 1,
+) -> Dict[str, Any]:
+    """run short, timed trials of the compiled train step at increasing batch
+    sizes (`start_batch` * `growth` ** n, up to `max_batch`) and write the
+    batch size with the highest throughput (instances/sec) to
+    `hyper_parameters:dataset:batch` of the config_dict
+
+    the trials stop once the peak memory in use during a trial (of the gpu if
+    available, otherwise the rss of the process, see `MemorySampler`) exceeds
+    `memory_budget` (in bytes), the device runs out of memory, the dataset is
+    smaller than the batch size, or the throughput has not improved by
+    `min_improvement` (e.g. 5%) over the best for `patience` trials. A trial
+    that exceeds the memory budget is not selected
+
+    NOTE: `memory_budget` is a ceiling on the memory in use, which includes
+    the model and anything loaded before the trials. The memory used by the
+    trial itself (the increase over the start of the trial) is recorded as
+    "trial_memory"
+
+    NOTE: the model is trained by the trials, the weights are restored after.
+    the optimizers are created (from the config) for each trial
+
+    e.g.
+        tune_dict = yml.tune_batch_size(model, config_dict, datasets=ds_dict)
+        # config_dict["hyper_parameters"]["dataset"]["batch"] is now set
+        train_dict = yml.train_model(model, config_dict, datasets=ds_dict)
+
+    returns
+        {
+            "batch": 128,
+            "trials": [
+                {
+                    "batch": 16,
+                    "instances_per_sec": 5012.3,
+                    "peak_memory": 301989888,
+                    "trial_memory": 4194304,
+                },
+                ...
+            ],
+        }
+    """
+    if is_distributed(model.distribute_strategy):
+        raise ValueError(
+            "tune_batch_size is not currently supported with performance:distribution"
+        )
+    if growth < 2:
+        raise ValueError(f"growth ({growth}) must be greater than 1")
+    if num_steps < 1:
+        raise ValueError(f"num_steps ({num_steps}) must be greater than 0")
+    if warmup_steps < 1:
+        raise ValueError(f"warmup_steps ({warmup_steps}) must be greater than 0")
+
+    hp_cdict = config_dict["hyper_parameters"]
+    if not start_batch:
+        try:
+            start_batch = hp_cdict["dataset"]["batch"]
+        except (KeyError, TypeError):
+            start_batch = 1
+    if start_batch > max_batch:
+        raise ValueError(
+            f"start_batch ({start_batch}) must not be greater than max_batch ({max_batch})"
+        )
+
+    memory_sampler = MemorySampler(_get_memory_device())
+    initial_weights = model.get_weights()
+
+    trials = []
+    best = None
+    num_plateau = 0
+    batch_size = start_batch
+    try:
+        while batch_size <= max_batch:
+            trial = {"batch": batch_size}
+            memory_sampler.start()
+            try:
+                trial_result = _run_trial(
+                    model, config_dict, datasets, batch_size, num_steps, warmup_steps
+                )
+            except tf.errors.ResourceExhaustedError:
+                trial["stopped"] = "out of memory"
+                trials.append(trial)
+                break
+            finally:
+                peak_memory, trial_memory = memory_sampler.stop()
+            if not trial_result:
+                trial["stopped"] = "dataset smaller than the batch size"
+                trials.append(trial)
+                break
+            num_instances, seconds = trial_result
+
+            trial["instances_per_sec"] = num_instances / seconds if seconds else 0.0
+            trial["peak_memory"] = peak_memory
+            trial["trial_memory"] = trial_memory
+            trials.append(trial)
+
+            if memory_budget and trial["peak_memory"] > memory_budget:
+                trial["stopped"] = "memory budget"
+                break
+
+            if not best or trial["instances_per_sec"] > best["instances_per_sec"] * (
+                1 + min_improvement
+            ):
+                best = trial
+                num_plateau = 0
+            else:
+                if trial["instances_per_sec"] > best["instances_per_sec"]:
+                    # a (small) improvement, but the throughput has plateaued
+                    best = trial
+                num_plateau += 1
+                if num_plateau >= patience:
+                    trial["stopped"] = "plateau"
+                    break
+
+            batch_size *= growth
+    finally:
+        model.set_weights(initial_weights)
+
+    if not best:
+        raise ValueError(
+            f"no batch size (from {start_batch}) could be run within the limits, trials: {trials}"
+        )
+
+    if not hp_cdict.get("dataset", None):
+        hp_cdict["dataset"] = {}
+    hp_cdict["dataset"]["batch"] = best["batch"]
+
+    return {"batch": best["batch"], "trials": trials}
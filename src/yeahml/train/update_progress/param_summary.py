@@ -0,0 +1,157 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import tensorflow as tf
+from tensorboard.plugins.histogram import metadata as histogram_metadata
+
+from yeahml.train.gradients.trace import create_tf_function
+
+DEFAULT_BUCKETS = 30
+
+
+def _histogram(data, buckets):
+    # [buckets, 3] tensor of (left edge, right edge, count), the format of the
+    # tensorboard histogram plugin
+    data = tf.cast(tf.reshape(data, [-1]), tf.float64)
+    min_ = tf.reduce_min(data)
+    max_ = tf.reduce_max(data)
+    # all values are the same, use a bucket width of 1 around the value
+    singular = tf.equal(max_, min_)
+    lo = tf.where(singular, min_ - 0.5, min_)
+    hi = tf.where(singular, max_ + 0.5, max_)
+    counts = tf.histogram_fixed_width(data, tf.stack([lo, hi]), nbins=buckets)
+    edges = tf.linspace(lo, hi, buckets + 1)
+    return tf.stack([edges[:-1], edges[1:], tf.cast(counts, tf.float64)], axis=1)
+
+
+class ParamSummarizer:
+    """histograms of the model variables for tensorboard. The histograms are
+    computed in-graph (on a random sample of `sample_size` values of each
+    variable, if set) and only the buckets are copied to the host, where they
+    are written by a background thread so that training is not blocked
+
+    at most `max_variables` variables are logged per call, the variables are
+    rotated through so that each is logged every
+    ceil(num_variables / max_variables) calls
+
+    e.g.
+        logging:track:tensorboard:
+            param_steps: 100
+            param_sample_size: 10000
+            param_max_variables: 20
+    """
+
+    def __init__(
+        self,
+        model,
+        sample_size=None,
+        max_variables=None,
+        buckets=DEFAULT_BUCKETS,
+        seed=0,
+        logger=None,
+    ):
+        if sample_size is not None and sample_size < 0:
+            raise ValueError(f"sample_size ({sample_size}) must not be negative")
+        if max_variables is not None and max_variables < 0:
+            raise ValueError(f"max_variables ({max_variables}) must not be negative")
+        self.sample_size = sample_size
+        self.buckets = buckets
+        self.seed = seed
+        self.logger = logger
+        self.metadata = histogram_metadata.create_summary_metadata(
+            display_name=None, description=None
+        )
+
+        # only numeric variables with values are summarized
+        variables = [
+            v
+            for v in model.variables
+            if (v.dtype.is_floating or v.dtype.is_integer)
+            and v.shape.num_elements() != 0
+        ]
+        if not max_variables:
+            max_variables = max(len(variables), 1)
+        self.chunks = [
+            variables[i : i + max_variables]
+            for i in range(0, len(variables), max_variables)
+        ]
+        # the fn for each chunk is created (and traced) on first use
+        self._chunk_fns = [None] * len(self.chunks)
+        self.num_calls = 0
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="yeahml_param_summary"
+        )
+        self._futures = []
+
+    def _create_chunk_fn(self, chunk_ind):
+        variables = self.chunks[chunk_ind]
+        names = [v.name.split(":")[0] for v in variables]
+
+        def summarize(step):
+            hists = {}
+            for i, (name, v) in enumerate(zip(names, variables)):
+                flat = tf.reshape(v, [-1])
+                num_elements = v.shape.num_elements()
+                if self.sample_size and (
+                    num_elements is None or num_elements > self.sample_size
+                ):
+                    # NOTE: stateless, the rng state of training is not used
+                    inds = tf.random.stateless_uniform(
+                        [self.sample_size],
+                        seed=tf.stack(
+                            [tf.constant(self.seed + i, dtype=tf.int64), step]
+                        ),
+                        minval=0,
+                        maxval=tf.size(flat, out_type=tf.int64),
+                        dtype=tf.int64,
+                    )
+                    flat = tf.gather(flat, inds)
+                hists[name] = _histogram(flat, self.buckets)
+            return hists
+
+        return create_tf_function(
+            summarize,
+            f"param_summary_{chunk_ind}",
+            input_signature=[tf.TensorSpec([], tf.int64)],
+        )
+
+    def _write(self, writer, step, hists):
+        with writer.as_default():
+            for name, hist in hists.items():
+                tf.summary.write(name, hist, step=step, metadata=self.metadata)
+
+    def __call__(self, writer, step):
+        if not self.chunks:
+            return
+        chunk_ind = self.num_calls % len(self.chunks)
+        self.num_calls += 1
+        if not self._chunk_fns[chunk_ind]:
+            self._chunk_fns[chunk_ind] = self._create_chunk_fn(chunk_ind)
+
+        step = int(step)
+        hists = self._chunk_fns[chunk_ind](tf.constant(step, dtype=tf.int64))
+
+        # NOTE: the buckets are read (copied to the host) by the writer thread
+        pending = []
+        for future in self._futures:
+            if future.done():
+                # raise any exception from the writer thread
+                future.result()
+            else:
+                pending.append(future)
+        self._futures = pending
+        self._futures.append(self._executor.submit(self._write, writer, step, hists))
+
+    def wait(self):
+        # block until the pending histograms are written. any exception raised
+        # on the background thread is raised here
+        for future in self._futures:
+            future.result()
+        self._futures = []
+
+    def close(self):
+        self.wait()
+        self._executor.shutdown()
+
+    def __str__(self):
+        return str(self.__class__) + ": " + str(self.__dict__)
@@ -0,0 +1,201 @@
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from yeahml.train.gradients.trace import create_tf_function
+
+
+def get_readback_fn(tf_objs, name="readback", trace_counter=None):
+    """a single compiled fn that returns the result of each of the tf objects
+    (metrics or loss descriptions) flattened into one tensor and resets their
+    states, so that a single transfer from the device is made
+
+    the results are concatenated in their dtype (float64 if the dtypes
+    differ). The shape of each result is recorded (in `shapes`) when the fn is
+    traced so that the values can be split (and reshaped) on the host, see
+    `_split_values`
+
+    returns (fn, shapes)
+    """
+    shapes = []
+
+    def readback():
+        results = [tf_obj.result() for tf_obj in tf_objs]
+        for tf_obj, r in zip(tf_objs, results):
+            if not r.shape.is_fully_defined():
+                raise ValueError(
+                    f"the result of {tf_obj.name} does not have a static shape ({r.shape})"
+                )
+        shapes[:] = [r.shape for r in results]
+        results = [tf.reshape(r, [-1]) for r in results]
+        if len(set([r.dtype for r in results])) > 1:
+            results = [tf.cast(r, tf.float64) for r in results]
+        with tf.control_dependencies(results):
+            for tf_obj in tf_objs:
+                tf_obj.reset_states()
+        return tf.concat(results, axis=0)
+
+    return create_tf_function(readback, name, trace_counter=trace_counter), shapes
+
+
+def _split_values(flat_values, shapes):
+    # the (numpy) value of each result, a scalar result is a numpy scalar
+    values = []
+    offset = 0
+    for shape in shapes:
+        if shape.rank == 0:
+            values.append(flat_values[offset])
+            offset += 1
+        else:
+            size = int(np.prod(shape.as_list()))
+            values.append(flat_values[offset : offset + size].reshape(shape))
+            offset += size
+    return values
+
+
+def _scalar_summaries(tb_str, value):
+    # [(tb_str, scalar)]
+    if np.ndim(value) == 0:
+        return [(tb_str, value)]
+    return [
+        (f"{tb_str}/{'_'.join([str(i) for i in index])}", v)
+        for index, v in np.ndenumerate(value)
+    ]
+
+
+class DeferredReadback:
+    """collect the tf objects (and their Tracker) that are due to be read at a
+    tracker step and read them all at once with `flush`. The values are then
+    written to tensorboard and pushed to the Trackers in bulk
+
+    the readback fn is created once for each set of tf objects that are read
+    together (e.g. the objectives of a group), and reused on later flushes
+
+    e.g.
+        readback.add(("main_obj", "mse", "mean"), tf_mean, tracker, ...)
+        readback.add(("main_obj", "meansquarederror"), tf_metric, tracker, ...)
+        readback.flush()
+        -> {"main_obj": {"mse": {"mean": {"min": True}}, "meansquarederror": {...}}}
+    """
+
+    def __init__(self, name="readback", trace_counter=None):
+        self.name = name
+        self.trace_counter = trace_counter
+        self._entries = []
+        self._fns = {}
+
+    def add(
+        self,
+        path,
+        tf_obj,
+        tracker,
+        tb_writer,
+        tb_scopes,
+        tb_str,
+        num_train_instances,
+        num_training_ops,
+    ):
+        # path: location of the tracker update in the dict returned by flush
+        # tb_scopes: e.g. ("loss", "abalone") for "loss/abalone/<tb_str>/global"
+        self._entries.append(
+            {
+                "path": path,
+                "tf_obj": tf_obj,
+                "tracker": tracker,
+                "tb_writer": tb_writer,
+                "tb_scopes": tb_scopes,
+                "tb_str": tb_str,
+                "step": num_train_instances,
+                "global_step": num_training_ops,
+            }
+        )
+
+    def _get_fn(self, tf_objs):
+        key = tuple([id(tf_obj) for tf_obj in tf_objs])
+        try:
+            fn_and_shapes = self._fns[key]
+        except KeyError:
+            fn_and_shapes = get_readback_fn(
+                tf_objs,
+                name=f"{self.name}_{len(self._fns)}",
+                trace_counter=self.trace_counter,
+            )
+            self._fns[key] = fn_and_shapes
+        return fn_and_shapes
+
+    def _read(self, entries):
+        # NOTE: a single host-device sync
+        fn, shapes = self._get_fn([e["tf_obj"] for e in entries])
+        return _split_values(fn().numpy(), shapes)
+
+    def read(self):
+        """read the values of the collected tf objects (a single host-device
+        sync) and write them to tensorboard. The Trackers are not updated, the
+        returned values are applied (e.g. on another thread) with `apply`
+
+        returns [(entry, value)]
+        """
+        entries, self._entries = self._entries, []
+        if not entries:
+            return []
+
+        values = self._read(entries)
+        self._write_summaries(entries, values)
+        return list(zip(entries, values))
+
+    def apply(self, read_values):
+        # push the values (from `read`) to the Trackers
+        update_dict = {}
+        for entry, value in read_values:
+            cur_update = entry["tracker"].update(
+                value=value, step=entry["step"], global_step=entry["global_step"]
+            )
+
+            cur_dict = update_dict
+            for key in entry["path"][:-1]:
+                cur_dict = cur_dict.setdefault(key, {})
+            cur_dict[entry["path"][-1]] = cur_update
+        return update_dict
+
+    def _write_summaries(self, entries, values):
+        for entry, value in zip(entries, values):
+            with entry["tb_writer"].as_default():
+                with tf.name_scope(entry["tb_scopes"][0]):
+                    with tf.name_scope(entry["tb_scopes"][1]):
+                        # each element of a non-scalar result is written
+                        # e.g. "<tb_str>/1/global"
+                        for tb_str, v in _scalar_summaries(entry["tb_str"], value):
+                            tf.summary.scalar(
+                                f"{tb_str}/global", v, step=entry["global_step"]
+                            )
+                            tf.summary.scalar(f"{tb_str}/direct", v, step=entry["step"])
+
+    def flush(self, timer=None, timer_key=()):
+        # timer: optional PhaseTimer, the readback (and tracker updates) are
+        # recorded as "tracker" and the summary writes as "tensorboard" under
+        # the timer_key e.g. (optimizer, objective, dataset)
+        entries, self._entries = self._entries, []
+        if not entries:
+            return {}
+
+        start = time.perf_counter()
+        values = self._read(entries)
+        readback_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        self._write_summaries(entries, values)
+        tb_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        update_dict = self.apply(zip(entries, values))
+
+        if timer:
+            tracker_time = readback_time + time.perf_counter() - start
+            timer.record("tracker", tracker_time, *timer_key)
+            timer.record("tensorboard", tb_time, *timer_key)
+
+        return update_dict
+
+    def __str__(self):
+        return str(self.__class__) + ": " + str(self.__dict__)
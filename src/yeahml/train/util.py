@@ -1,3 +1,6 @@
+import tensorflow as tf
+
+
 def get_losses_to_update(loss_conf, ds_split):
     tf_train_loss_descs_to_update = []
     for _, desc_dict in loss_conf["track"][ds_split].items():
@@ -8,6 +11,17 @@ def get_losses_to_update(loss_conf, ds_split):
     return tf_train_loss_descs_to_update
 
 
+def get_metrics_to_update(objective_dict, ds_split):
+    tf_metrics_to_update = []
+    metric_conf = objective_dict["metrics"]
+    if metric_conf:
+        for _, split_to_metric in metric_conf.items():
+            # _ = metric_name
+            if ds_split in split_to_metric.keys():
+                tf_metrics_to_update.append(split_to_metric[ds_split])
+    return tf_metrics_to_update
+
+
 def get_next_batch(ds_iter):
 
     # TODO: this should accept the ds_dict and ds_iter so that if we reach the
@@ -27,7 +41,10 @@ def re_init_iter(ds_name, split_name, ds_dict):
 
 
 def _convert_to_iter(tf_ds):
-    return tf_ds.repeat(1).__iter__()
+    if isinstance(tf_ds, tf.data.Dataset):
+        tf_ds = tf_ds.repeat(1)
+    # NOTE: a distributed dataset (tf.distribute) is iterated directly
+    return tf_ds.__iter__()
 
 
 def convert_to_single_pass_iterator(ds_dict):
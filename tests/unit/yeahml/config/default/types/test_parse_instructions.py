@@ -0,0 +1,78 @@
+import pytest
+
+from yeahml.config.default.types.compound.directive import parse_instructions
+
+ex_instructions = {
+    "single": ("main_opt", {"YEAHML_0": {"optimizers": "main_opt", "operation": "+"}}),
+    "unwrapped": (
+        "main_opt & second_opt",
+        {"YEAHML_0": {"optimizers": ["main_opt", "second_opt"], "operation": "&"}},
+    ),
+    "nested_00": (
+        "(((main_opt, second_opt) & second_opt & third_opt) & second_opt)",
+        {
+            "YEAHML_0": {"optimizers": ["main_opt", "second_opt"], "operation": ","},
+            "YEAHML_1": {
+                "optimizers": ["YEAHML_0", "second_opt", "third_opt"],
+                "operation": "&",
+            },
+            "YEAHML_2": {"optimizers": ["YEAHML_1", "second_opt"], "operation": "&"},
+        },
+    ),
+    "nested_01": (
+        "a | (b, (c & d))",
+        {
+            "YEAHML_0": {"optimizers": ["c", "d"], "operation": "&"},
+            "YEAHML_1": {"optimizers": ["b", "YEAHML_0"], "operation": ","},
+            "YEAHML_2": {"optimizers": ["a", "YEAHML_1"], "operation": "|"},
+        },
+    ),
+    "outer_unwrapped": (
+        "(a & b), c",
+        {
+            "YEAHML_0": {"optimizers": ["a", "b"], "operation": "&"},
+            "YEAHML_1": {"optimizers": ["YEAHML_0", "c"], "operation": ","},
+        },
+    ),
+    "siblings_00": (
+        "(a & b) | (c & d)",
+        {
+            "YEAHML_0": {"optimizers": ["a", "b"], "operation": "&"},
+            "YEAHML_1": {"optimizers": ["c", "d"], "operation": "&"},
+            "YEAHML_2": {"optimizers": ["YEAHML_0", "YEAHML_1"], "operation": "|"},
+        },
+    ),
+    "siblings_01": (
+        "(a, b), (c, d)",
+        {
+            "YEAHML_0": {"optimizers": ["a", "b"], "operation": ","},
+            "YEAHML_1": {"optimizers": ["c", "d"], "operation": ","},
+            "YEAHML_2": {"optimizers": ["YEAHML_0", "YEAHML_1"], "operation": ","},
+        },
+    ),
+    "siblings_nested": (
+        "((a, (b & c)) | (d, e))",
+        {
+            "YEAHML_0": {"optimizers": ["b", "c"], "operation": "&"},
+            "YEAHML_1": {"optimizers": ["a", "YEAHML_0"], "operation": ","},
+            "YEAHML_2": {"optimizers": ["d", "e"], "operation": ","},
+            "YEAHML_3": {"optimizers": ["YEAHML_1", "YEAHML_2"], "operation": "|"},
+        },
+    ),
+    "mixed_operations": ("a & b | c", ValueError),
+    "no_operation": ("(a b) | c", ValueError),
+    "closed_before_open": (")a & b(", ValueError),
+    "not_str": (["a", "b"], TypeError),
+}
+
+
+@pytest.mark.parametrize(
+    "instructions,expected", ex_instructions.values(), ids=list(ex_instructions.keys())
+)
+def test_parse_instructions(instructions, expected):
+    """test parsing of the directive instructions"""
+    if isinstance(expected, dict):
+        assert parse_instructions(instructions) == expected
+    else:
+        with pytest.raises(expected):
+            parse_instructions(instructions)
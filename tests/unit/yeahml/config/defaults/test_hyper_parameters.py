@@ -35,6 +35,77 @@ ex_config = {
             }
         },
     ),
+    "validation_00": (
+        {
+            "hyper_parameters": {
+                "dataset": {"batch": 4},
+                "epochs": 2,
+                "val_every_n_steps": 100,
+                "val_max_batches": 10,
+                "val_fraction": 0.5,
+            }
+        },
+        {
+            "hyper_parameters": {
+                "dataset": {"batch": 4},
+                "epochs": 2,
+                "val_every_n_steps": 100,
+                "val_max_batches": 10,
+                "val_fraction": 0.5,
+            }
+        },
+    ),
+    "early_stopping_monitor_00": (
+        {
+            "hyper_parameters": {
+                "dataset": {"batch": 4},
+                "epochs": 20,
+                "early_stopping": {
+                    "epochs": 3,
+                    "warm_up": 1,
+                    "monitor": {
+                        "main_obj": {"metric": "meansquarederror", "track": "min"}
+                    },
+                },
+            }
+        },
+        {
+            "hyper_parameters": {
+                "dataset": {"batch": 4},
+                "epochs": 20,
+                "early_stopping": {
+                    "epochs": 3,
+                    "warm_up": 1,
+                    "monitor": {
+                        "main_obj": {"metric": "meansquarederror", "track": "min"}
+                    },
+                },
+            }
+        },
+    ),
+    "remainder_00": (
+        {
+            "hyper_parameters": {
+                "dataset": {"batch": 4, "remainder": "Keep_Eval"},
+                "epochs": 2,
+            }
+        },
+        {
+            "hyper_parameters": {
+                "dataset": {"batch": 4, "remainder": "keep_eval"},
+                "epochs": 2,
+            }
+        },
+    ),
+    "remainder_fake": (
+        {
+            "hyper_parameters": {
+                "dataset": {"batch": 4, "remainder": "pad"},
+                "epochs": 2,
+            }
+        },
+        ValueError,
+    ),
     "missing_epochs": ({"hyper_parameters": {"dataset": {"batch": 4}}}, ValueError),
     "missing_batch": ({"hyper_parameters": {"dataset": None, "epochs": 2}}, ValueError),
     "fake_optimizer": (
@@ -51,6 +51,100 @@ ex_config = {
             }
         },
     ),
+    "param_sample_00": (
+        {
+            "logging": {
+                "track": {
+                    "tracker_steps": 30,
+                    "tensorboard": {
+                        "param_steps": 50,
+                        "param_sample_size": 10000,
+                        "param_max_variables": 20,
+                    },
+                }
+            }
+        },
+        {
+            "logging": {
+                "console": {
+                    "level": "critical",
+                    "format_str": "%(name)-12s: %(levelname)-8s %(message)s",
+                },
+                "file": {
+                    "level": "critical",
+                    "format_str": "%(filename)s:%(lineno)s - %(funcName)20s()][%(levelname)-8s]: %(message)s",
+                },
+                "track": {
+                    "tracker_steps": 30,
+                    "tensorboard": {
+                        "param_steps": 50,
+                        "param_sample_size": 10000,
+                        "param_max_variables": 20,
+                    },
+                },
+            }
+        },
+    ),
+    "profile_00": (
+        {"logging": {"profile": {"start_steps": [50, 200], "validation": True}}},
+        {
+            "logging": {
+                "console": {
+                    "level": "critical",
+                    "format_str": "%(name)-12s: %(levelname)-8s %(message)s",
+                },
+                "file": {
+                    "level": "critical",
+                    "format_str": "%(filename)s:%(lineno)s - %(funcName)20s()][%(levelname)-8s]: %(message)s",
+                },
+                "track": {"tracker_steps": 0, "tensorboard": {"param_steps": 0}},
+                "profile": {
+                    "start_steps": [50, 200],
+                    "num_steps": 10,
+                    "validation": True,
+                },
+            }
+        },
+    ),
+    "checkpoint_00": (
+        {
+            "logging": {
+                "checkpoint": {
+                    "every_n_steps": 500,
+                    "every_n_seconds": 600,
+                    "max_to_keep": 2,
+                    "best": {
+                        "objective": "main_obj",
+                        "metric": "meansquarederror",
+                        "track": "min",
+                    },
+                }
+            }
+        },
+        {
+            "logging": {
+                "console": {
+                    "level": "critical",
+                    "format_str": "%(name)-12s: %(levelname)-8s %(message)s",
+                },
+                "file": {
+                    "level": "critical",
+                    "format_str": "%(filename)s:%(lineno)s - %(funcName)20s()][%(levelname)-8s]: %(message)s",
+                },
+                "track": {"tracker_steps": 0, "tensorboard": {"param_steps": 0}},
+                "checkpoint": {
+                    "every_n_steps": 500,
+                    "every_n_seconds": 600,
+                    "max_to_keep": 2,
+                    "best": {
+                        "objective": "main_obj",
+                        "metric": "meansquarederror",
+                        "track": "min",
+                    },
+                },
+            }
+        },
+    ),
 }
 
 
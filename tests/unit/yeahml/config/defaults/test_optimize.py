@@ -35,7 +35,153 @@ ex_config = {
                 # },
             }
         },
-    )
+    ),
+    "accumulate_00": (
+        {
+            "optimize": {
+                "optimizers": {
+                    "main_opt": {
+                        "type": "adam",
+                        "options": {"learning_rate": 0.0001},
+                        "objectives": ["main_opt"],
+                        "accumulate_steps": 4,
+                    }
+                }
+            }
+        },
+        {
+            "optimize": {
+                "optimizers": {
+                    "main_opt": {
+                        "type": "adam",
+                        "options": {"learning_rate": 0.0001},
+                        "objectives": ["main_opt"],
+                        "accumulate_steps": 4,
+                    }
+                }
+            }
+        },
+    ),
+    "scheduler_00": (
+        {
+            "optimize": {
+                "optimizers": {
+                    "main_opt": {
+                        "type": "adam",
+                        "options": {"learning_rate": 0.0001},
+                        "objectives": ["main_opt"],
+                    }
+                },
+                "scheduler": {
+                    "type": "ucb",
+                    "options": {"exploration": 0.5, "window": 3},
+                },
+            }
+        },
+        {
+            "optimize": {
+                "optimizers": {
+                    "main_opt": {
+                        "type": "adam",
+                        "options": {"learning_rate": 0.0001},
+                        "objectives": ["main_opt"],
+                    }
+                },
+                "scheduler": {
+                    "type": "ucb",
+                    "options": {"exploration": 0.5, "window": 3},
+                },
+            }
+        },
+    ),
+    "directive_00": (
+        {
+            "optimize": {
+                "optimizers": {
+                    "main_opt": {
+                        "type": "adam",
+                        "options": {"learning_rate": 0.0001},
+                        "objectives": ["main_obj"],
+                    },
+                    "second_opt": {
+                        "type": "adam",
+                        "options": {"learning_rate": 0.0001},
+                        "objectives": ["second_obj"],
+                    },
+                },
+                "directive": {"instructions": "main_opt & second_opt"},
+            }
+        },
+        {
+            "optimize": {
+                "optimizers": {
+                    "main_opt": {
+                        "type": "adam",
+                        "options": {"learning_rate": 0.0001},
+                        "objectives": ["main_obj"],
+                    },
+                    "second_opt": {
+                        "type": "adam",
+                        "options": {"learning_rate": 0.0001},
+                        "objectives": ["second_obj"],
+                    },
+                },
+                "directive": {"instructions": "main_opt & second_opt"},
+            }
+        },
+    ),
+    "layers_00": (
+        {
+            "optimize": {
+                "optimizers": {
+                    "main_opt": {
+                        "type": "adam",
+                        "options": {"learning_rate": 0.0001},
+                        "objectives": ["main_opt"],
+                        "layers": ["dense_1", "dense_2"],
+                    }
+                }
+            }
+        },
+        {
+            "optimize": {
+                "optimizers": {
+                    "main_opt": {
+                        "type": "adam",
+                        "options": {"learning_rate": 0.0001},
+                        "objectives": ["main_opt"],
+                        "layers": ["dense_1", "dense_2"],
+                    }
+                }
+            }
+        },
+    ),
+    "objective_weights_00": (
+        {
+            "optimize": {
+                "optimizers": {
+                    "main_opt": {
+                        "type": "adam",
+                        "options": {"learning_rate": 0.0001},
+                        "objectives": ["main_obj", "second_obj"],
+                        "objective_weights": {"main_obj": 3.0, "second_obj": 1.0},
+                    }
+                }
+            }
+        },
+        {
+            "optimize": {
+                "optimizers": {
+                    "main_opt": {
+                        "type": "adam",
+                        "options": {"learning_rate": 0.0001},
+                        "objectives": ["main_obj", "second_obj"],
+                        "objective_weights": {"main_obj": 3.0, "second_obj": 1.0},
+                    }
+                }
+            }
+        },
+    ),
 }
 
 
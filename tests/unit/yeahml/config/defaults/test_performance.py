@@ -63,6 +63,190 @@ ex_config = {
             }
         },
     ),
+    "execution_00": (
+        {
+            "performance": {
+                "objectives": {
+                    "main": {
+                        "metric": {"type": "binarycrossentropy", "options": [None]},
+                        "loss": {
+                            "type": "binary_crossentropy",
+                            "options": None,
+                            "track": "mean",
+                        },
+                        "in_config": {
+                            "type": "supervised",
+                            "options": {"prediction": "out", "target": "some_target"},
+                            "dataset": "some_dataset",
+                        },
+                    }
+                },
+                "compiled_step": True,
+                "steps_per_execution": 4,
+                "max_traces": 3,
+                "mixed_precision": "mixed_bfloat16",
+                "distribution": {"strategy": "mirrored", "num_cpu_devices": 4},
+            }
+        },
+        {
+            "performance": {
+                "objectives": {
+                    "main": {
+                        "metric": {"type": ["binarycrossentropy"], "options": [None]},
+                        "loss": {
+                            "type": "binary_crossentropy",
+                            "options": [None],
+                            "track": ["mean"],
+                        },
+                        "in_config": {
+                            "type": "supervised",
+                            "options": {"prediction": "out", "target": "some_target"},
+                            "dataset": "some_dataset",
+                        },
+                    }
+                },
+                "compiled_step": True,
+                "steps_per_execution": 4,
+                "max_traces": 3,
+                "mixed_precision": "mixed_bfloat16",
+                "distribution": {"strategy": "mirrored", "num_cpu_devices": 4},
+            }
+        },
+    ),
+    "multi_worker_00": (
+        {
+            "performance": {
+                "objectives": {
+                    "main": {
+                        "metric": {"type": "binarycrossentropy", "options": [None]},
+                        "loss": {
+                            "type": "binary_crossentropy",
+                            "options": None,
+                            "track": "mean",
+                        },
+                        "in_config": {
+                            "type": "supervised",
+                            "options": {"prediction": "out", "target": "some_target"},
+                            "dataset": "some_dataset",
+                        },
+                    }
+                },
+                "distribution": {
+                    "strategy": "multi_worker_mirrored",
+                    "cluster": {"worker": ["localhost:12345", "localhost:12346"]},
+                    "task": {"type": "worker", "index": 1},
+                },
+            }
+        },
+        {
+            "performance": {
+                "objectives": {
+                    "main": {
+                        "metric": {"type": ["binarycrossentropy"], "options": [None]},
+                        "loss": {
+                            "type": "binary_crossentropy",
+                            "options": [None],
+                            "track": ["mean"],
+                        },
+                        "in_config": {
+                            "type": "supervised",
+                            "options": {"prediction": "out", "target": "some_target"},
+                            "dataset": "some_dataset",
+                        },
+                    }
+                },
+                "distribution": {
+                    "strategy": "multi_worker_mirrored",
+                    "cluster": {"worker": ["localhost:12345", "localhost:12346"]},
+                    "task": {"type": "worker", "index": 1},
+                },
+            }
+        },
+    ),
+    "async_validation_00": (
+        {
+            "performance": {
+                "objectives": {
+                    "main": {
+                        "metric": {"type": "binarycrossentropy", "options": [None]},
+                        "loss": {
+                            "type": "binary_crossentropy",
+                            "options": None,
+                            "track": "mean",
+                        },
+                        "in_config": {
+                            "type": "supervised",
+                            "options": {"prediction": "out", "target": "some_target"},
+                            "dataset": "some_dataset",
+                        },
+                    }
+                },
+                "async_validation": True,
+            }
+        },
+        {
+            "performance": {
+                "objectives": {
+                    "main": {
+                        "metric": {"type": ["binarycrossentropy"], "options": [None]},
+                        "loss": {
+                            "type": "binary_crossentropy",
+                            "options": [None],
+                            "track": ["mean"],
+                        },
+                        "in_config": {
+                            "type": "supervised",
+                            "options": {"prediction": "out", "target": "some_target"},
+                            "dataset": "some_dataset",
+                        },
+                    }
+                },
+                "async_validation": True,
+            }
+        },
+    ),
+    "jit_compile_00": (
+        {
+            "performance": {
+                "objectives": {
+                    "main": {
+                        "metric": {"type": "binarycrossentropy", "options": [None]},
+                        "loss": {
+                            "type": "binary_crossentropy",
+                            "options": None,
+                            "track": "mean",
+                        },
+                        "in_config": {
+                            "type": "supervised",
+                            "options": {"prediction": "out", "target": "some_target"},
+                            "dataset": "some_dataset",
+                        },
+                    }
+                },
+                "jit_compile": True,
+            }
+        },
+        {
+            "performance": {
+                "objectives": {
+                    "main": {
+                        "metric": {"type": ["binarycrossentropy"], "options": [None]},
+                        "loss": {
+                            "type": "binary_crossentropy",
+                            "options": [None],
+                            "track": ["mean"],
+                        },
+                        "in_config": {
+                            "type": "supervised",
+                            "options": {"prediction": "out", "target": "some_target"},
+                            "dataset": "some_dataset",
+                        },
+                    }
+                },
+                "jit_compile": True,
+            }
+        },
+    ),
     # "loss_type_as_lists": (
     #     {
     #         "performance": {
@@ -0,0 +1,54 @@
+import pytest
+import tensorflow as tf
+
+from yeahml.dataset.util import get_configured_dataset, get_drop_remainder
+
+ex_remainder = {
+    "default": (None, {"train": True, "val": True, "test": True}),
+    "drop": ("drop", {"train": True, "val": True, "test": True}),
+    "keep": ("keep", {"train": False, "val": False, "test": False}),
+    "keep_eval": ("keep_eval", {"train": True, "val": False, "test": False}),
+    "unknown": ("pad", ValueError),
+}
+
+
+def _get_hp_cdict(remainder):
+    hp_cdict = {"dataset": {"batch": 16}}
+    if remainder:
+        hp_cdict["dataset"]["remainder"] = remainder
+    return hp_cdict
+
+
+@pytest.mark.parametrize(
+    "remainder,expected", ex_remainder.values(), ids=list(ex_remainder.keys())
+)
+def test_get_drop_remainder(remainder, expected):
+    """test whether the final partial batch of each split is dropped"""
+    hp_cdict = _get_hp_cdict(remainder)
+    if isinstance(expected, dict):
+        for split_name, drop in expected.items():
+            assert get_drop_remainder(hp_cdict, split_name) == drop
+    else:
+        with pytest.raises(expected):
+            get_drop_remainder(hp_cdict, "train")
+
+
+@pytest.mark.parametrize(
+    "remainder,split_name,expected",
+    [
+        (None, "val", [16, 16]),
+        ("keep", "train", [16, 16, 8]),
+        ("keep_eval", "train", [16, 16]),
+        ("keep_eval", "val", [16, 16, 8]),
+    ],
+    ids=["default", "keep", "keep_eval_train", "keep_eval_val"],
+)
+def test_configured_batches(remainder, split_name, expected):
+    """test the batches of a configured split"""
+    ds = tf.data.Dataset.from_tensor_slices(tf.range(40))
+    dataset = get_configured_dataset(
+        None, _get_hp_cdict(remainder), ds=ds, split_name=split_name
+    )
+    assert [int(tf.shape(b)[0]) for b in dataset] == expected
+    # a kept remainder leaves the batch dim unknown
+    assert (dataset.element_spec.shape[0] is None) == (len(expected) == 3)
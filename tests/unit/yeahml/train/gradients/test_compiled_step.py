@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from yeahml.train.gradients.accumulate import GradientAccumulator
+from yeahml.train.gradients.gradients import (
+    get_apply_grad_fn,
+    get_compiled_train_step_fn,
+    get_get_supervised_grads_fn,
+    update_model_params,
+)
+from yeahml.train.gradients.trace import TraceCounter
+
+
+def _get_model():
+    inp = tf.keras.layers.Input(shape=(3,))
+    x = tf.keras.layers.Dense(
+        4, activation="relu", kernel_constraint=tf.keras.constraints.MaxNorm(0.5)
+    )(inp)
+    return tf.keras.Model(inputs=[inp], outputs=[tf.keras.layers.Dense(1)(x)])
+
+
+def _get_batches(num_batches):
+    rng = np.random.default_rng(0)
+    return [
+        (
+            tf.constant(rng.normal(size=(8, 3)), dtype=tf.float32),
+            tf.constant(rng.normal(size=(8, 1)), dtype=tf.float32),
+        )
+        for _ in range(num_batches)
+    ]
+
+
+def _train_eager(model, batches, optimizer):
+    get_grad = get_get_supervised_grads_fn(model, [tf.losses.mse], [0], [[]])
+    apply_grad = get_apply_grad_fn(model, optimizer)
+    for batch in batches:
+        update_model_params(apply_grad, get_grad(batch)["gradients"], model)
+
+
+@pytest.mark.parametrize(
+    "get_optimizer",
+    [
+        lambda: tf.keras.optimizers.SGD(learning_rate=0.1),
+        lambda: tf.keras.optimizers.Adam(learning_rate=0.01),
+    ],
+    ids=["sgd", "adam"],
+)
+def test_compiled_step_updates_weights(get_optimizer):
+    """test that the compiled step updates the weights (and projects the
+    constraints) as the separate gradient and apply steps do"""
+    batches = _get_batches(4)
+    eager_model = _get_model()
+    initial_weights = eager_model.get_weights()
+    _train_eager(eager_model, batches, get_optimizer())
+
+    model = _get_model()
+    model.set_weights(initial_weights)
+    trace_counter = TraceCounter()
+    train_step = get_compiled_train_step_fn(
+        model,
+        [tf.losses.mse],
+        [0],
+        [[]],
+        get_optimizer(),
+        input_signature=[
+            (
+                tf.TensorSpec([8, 3], tf.float32),
+                tf.TensorSpec([8, 1], tf.float32),
+            )
+        ],
+        trace_counter=trace_counter,
+    )
+    for batch in batches:
+        out = train_step(batch)
+        assert "gradients" not in out
+    # NOTE: the optimizer variables are created on the first call, which is
+    # then traced again. The later calls are not traced
+    assert trace_counter() == {"train_step": 2}
+
+    for w, eager_w, initial_w in zip(
+        model.get_weights(), eager_model.get_weights(), initial_weights
+    ):
+        assert not np.allclose(w, initial_w)
+        np.testing.assert_allclose(w, eager_w, rtol=1e-5, atol=1e-6)
+    kernel_norms = np.sqrt(np.sum(np.square(model.get_weights()[0]), axis=0))
+    assert np.all(kernel_norms <= 0.5 + 1e-6)
+
+
+def test_compiled_step_accumulates():
+    """test that with an accumulator the weights are only updated every
+    `accumulate_steps` calls"""
+    model = _get_model()
+    initial_weights = model.get_weights()
+    accumulator = GradientAccumulator(model.trainable_variables, 2)
+    train_step = get_compiled_train_step_fn(
+        model,
+        [tf.losses.mse],
+        [0],
+        [[]],
+        tf.keras.optimizers.SGD(learning_rate=0.1),
+        accumulator=accumulator,
+    )
+    batches = _get_batches(2)
+    train_step(batches[0])
+    for w, initial_w in zip(model.get_weights(), initial_weights):
+        np.testing.assert_array_equal(w, initial_w)
+    train_step(batches[1])
+    assert not np.allclose(model.get_weights()[0], initial_weights[0])
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from yeahml.build.components.precision import (
+    configure_loss_scale_optimizer,
+    configure_precision_policy,
+)
+from yeahml.train.gradients.gradients import (
+    get_apply_grad_fn,
+    get_compiled_train_step_fn,
+    get_get_supervised_grads_fn,
+    update_model_params,
+)
+
+
+@pytest.fixture
+def mixed_float16():
+    # the policy is global, it is reset for the other tests
+    configure_precision_policy("mixed_float16")
+    yield
+    configure_precision_policy("float32")
+
+
+def _get_model():
+    inp = tf.keras.layers.Input(shape=(3,))
+    x = tf.keras.layers.Dense(4, activation="relu")(inp)
+    out = tf.keras.layers.Dense(1)(x)
+    return tf.keras.Model(inputs=[inp], outputs=[out])
+
+
+def _get_batches(num_batches):
+    rng = np.random.default_rng(0)
+    return [
+        (
+            tf.constant(rng.normal(size=(8, 3)), dtype=tf.float32),
+            tf.constant(rng.normal(size=(8, 1)), dtype=tf.float32),
+        )
+        for _ in range(num_batches)
+    ]
+
+
+def test_loss_scaled_grads(mixed_float16):
+    """test that the gradients are calculated from the scaled loss, and are
+    finite and applied once unscaled"""
+    tf.random.set_seed(0)
+    model = _get_model()
+    optimizer = configure_loss_scale_optimizer(tf.keras.optimizers.SGD(0.1))
+    get_grad = get_get_supervised_grads_fn(
+        model, [tf.losses.mse], [0], [[]], optimizer=optimizer
+    )
+    grad_dict = get_grad(_get_batches(1)[0])
+    assert grad_dict["final_loss"].dtype == tf.float32
+
+    loss_scale = float(optimizer.loss_scale)
+    assert loss_scale > 1.0
+    unscaled = optimizer.get_unscaled_gradients(grad_dict["gradients"])
+    for grad, scaled in zip(unscaled, grad_dict["gradients"]):
+        assert grad.dtype == tf.float32
+        assert np.all(np.isfinite(grad.numpy()))
+        np.testing.assert_allclose(grad.numpy() * loss_scale, scaled.numpy())
+    assert any(np.any(g.numpy() != 0) for g in unscaled)
+
+    before = [v.numpy() for v in model.trainable_variables]
+    update_model_params(
+        get_apply_grad_fn(model, optimizer), grad_dict["gradients"], model
+    )
+    for v, b, grad in zip(model.trainable_variables, before, unscaled):
+        np.testing.assert_allclose(v.numpy(), b - 0.1 * grad.numpy(), rtol=1e-5)
+
+
+@pytest.mark.parametrize("compiled", [False, True], ids=["separate", "compiled"])
+def test_mixed_float16_training(mixed_float16, compiled):
+    """test that training with the loss scaled optimizer updates the (float32)
+    variables"""
+    tf.random.set_seed(0)
+    model = _get_model()
+    assert model.layers[-1].compute_dtype == "float16"
+    optimizer = configure_loss_scale_optimizer(tf.keras.optimizers.SGD(0.1))
+    before = [v.numpy() for v in model.trainable_variables]
+
+    batches = _get_batches(3)
+    if compiled:
+        train_step = get_compiled_train_step_fn(
+            model, [tf.losses.mse], [0], [[]], optimizer
+        )
+        for batch in batches:
+            train_step(batch)
+    else:
+        get_grad = get_get_supervised_grads_fn(
+            model, [tf.losses.mse], [0], [[]], optimizer=optimizer
+        )
+        apply_grad = get_apply_grad_fn(model, optimizer)
+        for batch in batches:
+            update_model_params(apply_grad, get_grad(batch)["gradients"], model)
+
+    # the gradients were finite, every step was applied
+    assert int(optimizer.iterations) == len(batches)
+    for v, b in zip(model.trainable_variables, before):
+        assert v.dtype == tf.float32
+        assert np.all(np.isfinite(v.numpy()))
+        assert not np.array_equal(v.numpy(), b)
@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from yeahml.train.gradients.gradients import (
+    get_apply_grad_fn,
+    get_get_supervised_grads_fn,
+    update_model_params,
+)
+from yeahml.train.setup.loop_dynamics import get_loss_weights
+
+
+class TiedModel(tf.keras.Model):
+    # the embedding is looked up (sparse gradient) and, if tied, reused as the
+    # output projection (dense gradient), the head is only dense
+    def __init__(self, tied=True):
+        super().__init__()
+        self.tied = tied
+        self.embedding = tf.keras.layers.Embedding(6, 3)
+        self.head = tf.keras.layers.Dense(
+            1, kernel_constraint=tf.keras.constraints.MaxNorm(0.5)
+        )
+
+    def call(self, inputs, training=None):
+        emb = tf.reduce_mean(self.embedding(inputs), axis=1)
+        if not self.tied:
+            return [self.head(emb)]
+        tied_out = tf.matmul(emb, self.embedding.embeddings, transpose_b=True)
+        return [tied_out, self.head(emb)]
+
+
+def _get_model_and_batch(tied=True):
+    tf.random.set_seed(0)
+    model = TiedModel(tied)
+    x = tf.constant([[0, 1], [1, 2], [4, 4]], dtype=tf.int32)
+    y = tf.constant([[1.0], [0.0], [2.0]])
+    model(x)
+    return model, (x, y)
+
+
+def _manual_grads(model, batch, loss_weights):
+    x, y = batch
+    with tf.GradientTape() as tape:
+        out = model(x, training=True)
+        loss = tf.add_n(
+            [w * tf.reduce_mean(tf.losses.mse(y, o)) for w, o in zip(loss_weights, out)]
+        )
+    return [
+        tf.convert_to_tensor(g) for g in tape.gradient(loss, model.trainable_variables)
+    ]
+
+
+ex_loss_weights = {
+    "default": ({}, ["a", "b"], ["a", "b"], None),
+    "weighted": ({"a": 3.0}, ["a", "b"], ["a", "b"], [3.0, 1.0]),
+    "zero": ({"b": 0.0}, ["a", "b"], ["a", "b"], [1.0, 0.0]),
+    # b only has metrics
+    "metric_only": ({"a": 0.5, "b": 2.0}, ["a", "b"], ["a"], [0.5, 1.0]),
+}
+
+
+@pytest.mark.parametrize(
+    "objective_weights,objective_names,loss_objective_names,expected",
+    ex_loss_weights.values(),
+    ids=list(ex_loss_weights.keys()),
+)
+def test_get_loss_weights(
+    objective_weights, objective_names, loss_objective_names, expected
+):
+    """test the loss weight of each objective"""
+    optimizer_conf = {"objective_weights": objective_weights}
+    assert (
+        get_loss_weights(optimizer_conf, objective_names, loss_objective_names)
+        == expected
+    )
+
+
+@pytest.mark.parametrize("loss_weights", [[1.0, 1.0], [3.0, 0.5], [0.0, 2.0]])
+def test_weighted_gradients(loss_weights):
+    """test that the objective weights scale the gradient of each objective,
+    including a variable with both a sparse and a dense gradient"""
+    model, batch = _get_model_and_batch()
+    loss_descs = [[tf.keras.metrics.Mean()], [tf.keras.metrics.Mean()]]
+    get_grad = get_get_supervised_grads_fn(
+        model,
+        [tf.losses.mse, tf.losses.mse],
+        [0, 1],
+        loss_descs,
+        loss_weights=loss_weights,
+    )
+    grads = get_grad(batch)["gradients"]
+    expected = _manual_grads(model, batch, loss_weights)
+    for grad, exp in zip(grads, expected):
+        np.testing.assert_allclose(
+            tf.convert_to_tensor(grad), exp, rtol=1e-5, atol=1e-6
+        )
+
+    # the loss descriptions track the unweighted loss
+    unweighted = tf.reduce_mean(tf.losses.mse(batch[1], model(batch[0])[0]))
+    np.testing.assert_allclose(loss_descs[0][0].result(), unweighted, rtol=1e-5)
+
+
+def test_update_model_params_sparse():
+    """test that the sparse (embedding) and dense gradients are applied and the
+    constraints are projected"""
+    # the embedding only has a sparse gradient from the lookup
+    model, batch = _get_model_and_batch(tied=False)
+    get_grad = get_get_supervised_grads_fn(model, [tf.losses.mse], [0], [[]])
+    grads = get_grad(batch)["gradients"]
+    assert isinstance(grads[0], tf.IndexedSlices)
+
+    before = [v.numpy() for v in model.trainable_variables]
+    apply_grad = get_apply_grad_fn(model, tf.keras.optimizers.SGD(learning_rate=1.0))
+    update_model_params(apply_grad, grads, model)
+    for v, b, g in zip(model.trainable_variables, before, grads):
+        expected = b - tf.convert_to_tensor(g).numpy()
+        if v.constraint is not None:
+            expected = v.constraint(tf.constant(expected)).numpy()
+        np.testing.assert_allclose(v.numpy(), expected, rtol=1e-5, atol=1e-6)
+    # rows that were not looked up are unchanged
+    np.testing.assert_array_equal(model.embedding.embeddings.numpy()[3], before[0][3])
+    np.testing.assert_array_equal(model.embedding.embeddings.numpy()[5], before[0][5])
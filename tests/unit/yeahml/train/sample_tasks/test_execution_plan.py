@@ -0,0 +1,72 @@
+import pytest
+
+from yeahml.config.default.types.compound.directive import parse_instructions
+from yeahml.train.sample_tasks.directive import ExecutionPlan
+
+
+def _run_plan(instructions, optimizer_names, num_passes):
+    # each optimizer is complete after `num_passes[name]` passes
+    plan = ExecutionPlan(parse_instructions(instructions), optimizer_names)
+    remaining = dict(num_passes)
+    order = []
+    while True:
+        training_names = [n for n, v in remaining.items() if v > 0]
+        unit = plan.next_unit(training_names)
+        if not unit:
+            break
+        order.append(unit)
+        for name in unit:
+            remaining[name] -= 1
+    return order
+
+
+ex_plans = {
+    "single": ("a", {"a": 2}, [("a",), ("a",)]),
+    "sequential": ("a, b", {"a": 2, "b": 1}, [("a",), ("a",), ("b",)]),
+    "alternate": ("a | b", {"a": 3, "b": 1}, [("a",), ("b",), ("a",), ("a",)]),
+    "joint": ("a & b", {"a": 2, "b": 1}, [("a", "b"), ("a",)]),
+    "nested": (
+        "(a & b), c",
+        {"a": 1, "b": 2, "c": 1},
+        [("a", "b"), ("b",), ("c",)],
+    ),
+    "siblings_alternate": (
+        "(a & b) | (c & d)",
+        {"a": 2, "b": 2, "c": 1, "d": 1},
+        [("a", "b"), ("c", "d"), ("a", "b")],
+    ),
+    "siblings_sequential": (
+        "(a, b), (c, d)",
+        {"a": 1, "b": 1, "c": 1, "d": 1},
+        [("a",), ("b",), ("c",), ("d",)],
+    ),
+    "siblings_nested": (
+        "(a, (b & c)) | (d, e)",
+        {"a": 1, "b": 1, "c": 2, "d": 2, "e": 1},
+        [("a",), ("d",), ("b", "c"), ("d",), ("c",), ("e",)],
+    ),
+}
+
+
+@pytest.mark.parametrize(
+    "instructions,num_passes,expected", ex_plans.values(), ids=list(ex_plans.keys())
+)
+def test_next_unit(instructions, num_passes, expected):
+    """test the order in which the units of the plan are trained"""
+    order = _run_plan(instructions, list(num_passes.keys()), num_passes)
+    assert order == expected
+
+
+@pytest.mark.parametrize(
+    "instructions,optimizer_names",
+    [
+        ("a, b", ["a", "b", "c"]),  # c is not in the directive
+        ("a, d", ["a"]),  # d is not an optimizer
+        ("(a, b) & c", ["a", "b", "c"]),  # a group can't be trained jointly
+    ],
+    ids=["unreferenced", "unknown", "joint_group"],
+)
+def test_invalid_plan(instructions, optimizer_names):
+    """test that an invalid plan raises"""
+    with pytest.raises(ValueError):
+        ExecutionPlan(parse_instructions(instructions), optimizer_names)
@@ -0,0 +1,194 @@
+import json
+import random
+
+import pytest
+
+from yeahml.config.default.types.compound.directive import parse_instructions
+from yeahml.train.sample_tasks.directive import ExecutionPlan
+from yeahml.train.sample_tasks.scheduler import (
+    RandomScheduler,
+    RoundRobinScheduler,
+    UCBScheduler,
+    WeightedScheduler,
+    get_scheduler,
+    relative_improvement,
+)
+from yeahml.train.train_model import get_task_state, load_task_state
+
+
+def _select_n(scheduler, names, n, rng=None, name_to_losses=None):
+    return [
+        scheduler.select(names, rng=rng, name_to_losses=name_to_losses)
+        for _ in range(n)
+    ]
+
+
+def test_random_scheduler():
+    """test that the random selection is made by the (seeded) rng"""
+    names = ["a", "b", "c"]
+    selected = _select_n(RandomScheduler(), names, 20, rng=random.Random(3))
+    assert selected == _select_n(RandomScheduler(), names, 20, rng=random.Random(3))
+    assert set(selected) == set(names)
+
+
+def test_round_robin_scheduler():
+    """test that the names are selected in order and that names that are no
+    longer training are skipped"""
+    scheduler = RoundRobinScheduler()
+    assert _select_n(scheduler, ["a", "b", "c"], 4) == ["a", "b", "c", "a"]
+    # c is no longer training
+    assert _select_n(scheduler, ["a", "b"], 3) == ["b", "a", "b"]
+
+
+ex_weights = {
+    "default": (None, {"a": 0.5, "b": 0.5}),
+    "weighted": ({"a": 3, "b": 1}, {"a": 0.75, "b": 0.25}),
+    # names without a weight have a weight of 1
+    "missing": ({"a": 3}, {"a": 0.75, "b": 0.25}),
+    "zero": ({"a": 0, "b": 1}, {"a": 0.0, "b": 1.0}),
+    # all weights are 0, uniform
+    "all_zero": ({"a": 0, "b": 0}, {"a": 0.5, "b": 0.5}),
+}
+
+
+@pytest.mark.parametrize(
+    "weights,expected", ex_weights.values(), ids=list(ex_weights.keys())
+)
+def test_weighted_scheduler(weights, expected):
+    """test that the names are selected in proportion to their weight"""
+    n = 4000
+    selected = _select_n(
+        WeightedScheduler(weights), ["a", "b"], n, rng=random.Random(0)
+    )
+    for name, fraction in expected.items():
+        assert selected.count(name) / n == pytest.approx(fraction, abs=0.03)
+
+
+def test_weighted_scheduler_negative():
+    """test that a negative weight raises"""
+    with pytest.raises(ValueError):
+        WeightedScheduler({"a": -1})
+
+
+ex_improvement = {
+    "empty": ([], 3, 0.0),
+    "single": ([1.0], 3, 0.0),
+    "halved": ([1.0, 0.5], 3, 0.5),
+    # only the most recent `window` passes are used
+    "window": ([4.0, 1.0, 0.8, 0.6], 2, 0.2),
+    "worse": ([1.0, 2.0], 1, -1.0),
+}
+
+
+@pytest.mark.parametrize(
+    "values,window,expected", ex_improvement.values(), ids=list(ex_improvement.keys())
+)
+def test_relative_improvement(values, window, expected):
+    """test the mean relative improvement over the window"""
+    assert relative_improvement(values, window) == pytest.approx(expected)
+
+
+def test_ucb_scheduler():
+    """test that each name is selected once, then the name with the highest
+    upper confidence bound (reward + exploration) is selected"""
+    # a is improving, b is not
+    name_to_losses = {"a": [[1.0, 0.5]], "b": [[1.0, 1.0]]}
+
+    scheduler = UCBScheduler(exploration=0.0, window=1)
+    selected = _select_n(scheduler, ["a", "b"], 5, name_to_losses=name_to_losses)
+    assert selected == ["a", "b", "a", "a", "a"]
+    assert scheduler.num_selected == {"a": 4, "b": 1}
+    assert scheduler.reward("a", name_to_losses) == pytest.approx(0.5)
+    # the reward is the mean over the losses of the name
+    assert scheduler.reward("c", {"c": [[1.0, 0.5], [1.0, 1.0]]}) == pytest.approx(0.25)
+    assert scheduler.reward("c", None) == 0.0
+
+    # with exploration, b is revisited once a has been selected enough times
+    scheduler = UCBScheduler(exploration=1.0, window=1)
+    selected = _select_n(scheduler, ["a", "b"], 12, name_to_losses=name_to_losses)
+    assert selected[:3] == ["a", "b", "a"]
+    assert "b" in selected[3:]
+    assert scheduler.num_selected["a"] > scheduler.num_selected["b"]
+
+
+@pytest.mark.parametrize(
+    "options", [{"exploration": -1.0}, {"window": 0}], ids=["exploration", "window"]
+)
+def test_ucb_scheduler_invalid(options):
+    """test that invalid options raise"""
+    with pytest.raises(ValueError):
+        UCBScheduler(**options)
+
+
+ex_schedulers = {
+    "none": (None, RandomScheduler),
+    "random": ({"type": "random"}, RandomScheduler),
+    "round_robin": ({"type": "round_robin"}, RoundRobinScheduler),
+    "weighted": (
+        {"type": "weighted", "options": {"weights": {"a": 2}}},
+        WeightedScheduler,
+    ),
+    "ucb": ({"type": "ucb", "options": {"window": 2}}, UCBScheduler),
+    "unknown": ({"type": "other"}, ValueError),
+}
+
+
+@pytest.mark.parametrize(
+    "scheduler_cdict,expected", ex_schedulers.values(), ids=list(ex_schedulers.keys())
+)
+def test_get_scheduler(scheduler_cdict, expected):
+    """test that the scheduler is created from the config"""
+    if expected is ValueError:
+        with pytest.raises(ValueError):
+            get_scheduler(scheduler_cdict)
+    else:
+        assert isinstance(get_scheduler(scheduler_cdict), expected)
+
+
+ex_task_state = {
+    "round_robin": {"type": "round_robin"},
+    "ucb": {"type": "ucb", "options": {"exploration": 0.1}},
+    "random": {"type": "random"},
+}
+
+
+@pytest.mark.parametrize(
+    "scheduler_cdict", ex_task_state.values(), ids=list(ex_task_state.keys())
+)
+def test_task_state(scheduler_cdict):
+    """test that the selection continues from the saved (json) task state as if
+    the run had not been interrupted"""
+    names = ["a", "b", "c"]
+    name_to_losses = {"a": [[1.0, 0.9]], "b": [[1.0, 0.5]], "c": [[1.0, 0.99]]}
+
+    def _create():
+        return (
+            get_scheduler(scheduler_cdict),
+            {},
+            ExecutionPlan(parse_instructions("a | (b, c)"), names),
+            random.Random(0),
+        )
+
+    def _select(opt_scheduler, unit_to_obj_scheduler, execution_plan, rng):
+        unit = execution_plan.next_unit(names)
+        if unit not in unit_to_obj_scheduler:
+            unit_to_obj_scheduler[unit] = get_scheduler(scheduler_cdict)
+        return (
+            unit,
+            opt_scheduler.select(names, rng=rng, name_to_losses=name_to_losses),
+            unit_to_obj_scheduler[unit].select(
+                names, rng=rng, name_to_losses=name_to_losses
+            ),
+        )
+
+    full = _create()
+    expected = [_select(*full) for _ in range(8)]
+
+    interrupted = _create()
+    selected = [_select(*interrupted) for _ in range(5)]
+    task_state = json.loads(json.dumps(get_task_state(*interrupted)))
+    resumed = _create()
+    load_task_state(task_state, *resumed, scheduler_cdict=scheduler_cdict)
+    selected.extend([_select(*resumed) for _ in range(3)])
+
+    assert selected == expected
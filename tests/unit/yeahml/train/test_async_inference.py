@@ -0,0 +1,109 @@
+import random
+import threading
+
+import numpy as np
+import tensorflow as tf
+
+import yeahml.train.train_model as train_model_module
+from yeahml.train.async_inference import AsyncInference, create_shadow_model
+from yeahml.train.setup.tracker.tracker import Tracker
+from train_util import make_config, make_datasets, make_model
+
+
+def test_shadow_snapshot():
+    """test that the inference fn is run on a snapshot of the weights (taken
+    when submitted) on a background thread"""
+    model = make_model()
+    async_inference = AsyncInference(model, create_shadow_model(model))
+    release = threading.Event()
+
+    def inference_fn(shadow_model):
+        release.wait()
+        return threading.current_thread(), shadow_model.get_weights()
+
+    submitted = model.get_weights()
+    async_inference.submit(inference_fn)
+    # training continues on the model while the pass is run
+    for v in model.variables:
+        v.assign_add(tf.ones_like(v))
+    assert async_inference.poll() is None
+    release.set()
+    thread, weights = async_inference.close()
+
+    assert thread is not threading.main_thread()
+    for w, s in zip(weights, submitted):
+        np.testing.assert_array_equal(w, s)
+    for v, s in zip(model.variables, submitted):
+        np.testing.assert_array_equal(v.numpy(), s + 1)
+
+
+def _train(monkeypatch, tmp_path, async_validation):
+    # {thread: num}, the threads the validation passes and the tracker updates
+    # are run on
+    val_threads, update_threads = {}, {}
+    run_validation = train_model_module.run_validation
+
+    def _run_validation(*args, **kwargs):
+        thread = threading.current_thread()
+        val_threads[thread] = val_threads.get(thread, 0) + 1
+        return run_validation(*args, **kwargs)
+
+    update = Tracker.update
+
+    def _update(self, *args, **kwargs):
+        thread = threading.current_thread()
+        update_threads[thread] = update_threads.get(thread, 0) + 1
+        return update(self, *args, **kwargs)
+
+    monkeypatch.setattr(train_model_module, "run_validation", _run_validation)
+    monkeypatch.setattr(Tracker, "update", _update)
+
+    # NOTE: the objectives are selected with `random`
+    random.seed(0)
+    tf.random.set_seed(0)
+    model = make_model()
+    config = make_config(
+        tmp_path.joinpath(str(async_validation)),
+        epochs=3,
+        performance__async_validation=async_validation,
+    )
+    return_dict = train_model_module.train_model(model, config, make_datasets())
+    monkeypatch.undo()
+    return return_dict, val_threads, update_threads
+
+
+def _val_trackers(tracker_dict):
+    # {(objective, description): Tracker} of the val losses and metrics
+    trackers = {}
+    for obj_name in ["main_obj", "second_obj"]:
+        obj_dict = tracker_dict["main_opt"][obj_name]
+        for kind in ["loss", "metrics"]:
+            for desc, desc_dict in obj_dict[kind]["abalone"]["val"].items():
+                if isinstance(desc_dict, Tracker):
+                    trackers[(obj_name, desc)] = desc_dict
+                else:
+                    for name, tracker in desc_dict.items():
+                        trackers[(obj_name, f"{desc}_{name}")] = tracker
+    return trackers
+
+
+def test_async_validation(monkeypatch, tmp_path):
+    """test that the async validation passes are run in the background, the
+    trackers are updated on the main thread and match those of the sync run"""
+    sync_dict, sync_val_threads, _ = _train(monkeypatch, tmp_path, False)
+    async_dict, async_val_threads, update_threads = _train(monkeypatch, tmp_path, True)
+
+    assert list(sync_val_threads.keys()) == [threading.main_thread()]
+    assert threading.main_thread() not in async_val_threads
+    assert sum(async_val_threads.values()) == sum(sync_val_threads.values()) == 3
+    assert list(update_threads.keys()) == [threading.main_thread()]
+
+    sync_trackers = _val_trackers(sync_dict["tracker"])
+    async_trackers = _val_trackers(async_dict["tracker"])
+    assert sync_trackers.keys() == async_trackers.keys()
+    for key, sync_tracker in sync_trackers.items():
+        async_tracker = async_trackers[key]
+        assert len(sync_tracker.values) == 3
+        assert async_tracker.steps == sync_tracker.steps
+        assert async_tracker.global_step == sync_tracker.global_step
+        np.testing.assert_allclose(async_tracker.values, sync_tracker.values)
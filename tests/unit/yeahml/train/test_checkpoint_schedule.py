@@ -0,0 +1,154 @@
+import json
+import time
+
+import numpy as np
+import tensorflow as tf
+
+import yeahml.train.train_model as train_model_module
+from yeahml.build.components.callbacks.objects.base import TrainCallback
+from yeahml.train.checkpoint import TrainingState, _to_json
+from train_util import make_config, make_datasets, make_model
+
+
+def _get_checkpoints(tmp_path):
+    # {num_training_ops: path} of the saved checkpoints
+    ckpt_dir = list(tmp_path.glob("**/save/checkpoints"))[0]
+    return {
+        int(p.stem.split("-")[-1]): str(p.with_suffix(""))
+        for p in ckpt_dir.glob("ckpt-*.index")
+    }
+
+
+def _get_global_steps(tracker_state):
+    # the global steps of every update in the (nested) tracker state
+    global_steps = []
+    for k, v in tracker_state.items():
+        if k == "global_step" and v:
+            global_steps.extend(v)
+        elif isinstance(v, dict):
+            global_steps.extend(_get_global_steps(v))
+    return global_steps
+
+
+class OptimizerSnapshot(TrainCallback):
+    # the values of the optimizer variables after each batch (step)
+    def __init__(self, created):
+        super().__init__(relation_key="global")
+        self.created = created
+        self.snapshots = []
+
+    def post_batch(self):
+        optimizer = self.created["optimizers_dict"]["second_opt"]["optimizer"]
+        self.snapshots.append([v.numpy() for v in optimizer.variables])
+
+
+def test_checkpoint_schedule(monkeypatch, tmp_path):
+    """test that a checkpoint is written every n steps (and at the end of
+    training), including the current values of the optimizer variables and the
+    python state of the loop"""
+    # the optimizers created by train_model
+    created = {}
+    get_optimizers = train_model_module.get_optimizers
+
+    def _get_optimizers(*args, **kwargs):
+        created["optimizers_dict"] = get_optimizers(*args, **kwargs)
+        return created["optimizers_dict"]
+
+    monkeypatch.setattr(train_model_module, "get_optimizers", _get_optimizers)
+    snapshot = OptimizerSnapshot(created)
+    monkeypatch.setattr(train_model_module, "get_callbacks", lambda _: [snapshot])
+
+    tf.random.set_seed(0)
+    model = make_model()
+    # 6 (full) batches per pass, main_opt is trained for a pass then second_opt
+    config = make_config(
+        tmp_path,
+        two_opts=True,
+        logging__checkpoint={"every_n_steps": 5, "max_to_keep": 10},
+    )
+    config["optimize"]["scheduler"] = {"type": "round_robin"}
+    train_model_module.train_model(model, config, make_datasets())
+
+    checkpoints = _get_checkpoints(tmp_path)
+    assert sorted(checkpoints.keys()) == [5, 10, 12]
+
+    reader = tf.train.load_checkpoint(checkpoints[12])
+    assert reader.get_tensor("num_training_ops/.ATTRIBUTES/VARIABLE_VALUE") == 12
+    training_state = json.loads(
+        reader.get_tensor("training_state/.ATTRIBUTES/py_state")
+    )
+    assert training_state["obj_ds_to_epoch"]["second_obj"]["abalone"]["train"] == 1
+    # NOTE: once main_opt is complete, second_opt is the only optimizer and is
+    # selected without the scheduler
+    assert training_state["task"]["opt_scheduler"] == {
+        "order": ["main_opt", "second_opt"],
+        "last_selected": "main_opt",
+    }
+
+    # the optimizer variables are saved with their values at the step. NOTE:
+    # the second optimizer is first applied after the first (async) save
+    for num_training_ops in [10, 12]:
+        reader = tf.train.load_checkpoint(checkpoints[num_training_ops])
+        values = snapshot.snapshots[num_training_ops - 1]
+        assert (
+            reader.get_tensor(
+                "optimizers/second_opt/_iterations/.ATTRIBUTES/VARIABLE_VALUE"
+            )
+            == values[0]
+            == num_training_ops - 6
+        )
+        # e.g. the adam slots
+        for i, value in enumerate(values[1:], start=1):
+            saved = reader.get_tensor(
+                f"optimizers/second_opt/_variables/{i}/.ATTRIBUTES/VARIABLE_VALUE"
+            )
+            np.testing.assert_array_equal(saved, value)
+
+
+def test_checkpoint_training_state(monkeypatch, tmp_path):
+    """test that the python state in a checkpoint is the state at the step it
+    was saved, while training continues during the (async) write"""
+    # the training state (as json) at each save
+    expected = []
+    get_training_state = train_model_module.get_training_state
+
+    def _get_training_state(*args, **kwargs):
+        training_state = get_training_state(*args, **kwargs)
+        expected.append(json.loads(json.dumps(training_state, default=_to_json)))
+        return training_state
+
+    monkeypatch.setattr(train_model_module, "get_training_state", _get_training_state)
+    # the state is serialized on the background thread, slow it down so that
+    # the loop is further along when it is written
+    serialize = TrainingState.serialize
+
+    def _slow_serialize(self):
+        time.sleep(0.5)
+        return serialize(self)
+
+    monkeypatch.setattr(TrainingState, "serialize", _slow_serialize)
+
+    tf.random.set_seed(0)
+    config = make_config(
+        tmp_path,
+        two_opts=True,
+        logging__checkpoint={"every_n_steps": 5, "max_to_keep": 10},
+    )
+    train_model_module.train_model(make_model(), config, make_datasets())
+
+    checkpoints = _get_checkpoints(tmp_path)
+    assert sorted(checkpoints.keys()) == [5, 10, 12]
+    assert len(expected) == 3
+    for num_training_ops, expected_state in zip([5, 10, 12], expected):
+        reader = tf.train.load_checkpoint(checkpoints[num_training_ops])
+        training_state = json.loads(
+            reader.get_tensor("training_state/.ATTRIBUTES/py_state")
+        )
+        assert training_state == expected_state
+    # no pass (6 steps) was complete at step 5, one at step 10
+    assert expected[0]["obj_ds_to_epoch"] == {}
+    assert len(expected[1]["obj_ds_to_epoch"]) == 1
+    # the Tracker history does not include later steps
+    for num_training_ops, expected_state in zip([5, 10, 12], expected):
+        global_steps = _get_global_steps(expected_state["trackers"])
+        assert global_steps and max(global_steps) <= num_training_ops
@@ -0,0 +1,97 @@
+import pytest
+
+from yeahml.train.early_stopping import EarlyStopping
+
+
+def _loss_update(improved):
+    # the validation update of an objective, the loss (min) improved or not
+    return {
+        "loss": {"mse": {"mean": {"min": improved}}},
+        "metrics": {"meansquarederror": {"min": improved, "max": not improved}},
+    }
+
+
+def _run(early_stopping, improvements, obj_name="main_obj"):
+    # the passes (index) at which the objective was stopped
+    stopped_at = []
+    for i, improved in enumerate(improvements):
+        stopped = early_stopping.update("main_opt", {obj_name: _loss_update(improved)})
+        assert early_stopping.pop_stopped() == stopped
+        if stopped:
+            assert stopped == [("main_opt", obj_name)]
+            stopped_at.append(i)
+    return stopped_at
+
+
+ex_patience = {
+    "immediate": (1, 0, [True, False, False, False], [1]),
+    "patience": (2, 0, [True, False, True, False, False, False], [4]),
+    "improving": (2, 0, [True, True, True, True], []),
+    # the first passes are not counted
+    "warm_up": (1, 2, [False, False, False, False], [2]),
+    "warm_up_improved": (2, 1, [False, True, False, True, False, False], [5]),
+}
+
+
+@pytest.mark.parametrize(
+    "patience,warm_up,improvements,expected",
+    ex_patience.values(),
+    ids=list(ex_patience.keys()),
+)
+def test_patience(patience, warm_up, improvements, expected):
+    """test that an objective is stopped (once) after `patience` validation passes
+    without improvement"""
+    early_stopping = EarlyStopping(patience, warm_up=warm_up)
+    assert _run(early_stopping, improvements) == expected
+
+
+def test_stopped_once():
+    """test that the stop is only recorded on the transition into the stopped
+    state, including if the objective later improves and gets worse again"""
+    early_stopping = EarlyStopping(1)
+    assert _run(early_stopping, [True, False, False, True, False, False]) == [1]
+    assert early_stopping.state["main_opt"]["main_obj"]["stopped"]
+
+
+ex_monitor = {
+    # the loss (min) is used by default
+    "loss": (None, [True, False], [1]),
+    "metric_min": ({"metric": "meansquarederror", "track": "min"}, [True, False], [1]),
+    # the max of the metric improves when the loss does not
+    "metric_max": ({"metric": "meansquarederror", "track": "max"}, [False, True], [1]),
+}
+
+
+@pytest.mark.parametrize(
+    "monitor,improvements,expected", ex_monitor.values(), ids=list(ex_monitor.keys())
+)
+def test_monitor(monitor, improvements, expected):
+    """test that the monitored value (loss or metric min/max) determines an
+    improvement"""
+    obj_to_monitor = {"main_obj": monitor} if monitor else None
+    early_stopping = EarlyStopping(1, obj_to_monitor=obj_to_monitor)
+    assert _run(early_stopping, improvements) == expected
+
+
+def test_monitor_untracked_metric():
+    """test that a metric that is not tracked for the objective raises"""
+    early_stopping = EarlyStopping(
+        1, obj_to_monitor={"main_obj": {"metric": "other", "track": "min"}}
+    )
+    with pytest.raises(KeyError):
+        early_stopping.update("main_opt", {"main_obj": _loss_update(True)})
+
+
+ex_invalid = {
+    "patience": {"patience": 0},
+    "warm_up": {"patience": 1, "warm_up": -1},
+    # the loss only tracks the min
+    "loss_max": {"patience": 1, "obj_to_monitor": {"main_obj": {"track": "max"}}},
+}
+
+
+@pytest.mark.parametrize("kwargs", ex_invalid.values(), ids=list(ex_invalid.keys()))
+def test_invalid(kwargs):
+    """test that an invalid configuration raises"""
+    with pytest.raises(ValueError):
+        EarlyStopping(**kwargs)
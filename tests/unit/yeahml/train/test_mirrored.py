@@ -0,0 +1,64 @@
+import numpy as np
+
+from train_util import run_script, wait_script
+
+# the same model is trained (from the same initial weights) on a single device
+# and mirrored on two (logical) cpu devices
+_SCRIPT = """
+import sys
+
+import numpy as np
+import tensorflow as tf
+
+from yeahml.build.components.distribution import configure_strategy
+
+dist_cdict = {"strategy": "mirrored", "num_cpu_devices": 2}
+strategy = configure_strategy({"distribution": dist_cdict})
+assert strategy.num_replicas_in_sync == 2
+
+from yeahml.train.train_model import train_model
+from train_util import make_config, make_datasets, make_model
+
+root, out_path = sys.argv[1], sys.argv[2]
+tf.random.set_seed(0)
+with strategy.scope():
+    mirrored_model = make_model()
+model = make_model()
+model.set_weights(mirrored_model.get_weights())
+
+out = {}
+for name, cur_model, section_keys in [
+    ("mirrored", mirrored_model, {"performance__distribution": dist_cdict}),
+    ("single", model, {}),
+]:
+    config = make_config(f"{root}/{name}", epochs=2, **section_keys)
+    # the size of the update depends on the scale of the gradients (unlike adam)
+    config["optimize"]["optimizers"]["main_opt"]["type"] = "sgd"
+    config["optimize"]["optimizers"]["main_opt"]["options"] = {"learning_rate": 0.1}
+    return_dict = train_model(cur_model, config, make_datasets())
+    obj_tracker = return_dict["tracker"]["main_opt"]["main_obj"]["loss"]["abalone"]
+    out[f"{name}_loss"] = obj_tracker["train"]["mse"]["mean"].values
+    out[f"{name}_val_loss"] = obj_tracker["val"]["mse"]["mean"].values
+    out[f"{name}_weights"] = np.concatenate(
+        [w.ravel() for w in cur_model.get_weights()]
+    )
+np.savez(out_path, **out)
+"""
+
+
+def test_mirrored(tmp_path):
+    """test that training on two replicas (each with half of the batch) matches
+    training on a single device: the loss of each replica is averaged over the
+    global batch"""
+    out_path = tmp_path.joinpath("out.npz")
+    wait_script(run_script(_SCRIPT, [tmp_path, out_path]))
+    out = np.load(out_path)
+
+    for desc in ["loss", "val_loss"]:
+        assert len(out[f"single_{desc}"]) > 0
+        np.testing.assert_allclose(
+            out[f"mirrored_{desc}"], out[f"single_{desc}"], rtol=1e-5
+        )
+    np.testing.assert_allclose(
+        out["mirrored_weights"], out["single_weights"], rtol=1e-5, atol=1e-6
+    )
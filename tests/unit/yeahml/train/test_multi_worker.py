@@ -0,0 +1,90 @@
+import json
+import socket
+
+import numpy as np
+
+from train_util import run_script, wait_script
+
+# each worker is run in its own process (the collective ops of a
+# MultiWorkerMirroredStrategy are configured once per process)
+_WORKER = """
+import json
+import sys
+
+import numpy as np
+import tensorflow as tf
+
+from yeahml.build.components.distribution import configure_strategy, is_chief
+
+dist_cdict, root, out_path = json.loads(sys.argv[1]), sys.argv[2], sys.argv[3]
+strategy = configure_strategy({"distribution": dist_cdict})
+
+from yeahml.train.train_model import train_model
+from train_util import make_config, make_datasets, make_model
+
+tf.random.set_seed(dist_cdict["task"]["index"])
+with strategy.scope():
+    model = make_model()
+config = make_config(
+    root,
+    logging__checkpoint={"every_n_steps": 3},
+    performance__distribution=dist_cdict,
+)
+train_model(model, config, make_datasets())
+np.savez(out_path, chief=is_chief(strategy), *model.get_weights())
+"""
+
+
+def _get_free_ports(n):
+    socks = [socket.socket() for _ in range(n)]
+    for s in socks:
+        s.bind(("localhost", 0))
+    ports = [s.getsockname()[1] for s in socks]
+    for s in socks:
+        s.close()
+    return ports
+
+
+def test_multi_worker(tmp_path):
+    """test that two (localhost) workers train the same weights and that only
+    the chief writes the checkpoints and logs"""
+    cluster = {"worker": [f"localhost:{p}" for p in _get_free_ports(2)]}
+    root = tmp_path.joinpath("yeahml")
+    procs, out_paths, tmp_dirs = [], [], []
+    for index in range(2):
+        dist_cdict = {
+            "strategy": "multi_worker_mirrored",
+            "cluster": cluster,
+            "task": {"type": "worker", "index": index},
+        }
+        # the temporary run path of the (non-chief) worker is created here
+        tmp_dir = tmp_path.joinpath(f"tmp_{index}")
+        tmp_dir.mkdir()
+        out_path = tmp_path.joinpath(f"worker_{index}.npz")
+        procs.append(
+            run_script(
+                _WORKER,
+                [json.dumps(dist_cdict), root, out_path],
+                TMPDIR=str(tmp_dir),
+            )
+        )
+        out_paths.append(out_path)
+        tmp_dirs.append(tmp_dir)
+    for proc in procs:
+        wait_script(proc)
+
+    results = [np.load(p) for p in out_paths]
+    assert [bool(r["chief"]) for r in results] == [True, False]
+    weight_names = [k for k in results[0].files if k.startswith("arr_")]
+    assert weight_names
+    for name in weight_names:
+        np.testing.assert_array_equal(results[0][name], results[1][name])
+
+    # a single run, written by the chief
+    run_paths = list(root.glob("**/run_*"))
+    assert len(run_paths) == 1
+    assert list(run_paths[0].glob("save/checkpoints/ckpt-*.index"))
+    assert run_paths[0].joinpath("yeahml_logs", "train.log").exists()
+    # the temporary run path of the other worker is removed
+    for tmp_dir in tmp_dirs:
+        assert not list(tmp_dir.glob("yeahml_worker_*"))
@@ -0,0 +1,103 @@
+import pytest
+import tensorflow as tf
+
+from yeahml.train.profiler import Profiler
+
+
+def _record_traces(monkeypatch):
+    # the run name of each started trace, None for each stop
+    calls = []
+    monkeypatch.setattr(
+        tf.profiler.experimental,
+        "start",
+        lambda logdir: calls.append(logdir.split("/")[-1]),
+    )
+    monkeypatch.setattr(tf.profiler.experimental, "stop", lambda: calls.append(None))
+    return calls
+
+
+ex_windows = {
+    "single": ([2], 2, [1, 2, 3, 4, 5], [(2, "train_2_4"), (4, None)]),
+    "two": (
+        [1, 4],
+        1,
+        [1, 2, 3, 4, 5],
+        [(1, "train_1_2"), (2, None), (4, "train_4_5"), (5, None)],
+    ),
+    # a multi step skips over the start, the window is started late
+    "late": ([3], 4, [2, 4, 6, 8], [(4, "train_3_7"), (8, None)]),
+    # the second window begins inside the first, it is started once the
+    # first has stopped
+    "overlap": (
+        [1, 2],
+        3,
+        [1, 2, 3, 4, 5, 6],
+        [(1, "train_1_4"), (4, None), (4, "train_2_5"), (5, None)],
+    ),
+    # the second window has passed once the first has stopped
+    "skipped": ([1, 2], 2, [1, 5, 6], [(1, "train_1_3"), (5, None)]),
+    # the window is stopped by close() (step -1)
+    "past_end": ([3], 10, [1, 2, 3, 4], [(3, "train_3_13"), (-1, None)]),
+}
+
+
+@pytest.mark.parametrize(
+    "start_steps,num_steps,steps,expected",
+    ex_windows.values(),
+    ids=list(ex_windows.keys()),
+)
+def test_profile_window(monkeypatch, tmp_path, start_steps, num_steps, steps, expected):
+    """test the step at which each profile window starts and stops"""
+    calls = _record_traces(monkeypatch)
+    profiler = Profiler(tmp_path, start_steps=start_steps, num_steps=num_steps)
+    got = []
+    for step in steps:
+        n = len(calls)
+        profiler.update(step)
+        got.extend([(step, call) for call in calls[n:]])
+        # step markers are only added while a window is captured
+        marker = profiler.trace_step(step)
+        is_traced = isinstance(marker, tf.profiler.experimental.Trace)
+        assert is_traced == (profiler.active == "train")
+    n = len(calls)
+    profiler.close()
+    got.extend([(-1, call) for call in calls[n:]])
+    assert got == expected
+    assert profiler.active is None
+
+
+def test_profile_validation(monkeypatch, tmp_path):
+    """test that only the first validation pass outside a step window is
+    profiled"""
+    calls = _record_traces(monkeypatch)
+    profiler = Profiler(tmp_path, start_steps=[1], num_steps=2, validation=True)
+    profiler.update(1)
+    # the step window is being captured
+    assert not profiler.start_validation()
+    profiler.update(3)
+    assert profiler.start_validation()
+    assert profiler.active == "val"
+    profiler.stop_validation()
+    assert not profiler.start_validation()
+    assert calls == ["train_1_3", None, "val", None]
+
+
+def test_profile_written(tmp_path):
+    """test that the trace of a window is written"""
+    profiler = Profiler(tmp_path, start_steps=[0], num_steps=1)
+    profiler.update(0)
+    with profiler.trace_step(0):
+        tf.reduce_sum(tf.ones([4, 4]))
+    profiler.update(1)
+    assert profiler.active is None
+    run_path = tmp_path.joinpath("train_0_1")
+    assert list(run_path.rglob("*.xplane.pb"))
+
+
+@pytest.mark.parametrize(
+    "start_steps,num_steps", [([-1], 2), ([2], 0)], ids=["negative_start", "no_steps"]
+)
+def test_invalid_profile(tmp_path, start_steps, num_steps):
+    """test that invalid windows raise"""
+    with pytest.raises(ValueError):
+        Profiler(tmp_path, start_steps=start_steps, num_steps=num_steps)
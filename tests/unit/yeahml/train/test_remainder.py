@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from yeahml.train.train_model import train_model
+from train_util import make_config, make_datasets, make_model
+
+
+@pytest.mark.parametrize(
+    "remainder,num_instances",
+    [("drop", 32), ("keep_eval", 40)],
+    ids=["drop", "keep_eval"],
+)
+def test_val_remainder(tmp_path, remainder, num_instances):
+    """test that the val results include the final partial batch (40 instances,
+    batch of 16) when the remainder is kept"""
+    tf.random.set_seed(0)
+    model = make_model()
+    config = make_config(tmp_path)
+    config["hyper_parameters"]["dataset"]["remainder"] = remainder
+    datasets = make_datasets()
+    return_dict = train_model(model, config, datasets)
+
+    x, y = next(iter(datasets["abalone"]["val"].batch(40)))
+    pred = model(x)[0].numpy()
+    expected = np.mean((pred[:num_instances] - y.numpy()[:num_instances]) ** 2)
+    val_results = return_dict["tracker"]["main_opt"]["main_obj"]
+    loss = val_results["loss"]["abalone"]["val"]["mse"]["mean"].values[-1]
+    metric = val_results["metrics"]["abalone"]["val"]["meansquarederror"].values[-1]
+    np.testing.assert_allclose(loss, expected, rtol=1e-5)
+    np.testing.assert_allclose(metric, expected, rtol=1e-5)
+    # the full and the partial batch share a single trace
+    assert return_dict["traces"]["main_obj:abalone:val_step"] == 1
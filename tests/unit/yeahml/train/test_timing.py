@@ -0,0 +1,120 @@
+import csv
+import json
+
+import pytest
+
+from yeahml.train.timing import REPORT_COLUMNS, DurationHistogram, PhaseTimer
+
+ex_percentiles = {
+    "uniform": ([i / 1000 for i in range(1, 101)], {0.5: 0.050, 0.95: 0.095}),
+    "constant": ([0.02] * 10, {0.5: 0.02, 0.95: 0.02}),
+    # a single slow outlier only moves the tail
+    "outlier": ([0.001] * 99 + [1.0], {0.5: 0.001, 0.95: 0.001, 1.0: 1.0}),
+    "below_min": ([1e-8, 1e-7], {0.5: 1e-7, 0.95: 1e-7}),
+}
+
+
+@pytest.mark.parametrize(
+    "durations,expected", ex_percentiles.values(), ids=list(ex_percentiles.keys())
+)
+def test_percentile(durations, expected):
+    """test that the percentiles are the upper edge of the bucket, within 5% of
+    the exact value and not more than the max"""
+    histogram = DurationHistogram()
+    for d in durations:
+        histogram.record(d)
+    for q, exact in expected.items():
+        p = histogram.percentile(q)
+        assert exact <= p <= max(exact * 1.05, 1e-6)
+        assert p <= histogram.max
+
+    summary = histogram.summary()
+    assert summary["count"] == len(durations)
+    assert summary["total"] == pytest.approx(sum(durations))
+    assert summary["mean"] == pytest.approx(sum(durations) / len(durations))
+    assert summary["max"] == max(durations)
+
+
+def test_percentile_empty():
+    """test the summary of a histogram without any durations"""
+    summary = DurationHistogram().summary()
+    assert summary == {
+        "count": 0,
+        "total": 0.0,
+        "mean": 0.0,
+        "p50": 0.0,
+        "p95": 0.0,
+        "max": 0.0,
+    }
+
+
+def _get_timer():
+    timer = PhaseTimer()
+    for _ in range(4):
+        timer.record("obtain_batch", 0.5, "main_opt", "main_obj", "abalone")
+        timer.record("calc_gradient", 0.25, "main_opt", "main_obj", "abalone")
+    timer.record("obtain_batch", 1.0, "second_opt", "second_obj", "abalone")
+    timer.record("validation", 2.0, "main_opt", "main_obj", "abalone")
+    with timer.time("tracker", "main_opt", "main_obj", "abalone"):
+        pass
+    timer.stop()
+    # a fixed total time for the fraction
+    timer.end_time = timer.start_time + 10.0
+    return timer
+
+
+def test_report():
+    """test the rows of the report and that the input stall is the time spent
+    obtaining batches (over all keys)"""
+    report = _get_timer().report()
+    assert report["total_time"] == pytest.approx(10.0)
+    assert report["input_stall"]["time"] == pytest.approx(3.0)
+    assert report["input_stall"]["fraction"] == pytest.approx(0.3)
+
+    keys = [
+        (p["phase"], p["optimizer"], p["objective"], p["dataset"])
+        for p in report["phases"]
+    ]
+    assert keys == [
+        ("calc_gradient", "main_opt", "main_obj", "abalone"),
+        ("obtain_batch", "main_opt", "main_obj", "abalone"),
+        ("obtain_batch", "second_opt", "second_obj", "abalone"),
+        ("tracker", "main_opt", "main_obj", "abalone"),
+        ("validation", "main_opt", "main_obj", "abalone"),
+    ]
+    calc_gradient = report["phases"][0]
+    assert calc_gradient["count"] == 4
+    assert calc_gradient["total"] == pytest.approx(1.0)
+    assert set(calc_gradient.keys()) == set(REPORT_COLUMNS)
+
+
+def test_report_no_input_stall():
+    """test that the input stall is None if the batches were not obtained by
+    the loop (e.g. within a multi step fn)"""
+    timer = PhaseTimer()
+    timer.record("train_step", 0.5, "main_opt", "main_obj", "abalone")
+    report = timer.report()
+    assert report["input_stall"] == {"time": None, "fraction": None}
+
+
+def test_write_report(tmp_path):
+    """test the json and csv output, the input stall is the first csv row"""
+    timer = _get_timer()
+    report = timer.report()
+    json_path, csv_path = timer.write_report(tmp_path, report)
+
+    with open(json_path, "r") as fp:
+        assert json.load(fp) == report
+
+    with open(csv_path, "r", newline="") as fp:
+        reader = csv.DictReader(fp)
+        assert reader.fieldnames == REPORT_COLUMNS
+        rows = list(reader)
+    assert rows[0]["phase"] == "input_stall"
+    assert float(rows[0]["total"]) == pytest.approx(3.0)
+    assert len(rows) == len(report["phases"]) + 1
+    for row, phase_dict in zip(rows[1:], report["phases"]):
+        assert row["phase"] == phase_dict["phase"]
+        assert row["optimizer"] == phase_dict["optimizer"]
+        assert int(row["count"]) == phase_dict["count"]
+        assert float(row["p95"]) == pytest.approx(phase_dict["p95"])
@@ -0,0 +1,96 @@
+import pytest
+import tensorflow as tf
+
+import yeahml.train.train_model as train_model_module
+from yeahml.build.components.callbacks.objects.base import CB_HOOK_NAMES, TrainCallback
+from train_util import make_config, make_datasets, make_model
+
+
+class Recorder(TrainCallback):
+    # records the name of every hook that is called, in order
+    def __init__(self, relation_key="global", relation_names=None):
+        super().__init__(relation_key=relation_key, relation_names=relation_names)
+        self.calls = []
+        for hook_name in CB_HOOK_NAMES:
+            setattr(self, hook_name, self._recorder(hook_name))
+
+    def _recorder(self, hook_name):
+        def _record():
+            self.calls.append(hook_name)
+
+        return _record
+
+
+def _train_with_recorder(monkeypatch, tmp_path, **section_keys):
+    recorder = Recorder()
+    monkeypatch.setattr(train_model_module, "get_callbacks", lambda _: [recorder])
+    tf.random.set_seed(0)
+    config = make_config(tmp_path, **section_keys)
+    train_model_module.train_model(make_model(), config, make_datasets())
+    return recorder.calls
+
+
+def _assert_nested(calls, outer, inner):
+    # every `inner` hook is called within a pre/post pair of the `outer` hook
+    depth = 0
+    for call in calls:
+        if call == f"pre_{outer}":
+            assert depth == 0
+            depth += 1
+        elif call == f"post_{outer}":
+            assert depth == 1
+            depth -= 1
+        elif call in (f"pre_{inner}", f"post_{inner}"):
+            assert depth == 1, f"{call} called outside of {outer}"
+    assert depth == 0
+
+
+ex_step_options = {
+    "default": {},
+    "compiled": {"performance__compiled_step": True},
+    "multi_step": {"performance__steps_per_execution": 3},
+}
+
+
+@pytest.mark.parametrize(
+    "section_keys", ex_step_options.values(), ids=list(ex_step_options.keys())
+)
+def test_hook_order(monkeypatch, tmp_path, section_keys):
+    """test that the batch hooks wrap the work on the batch and that each dataset
+    pass is closed"""
+    calls = _train_with_recorder(monkeypatch, tmp_path, **section_keys)
+
+    _assert_nested(calls, "dataset_pass", "batch")
+    _assert_nested(calls, "batch", "prediction")
+    _assert_nested(calls, "batch", "metric")
+    assert calls.count("pre_batch") == calls.count("post_batch") > 0
+    if section_keys.get("performance__steps_per_execution"):
+        # the batches are obtained within the step
+        _assert_nested(calls, "batch", "obtain_batch")
+        first = calls.index("pre_batch")
+        assert calls[first : first + 2] == ["pre_batch", "pre_obtain_batch"]
+
+
+def test_early_stopped_pass_is_closed(monkeypatch, tmp_path):
+    """test that a pass that ends early (early stopping) calls post_dataset_pass"""
+    # the loss decreasing is "worse" when tracking the max, stopping the
+    # objective within the first pass
+    early_stopping = {
+        "epochs": 1,
+        "warm_up": 0,
+        "monitor": {
+            "main_obj": {"metric": "meansquarederror", "track": "max"},
+            "second_obj": {"metric": "meanabsoluteerror", "track": "max"},
+        },
+    }
+    calls = _train_with_recorder(
+        monkeypatch,
+        tmp_path,
+        epochs=20,
+        hyper_parameters__val_every_n_steps=2,
+        hyper_parameters__early_stopping=early_stopping,
+    )
+    # a single pass (of the 20 epochs) is run
+    assert calls.count("pre_dataset_pass") == calls.count("post_dataset_pass") == 1
+    assert calls.count("pre_batch") < 7
+    _assert_nested(calls, "dataset_pass", "batch")
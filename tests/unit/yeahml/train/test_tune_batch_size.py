@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from yeahml.train.tune_batch_size import MemorySampler, tune_batch_size
+from train_util import make_config, make_datasets, make_model
+
+
+def _tune(tmp_path, num_train=200, **kwargs):
+    tf.random.set_seed(0)
+    model = make_model()
+    initial_weights = model.get_weights()
+    config = make_config(tmp_path)
+    tune_dict = tune_batch_size(
+        model,
+        config,
+        datasets=make_datasets(num_train=num_train),
+        num_steps=2,
+        warmup_steps=1,
+        **kwargs,
+    )
+    # the weights are restored after the trials
+    for w, initial_w in zip(model.get_weights(), initial_weights):
+        np.testing.assert_array_equal(w, initial_w)
+    return tune_dict, config
+
+
+def test_plateau(tmp_path):
+    """test that the trials stop once the throughput has not improved, and the
+    best batch size is written to the config"""
+    # no trial can improve on the first
+    tune_dict, config = _tune(tmp_path, start_batch=4, min_improvement=1e6)
+    trials = tune_dict["trials"]
+    assert [t["batch"] for t in trials] == [4, 8]
+    assert trials[-1]["stopped"] == "plateau"
+    for trial in trials:
+        assert trial["instances_per_sec"] > 0
+        assert trial["peak_memory"] >= trial["trial_memory"] >= 0
+    assert tune_dict["batch"] in [4, 8]
+    assert config["hyper_parameters"]["dataset"]["batch"] == tune_dict["batch"]
+
+
+def test_dataset_smaller_than_batch(tmp_path):
+    """test that the trials stop once the batch size is larger than the dataset"""
+    # every trial "improves", the trials only stop on the dataset size
+    tune_dict, config = _tune(
+        tmp_path, num_train=40, start_batch=8, growth=4, min_improvement=-1.0
+    )
+    trials = tune_dict["trials"]
+    assert [t["batch"] for t in trials] == [8, 32, 128]
+    assert trials[-1] == {
+        "batch": 128,
+        "stopped": "dataset smaller than the batch size",
+    }
+    assert tune_dict["batch"] == 32
+    assert config["hyper_parameters"]["dataset"]["batch"] == 32
+
+
+def test_memory_budget(tmp_path):
+    """test that a trial over the memory budget is not selected"""
+    with pytest.raises(ValueError):
+        _tune(tmp_path, start_batch=4, memory_budget=1)
+
+
+def test_memory_sampler():
+    """test that the sampler measures the increase in memory during a trial"""
+    sampler = MemorySampler(interval=0.001)
+    sampler.start()
+    # ~80MB
+    data = np.ones((10, 1024, 1024), dtype=np.float64)
+    peak, increase = sampler.stop()
+    assert increase >= data.nbytes * 0.9
+    assert peak >= increase
+    del data
+
+    # the increase of a later (smaller) trial is not that of the earlier one
+    sampler.start()
+    _, increase = sampler.stop()
+    assert increase < 10 * 1024 * 1024
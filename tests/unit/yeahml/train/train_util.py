@@ -0,0 +1,137 @@
+import copy
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import tensorflow as tf
+
+# a small (two headed) model, dataset and config that are trained end to end by
+# the train tests
+
+
+def make_model():
+    inp = tf.keras.layers.Input(shape=(2, 1), name="feature_a")
+    x = tf.keras.layers.Flatten()(inp)
+    x = tf.keras.layers.Dense(8, activation="relu", name="dense_1")(x)
+    out_a = tf.keras.layers.Reshape((1, 1), name="reshape_a")(
+        tf.keras.layers.Dense(1, name="dense_a")(x)
+    )
+    out_b = tf.keras.layers.Reshape((1, 1), name="reshape_b")(
+        tf.keras.layers.Dense(1, name="dense_b")(x)
+    )
+    return tf.keras.Model(inputs=[inp], outputs=[out_a, out_b], name="tiny")
+
+
+def make_ds(num_instances, seed=0):
+    rng = np.random.default_rng(seed)
+    x = rng.normal(size=(num_instances, 2, 1)).astype("float32")
+    y = (x.sum(axis=1, keepdims=True) * 0.5).astype("float32")
+    return tf.data.Dataset.from_tensor_slices((x, y))
+
+
+def make_datasets(num_train=100, num_val=40, num_test=37):
+    return {
+        "abalone": {
+            "train": make_ds(num_train, 0),
+            "val": make_ds(num_val, 1),
+            "test": make_ds(num_test, 2),
+        }
+    }
+
+
+_OBJECTIVES = {
+    "main_obj": {
+        "loss": {"type": "mse", "options": None, "track": ["mean"]},
+        "metric": {"type": ["meansquarederror"], "options": [None]},
+        "in_config": {
+            "type": "supervised",
+            "options": {"prediction": "reshape_a", "target": "target_v"},
+            "dataset": "abalone",
+        },
+    },
+    "second_obj": {
+        "loss": {"type": "mae", "options": None, "track": ["mean"]},
+        "metric": {"type": ["meanabsoluteerror"], "options": [None]},
+        "in_config": {
+            "type": "supervised",
+            "options": {"prediction": "reshape_b", "target": "target_v"},
+            "dataset": "abalone",
+        },
+    },
+}
+
+
+def make_config(root, epochs=1, two_opts=False, **section_keys):
+    # section_keys: e.g. hyper_parameters__epochs=2 sets
+    # config["hyper_parameters"]["epochs"] = 2
+    if two_opts:
+        optimizers = {
+            "main_opt": {
+                "type": "adam",
+                "options": {"learning_rate": 0.01},
+                "objectives": ["main_obj"],
+            },
+            "second_opt": {
+                "type": "adam",
+                "options": {"learning_rate": 0.01},
+                "objectives": ["second_obj"],
+            },
+        }
+    else:
+        optimizers = {
+            "main_opt": {
+                "type": "adam",
+                "options": {"learning_rate": 0.01},
+                "objectives": ["main_obj", "second_obj"],
+            }
+        }
+    config = {
+        "meta": {
+            "yeahml_dir": str(root),
+            "data_name": "abalone",
+            "experiment_name": "tiny",
+            "start_fresh": True,
+        },
+        "logging": {
+            "console": {"level": "critical", "format_str": "%(message)s"},
+            "file": {"level": "critical", "format_str": "%(message)s"},
+            "track": {"tracker_steps": 5, "tensorboard": {"param_steps": 0}},
+        },
+        "performance": {"objectives": copy.deepcopy(_OBJECTIVES)},
+        "hyper_parameters": {"epochs": epochs, "dataset": {"batch": 16}},
+        "optimize": {"optimizers": optimizers},
+        "data": {
+            "datasets": {"abalone": {"split": {"names": ["train", "val", "test"]}}}
+        },
+        "callbacks": {"objects": {}},
+        "model": {"name": "tiny"},
+    }
+    for section_key, value in section_keys.items():
+        section, key = section_key.split("__")
+        config[section][key] = value
+    return config
+
+
+def run_script(script, args, **env):
+    # run the script in a new python process (e.g. the logical devices and
+    # collective ops of a tf.distribute strategy can only be configured before
+    # the runtime is initialized). The test dir is added to the path so that
+    # the script can import train_util
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join([str(Path(__file__).parent)] + sys.path),
+        **env,
+    }
+    return subprocess.Popen(
+        [sys.executable, "-c", script] + [str(a) for a in args],
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+
+
+def wait_script(proc, timeout=600):
+    output, _ = proc.communicate(timeout=timeout)
+    assert proc.returncode == 0, output.decode()[-2000:]
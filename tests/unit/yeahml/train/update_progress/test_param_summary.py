@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from yeahml.train.update_progress.param_summary import ParamSummarizer, _histogram
+
+
+def _get_model():
+    inp = tf.keras.layers.Input(shape=(3,))
+    x = tf.keras.layers.Dense(40, name="dense_a")(inp)
+    out = tf.keras.layers.Dense(1, name="dense_b")(x)
+    return tf.keras.Model(inputs=[inp], outputs=[out])
+
+
+def _read_histograms(log_dir):
+    # {(tag, step): [buckets, 3] array}
+    hists = {}
+    for event_file in log_dir.iterdir():
+        for event in tf.compat.v1.train.summary_iterator(str(event_file)):
+            for value in event.summary.value:
+                hists[(value.tag, event.step)] = tf.make_ndarray(value.tensor)
+    return hists
+
+
+ex_histograms = {
+    "spread": (np.arange(10, dtype=np.float32), 5),
+    "constant": (np.full([4, 3], 2.0, dtype=np.float32), 3),
+}
+
+
+@pytest.mark.parametrize(
+    "data,buckets", ex_histograms.values(), ids=list(ex_histograms.keys())
+)
+def test_histogram(data, buckets):
+    """test the buckets (left edge, right edge, count) of the histogram"""
+    hist = _histogram(tf.constant(data), buckets).numpy()
+    assert hist.shape == (buckets, 3)
+    assert hist[:, 2].sum() == data.size
+    # the edges are contiguous and cover the values
+    np.testing.assert_allclose(hist[1:, 0], hist[:-1, 1])
+    assert hist[0, 0] <= data.min() and hist[-1, 1] >= data.max()
+    if data.min() == data.max():
+        assert hist[-1, 1] - hist[0, 0] == pytest.approx(1.0)
+
+
+def test_histograms_written(tmp_path):
+    """test that the histogram of each variable is written (the variables are
+    rotated through in chunks of max_variables) and large variables are
+    sampled"""
+    model = _get_model()
+    # dense_a/kernel (120 values), dense_a/bias (40), dense_b/kernel, dense_b/bias
+    summarizer = ParamSummarizer(model, sample_size=50, max_variables=2, buckets=10)
+    writer = tf.summary.create_file_writer(str(tmp_path))
+    for step in [10, 20, 30]:
+        summarizer(writer, step)
+    summarizer.close()
+    writer.flush()
+
+    hists = _read_histograms(tmp_path)
+    names = [v.name.split(":")[0] for v in model.variables]
+    expected_keys = [(names[0], 10), (names[1], 10), (names[2], 20), (names[3], 20)]
+    expected_keys += [(names[0], 30), (names[1], 30)]
+    assert sorted(hists.keys()) == sorted(expected_keys)
+
+    for (name, step), hist in hists.items():
+        assert hist.shape == (10, 3)
+        size = [
+            v.shape.num_elements()
+            for v in model.variables
+            if v.name.split(":")[0] == name
+        ][0]
+        assert hist[:, 2].sum() == min(size, 50)
+
+    # the values of the (unsampled) bias are counted
+    bias = model.get_layer("dense_b").bias.numpy()
+    hist = hists[(names[3], 20)]
+    assert hist[0, 0] <= bias.min() and hist[-1, 1] >= bias.max()
+
+
+def test_invalid_options():
+    """test that negative options raise"""
+    with pytest.raises(ValueError):
+        ParamSummarizer(_get_model(), sample_size=-1)
+    with pytest.raises(ValueError):
+        ParamSummarizer(_get_model(), max_variables=-1)
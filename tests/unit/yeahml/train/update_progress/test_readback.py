@@ -0,0 +1,87 @@
+import numpy as np
+import tensorflow as tf
+
+from yeahml.train.update_progress.readback import DeferredReadback
+
+
+class RecordingTracker:
+    def __init__(self):
+        self.values = []
+
+    def update(self, value, step, global_step):
+        self.values.append(value)
+        return {"step": step}
+
+
+def _get_objs():
+    mean = tf.keras.metrics.Mean()
+    mean.update_state([1.0, 2.0, 6.0])
+    # a vector valued metric, one value per threshold
+    precision = tf.keras.metrics.Precision(thresholds=[0.3, 0.7])
+    precision.update_state([1, 0, 1, 0], [0.9, 0.5, 0.4, 0.1])
+    # an integer scalar
+    count = tf.keras.metrics.Sum(dtype=tf.int32)
+    count.update_state([2, 3])
+    return {"mean": mean, "precision": precision, "count": count}
+
+
+def _add(readback, objs, trackers, writer):
+    for name, tf_obj in objs.items():
+        readback.add(
+            ("obj", name), tf_obj, trackers[name], writer, ("metric", "ds"), name, 5, 2
+        )
+
+
+def test_flush_keeps_shapes():
+    """test that scalar and non-scalar results are read back with their shape,
+    pushed to the trackers, and their states reset"""
+    objs = _get_objs()
+    expected = {name: obj.result().numpy() for name, obj in objs.items()}
+    assert expected["precision"].shape == (2,)
+
+    trackers = {name: RecordingTracker() for name in objs}
+    writer = tf.summary.create_noop_writer()
+    readback = DeferredReadback()
+    _add(readback, objs, trackers, writer)
+    update_dict = readback.flush()
+
+    assert update_dict == {"obj": {name: {"step": 5} for name in objs}}
+    for name, tracker in trackers.items():
+        assert len(tracker.values) == 1
+        value = tracker.values[0]
+        assert np.shape(value) == np.shape(expected[name])
+        np.testing.assert_allclose(value, expected[name])
+    assert np.ndim(trackers["mean"].values[0]) == 0
+
+    # the states are reset, and the readback fn is reused
+    for obj in objs.values():
+        np.testing.assert_array_equal(obj.result().numpy(), 0)
+    objs["precision"].update_state([1, 1], [0.5, 0.8])
+    _add(readback, objs, trackers, writer)
+    readback.flush()
+    assert len(readback._fns) == 1
+    np.testing.assert_allclose(trackers["precision"].values[1], [1.0, 1.0])
+
+
+def test_read_writes_summaries(tmp_path):
+    """test that each element of a non-scalar result is written to tensorboard"""
+    objs = _get_objs()
+    trackers = {name: RecordingTracker() for name in objs}
+    writer = tf.summary.create_file_writer(str(tmp_path))
+    readback = DeferredReadback()
+    _add(readback, objs, trackers, writer)
+    read_values = readback.read()
+    writer.flush()
+
+    # the trackers are only updated by apply
+    assert all([not t.values for t in trackers.values()])
+    readback.apply(read_values)
+    assert all([len(t.values) == 1 for t in trackers.values()])
+
+    tags = set()
+    for event_file in tmp_path.iterdir():
+        for event in tf.compat.v1.train.summary_iterator(str(event_file)):
+            tags.update([v.tag for v in event.summary.value])
+    for name in ["mean", "count", "precision/0", "precision/1"]:
+        assert f"metric/ds/{name}/global" in tags
+        assert f"metric/ds/{name}/direct" in tags